@@ -1,27 +1,102 @@
+import os
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import OuterRef, QuerySet
+from django.forms import ModelForm
 from django.urls.resolvers import URLPattern
-from .models import Stock, UserStock, StockDataAudit
-from django.urls import path
-from .utils import StockDataGenerator
+from .export import export_path
+from .models import DataExport, Order, PriceTick, Symbol, UserStock, StockDataAudit, Trade, Watchlist
+from .forms import StockGenerationForm
+from .paginator import EstimatedCountPaginator
+from .price_snapshot import latest_tick_annotations
+from .tasks import export_data, generate_stock_data
+from django.urls import path, reverse
 from django.contrib import messages
-from django.shortcuts import redirect
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.html import format_html
 # Import for type hinting HTTP requests and responses
-from django.http import HttpRequest, HttpResponse
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from typing import Any, List, Optional, Tuple
 
 # Register your models here.
 
 
-@admin.register(Stock)
-class StockAdmin(admin.ModelAdmin):
+class LatestQuotesFilter(admin.SimpleListFilter):
     """
-    Admin class for managing Stock model in Django admin interface.
+    Changelist filter limiting the stock history to the latest quote of every stock.
+    """
+    title = 'quotes'
+    parameter_name = 'quotes'
+
+    def lookups(self, request: HttpRequest, model_admin: admin.ModelAdmin) -> List[Tuple[str, str]]:
+        """
+        Return the filter options shown in the admin sidebar.
+        """
+        return [('latest', 'Latest quotes only')]
+
+    def queryset(self, request: HttpRequest, queryset: QuerySet) -> Optional[QuerySet]:
+        """
+        Keep only the newest tick of every symbol. The ids are looked up from
+        the symbol master with one seek of the (symbol, created_at) index per
+        symbol, instead of grouping the whole tick table.
+        """
+        if self.value() == 'latest':
+            # Symbols without ticks yield NULL, which matches no id
+            latest_ids = Symbol.objects.order_by().annotate(
+                **latest_tick_annotations(OuterRef('pk'), sources=[])).values('latest_tick_id')
+            return queryset.filter(id__in=latest_ids)
+        return queryset
+
+
+@admin.register(Symbol)
+class SymbolAdmin(admin.ModelAdmin):
+    """
+    Admin class for managing the Symbol master in Django admin interface.
+    """
+    list_display: list[str] = ['name']
+    search_fields: list[str] = ['name']
+
+
+@admin.register(PriceTick)
+class PriceTickAdmin(admin.ModelAdmin):
+    """
+    Admin class for managing the PriceTick history in Django admin interface.
     """
     list_display: list[str] = [
-        'name', 'price']  # Display 'name' and 'price' fields in the admin list view
+        'symbol', 'price', 'created_at']  # Display 'symbol', 'price' and 'created_at' fields in the admin list view
+    # Both filters are backed by indexes on the tick table
+    list_filter: list[Any] = [
+        LatestQuotesFilter, ('created_at', admin.DateFieldListFilter)]
+    list_select_related: list[str] = ['symbol']
+    raw_id_fields: list[str] = ['symbol']
+    search_fields: list[str] = ['symbol__name']
+    search_help_text: str = 'Exact stock name'
+
+    # Avoid COUNT(*) over the whole price history
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
 
     # Custom template for the stock admin change list view
     change_list_template: str = 'stock/custom_stock_admin.html'
 
+    def get_search_results(self, request: HttpRequest, queryset: QuerySet, search_term: str) -> Tuple[QuerySet, bool]:
+        """
+        Search by exact stock name so the lookup uses the symbol index instead of
+        scanning the table with a case-insensitive `LIKE`.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            queryset (QuerySet): The changelist queryset.
+            search_term (str): The term typed in the search box.
+
+        Returns:
+            Tuple[QuerySet, bool]: The filtered queryset, and whether it may contain duplicates.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(symbol__name=search_term.upper()), False
+
     def get_urls(self) -> list[URLPattern]:
         """
         Override the default `get_urls` method to add custom URLs to the admin interface.
@@ -45,47 +120,65 @@ class StockAdmin(admin.ModelAdmin):
         ]
         return custom_urls + urls  # Combine the default URLs with custom ones
 
+    def __generate_stocks(self, request: HttpRequest, use_existing_names: bool, title: str) -> HttpResponse:
+        """
+        Show the generation form and, once submitted, queue a background job
+        generating the stock data file.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            use_existing_names (bool): Whether to generate prices for the existing stock names.
+            title (str): Title of the form page.
+
+        Returns:
+            HttpResponse: The form page, or a redirect to the admin change list view.
+        """
+        form = StockGenerationForm(request.POST or None)
+        if request.method == "POST" and form.is_valid():
+            result = generate_stock_data.delay(
+                use_existing_names=use_existing_names, **form.cleaned_data)
+            task_url = f"{reverse('admin:django_celery_results_taskresult_changelist')}?task_id={result.id}"
+            messages.success(
+                request, format_html(
+                    'Generation job queued, the file will be saved to /media. '
+                    '<a href="{}">Follow its progress</a>', task_url)
+            )  # Add a success message
+            # Redirect to the parent directory (admin change list view)
+            return redirect("..")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": title,
+            "form": form,
+            "use_existing_names": use_existing_names,
+        }
+        return render(request, "stock/generate_stocks.html", context)
+
     def generate_random_stocks(self, request: HttpRequest) -> HttpResponse:
         """
-        Generate a CSV file with random stock data and save it to the media directory.
-        Redirects the user back to the stock admin page with a success message.
+        Queue a background job generating a file with random stock data in the media directory.
 
         Args:
             request (HttpRequest): The HTTP request object.
 
         Returns:
-            HttpResponse: Redirect response to the admin change list view.
-        """
-        generator: StockDataGenerator = StockDataGenerator(
-        )  # Initialize the StockDataGenerator
-        # Generate random stock data and get the file path
-        file_path: str = generator.generate_random_stocks()
-        messages.success(
-            request, f"File generated and saved to /media ({file_path})"
-        )  # Add a success message
-        # Redirect to the parent directory (admin change list view)
-        return redirect("..")
+            HttpResponse: The generation form, or a redirect to the admin change list view.
+        """
+        return self.__generate_stocks(request, False, "Generate random stocks")
 
     def generate_existing_stocks(self, request: HttpRequest) -> HttpResponse:
         """
-        Generate a CSV file using existing stock names and save it to the media directory.
-        Redirects the user back to the stock admin page with a success message.
+        Queue a background job generating a file with new prices for the existing
+        stock names in the media directory.
 
         Args:
             request (HttpRequest): The HTTP request object.
 
         Returns:
-            HttpResponse: Redirect response to the admin change list view.
+            HttpResponse: The generation form, or a redirect to the admin change list view.
         """
-        generator: StockDataGenerator = StockDataGenerator(
-        )  # Initialize the StockDataGenerator
-        file_path: str = generator.generate_random_stocks(
-            use_existing_names=True)  # Generate stock data with existing names
-        messages.success(
-            request, f"File generated and saved to /media ({file_path})"
-        )  # Add a success message
-        # Redirect to the parent directory (admin change list view)
-        return redirect("..")
+        return self.__generate_stocks(request, True, "Generate existing stocks")
 
 
 @admin.register(UserStock)
@@ -93,8 +186,11 @@ class UserStockAdmin(admin.ModelAdmin):
     """
     Admin class for managing UserStock model in Django admin interface.
     """
-    list_display: list[str] = ['user', 'stock', 'quantity',
+    list_display: list[str] = ['user', 'symbol', 'quantity',
                                'invested_amount']  # Display relevant fields in the admin list view
+    # Fetch users and symbols in the changelist query instead of once per row
+    list_select_related: list[str] = ['user', 'symbol']
+    raw_id_fields: list[str] = ['user', 'symbol']
 
 
 @admin.register(StockDataAudit)
@@ -103,4 +199,145 @@ class StockDataAuditAdmin(admin.ModelAdmin):
     Admin class for managing StockDataAudit model in Django admin interface.
     """
     list_display: list[str] = [
-        "file_name"]  # Display the 'file_name' field in the admin list view
+        "file_name", "status", "total_rows", "quarantined_rows", "created_at"]  # Display the file name, its validation outcome and 'created_at' in the admin list view
+    list_filter: list[str] = ["status"]
+    readonly_fields: list[str] = ["status", "content_hash", "total_rows", "valid_rows", "quarantined_rows",
+                                  "quarantine_file", "error"]
+    search_fields: list[str] = ["file_name", "=content_hash"]
+
+    # One audit row is added per ingested file, so avoid exact counts here too
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+
+@admin.register(Trade)
+class TradeAdmin(admin.ModelAdmin):
+    """
+    Admin class for browsing the append-only Trade journal in Django admin interface.
+    """
+    list_display: list[str] = ['user', 'symbol', 'side', 'quantity',
+                               'price', 'realized_pnl', 'created_at']  # Display relevant fields in the admin list view
+    list_filter: list[str] = ['side']
+    list_select_related: list[str] = ['user', 'symbol']
+    raw_id_fields: list[str] = ['user', 'symbol']
+
+    # The journal grows with every trade, so avoid exact counts
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    """
+    Admin class for browsing limit and stop orders in Django admin interface.
+    """
+    list_display: list[str] = ['user', 'symbol', 'side', 'order_type', 'quantity',
+                               'trigger_price', 'status', 'filled_price', 'created_at']  # Display relevant fields in the admin list view
+    list_filter: list[str] = ['status', 'side', 'order_type']
+    list_select_related: list[str] = ['user', 'symbol']
+    raw_id_fields: list[str] = ['user', 'symbol']
+    paginator = EstimatedCountPaginator
+    show_full_result_count: bool = False
+
+
+@admin.register(Watchlist)
+class WatchlistAdmin(admin.ModelAdmin):
+    """
+    Admin class for browsing users' watchlists in Django admin interface.
+    """
+    list_display: list[str] = ['user', 'name', 'created_at']
+    list_select_related: list[str] = ['user']
+    search_fields: list[str] = ['name', 'user__username']
+    raw_id_fields: list[str] = ['user']
+    autocomplete_fields: list[str] = ['symbols']
+
+
+@admin.register(DataExport)
+class DataExportAdmin(admin.ModelAdmin):
+    """
+    Admin class for requesting bulk exports and downloading their files in Django admin interface.
+
+    Adding an export queues it on the Celery worker; the file can be
+    downloaded from the change list once its status is done.
+    """
+    list_display: list[str] = ['id', 'kind', 'file_format', 'start', 'end', 'status',
+                               'rows', 'created_at', 'download']  # Display relevant fields in the admin list view
+    list_filter: list[str] = ['kind', 'status']
+    fields: list[str] = ['kind', 'file_format', 'start', 'end', 'status', 'file_name', 'rows', 'error']
+    readonly_fields: list[str] = ['status', 'file_name', 'rows', 'error']
+
+    def has_change_permission(self, request: HttpRequest, obj: Optional[DataExport] = None) -> bool:
+        """
+        Exports are immutable once requested.
+        """
+        return False
+
+    @admin.display(description='File')
+    def download(self, obj: DataExport) -> str:
+        """
+        Link to the export file, once written.
+        """
+        if obj.status != DataExport.DONE:
+            return '-'
+        url = reverse('admin:stock_dataexport_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.file_name)
+
+    def get_urls(self) -> list[URLPattern]:
+        """
+        Add the download URL of export files to the admin interface.
+
+        Returns:
+            list[URLPattern]: A list of URL patterns for the admin interface.
+        """
+        custom_urls: list[URLPattern] = [
+            path(
+                '<int:export_id>/download/',
+                self.admin_site.admin_view(self.download_file),
+                name='stock_dataexport_download'
+            ),
+        ]
+        return custom_urls + super().get_urls()
+
+    def download_file(self, request: HttpRequest, export_id: int) -> HttpResponse:
+        """
+        Stream an export file to the browser. Export files are not served as
+        media, so this permission-checked view is the only way to fetch them.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+            export_id (int): The id of the export.
+
+        Returns:
+            HttpResponse: The file as an attachment.
+        """
+        if not self.has_view_permission(request):
+            raise Http404
+        export = get_object_or_404(DataExport, pk=export_id, status=DataExport.DONE)
+        path = export_path(export.file_name)
+        if not os.path.exists(path):
+            raise Http404
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=export.file_name)
+
+    def save_model(self, request: HttpRequest, obj: DataExport, form: ModelForm, change: bool) -> None:
+        """
+        Save a new export and queue it once the transaction commits.
+        """
+        super().save_model(request, obj, form, change)
+        if not change:
+            transaction.on_commit(lambda: export_data.delay(obj.pk))
+            messages.info(request, 'Export queued, download it here once its status is done.')
+
+    def delete_model(self, request: HttpRequest, obj: DataExport) -> None:
+        """
+        Delete an export together with its file.
+        """
+        self.delete_queryset(request, DataExport.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet) -> None:
+        """
+        Delete exports together with their files.
+        """
+        for file_name in queryset.exclude(file_name='').values_list('file_name', flat=True):
+            if os.path.exists(export_path(file_name)):
+                os.remove(export_path(file_name))
+        super().delete_queryset(request, queryset)
@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+
+# Look-back periods reported by `technical_indicators`
+RETURN_PERIODS: Dict[str, str] = {"1d": "1D", "7d": "7D", "30d": "30D"}
+
+
+def validate_interval(interval: Optional[str]) -> Optional[str]:
+    """
+    Validate a resampling interval given as a pandas offset alias.
+
+    Args:
+        interval (Optional[str]): The interval, e.g. '5min', '1h' or '1D'.
+
+    Returns:
+        Optional[str]: The interval unchanged.
+
+    Raises:
+        ValueError: If the interval is not a valid offset alias.
+    """
+    if interval:
+        pd.tseries.frequencies.to_offset(interval)
+    return interval
+
+
+def downsample(series: pd.Series, interval: Optional[str] = None, max_points: Optional[int] = None) -> pd.Series:
+    """
+    Reduce the number of points of a time series.
+
+    Args:
+        series (pd.Series): Series indexed by timestamp.
+        interval (Optional[str]): Pandas offset alias (e.g. '5min', '1h', '1D'); the
+            last value of every interval is kept.
+        max_points (Optional[int]): Upper bound on the number of points, enforced by
+            keeping evenly spaced points, always including the latest one.
+
+    Returns:
+        pd.Series: The downsampled series.
+    """
+    if interval:
+        series = series.resample(interval).last().dropna()
+    if max_points and len(series) > max_points:
+        positions = np.unique(np.linspace(0, len(series) - 1, max_points).round().astype(np.int64))
+        series = series.iloc[positions]
+    return series
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """
+    Convert a NumPy scalar to a float rounded to 6 decimal places, mapping NaN to None.
+    """
+    return None if value is None or np.isnan(value) else round(float(value), 6)
+
+
+def _format_timestamp(timestamp: pd.Timestamp) -> str:
+    """
+    Format a UTC timestamp the same way the API serializers do.
+    """
+    return timestamp.isoformat().replace("+00:00", "Z")
+
+
+def price_frame(rows: Iterable[Tuple[str, datetime, Decimal]]) -> pd.DataFrame:
+    """
+    Align price ticks of several symbols on a common time grid.
+
+    Args:
+        rows (Iterable[Tuple[str, datetime, Decimal]]): `(name, created_at, price)` rows.
+
+    Returns:
+        pd.DataFrame: One column per symbol indexed by the union of all tick
+        timestamps, each symbol carrying its last known price forward.
+    """
+    df = pd.DataFrame.from_records(list(rows), columns=["name", "created_at", "price"])
+    if df.empty:
+        return pd.DataFrame()
+    df["price"] = df["price"].astype(np.float64)
+    prices = df.pivot_table(index="created_at", columns="name", values="price", aggfunc="last")
+    return prices.sort_index().ffill()
+
+
+def portfolio_value_history(
+    holdings: Dict[str, int],
+    rows: Iterable[Tuple[str, datetime, Decimal]],
+    interval: Optional[str] = None,
+    max_points: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """
+    Compute the value of a portfolio over time.
+
+    Prices of every held symbol are aligned on a common time grid and forward
+    filled, then weighted by the held quantities in a single matrix-vector
+    product. Before a symbol's first known price, its first price in the range
+    is used so the series never drops a holding.
+
+    Args:
+        holdings (Dict[str, int]): Quantity held per stock name.
+        rows (Iterable[Tuple[str, datetime, Decimal]]): `(name, created_at, price)` rows.
+        interval (Optional[str]): Optional resampling interval, see `downsample`.
+        max_points (Optional[int]): Optional cap on the number of points, see `downsample`.
+
+    Returns:
+        List[Dict[str, str]]: Points with `created_at` and `value` keys.
+    """
+    prices = price_frame(rows)
+    if prices.empty:
+        return []
+
+    prices = prices.bfill()
+    quantities = np.array([holdings.get(name, 0) for name in prices.columns], dtype=np.float64)
+    values = pd.Series(prices.to_numpy() @ quantities, index=prices.index)
+    values = downsample(values, interval, max_points)
+
+    return [
+        {"created_at": _format_timestamp(timestamp), "value": f"{value:.6f}"}
+        for timestamp, value in zip(values.index, values.to_numpy())
+    ]
+
+
+def technical_indicators(
+    rows: Iterable[Tuple[datetime, Decimal]],
+    window: int,
+    max_points: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Compute technical indicators over the price history of a single symbol.
+
+    Every indicator is computed with vectorized rolling operations over the
+    whole history before the series is downsampled, so downsampling never
+    changes the indicator values.
+
+    Args:
+        rows (Iterable[Tuple[datetime, Decimal]]): `(created_at, price)` rows ordered by time.
+        window (int): Number of ticks used by the moving averages and volatility.
+        max_points (Optional[int]): Optional cap on the number of points, see `downsample`.
+
+    Returns:
+        Dict[str, Any]: A `summary` of the whole range and a `series` of points with
+        the price, simple and exponential moving averages, rolling volatility of
+        tick returns and drawdown from the running peak.
+    """
+    df = pd.DataFrame.from_records(list(rows), columns=["created_at", "price"])
+    if df.empty:
+        return {"summary": None, "series": []}
+
+    prices = pd.Series(df["price"].astype(np.float64).to_numpy(), index=pd.DatetimeIndex(df["created_at"]))
+    returns = prices.pct_change()
+    drawdown = prices / prices.cummax() - 1
+    indicators = pd.DataFrame({
+        "price": prices,
+        "sma": prices.rolling(window).mean(),
+        "ema": prices.ewm(span=window, adjust=False).mean(),
+        "volatility": returns.rolling(window).std(),
+        "drawdown": drawdown,
+    })
+
+    last_timestamp, last_price = prices.index[-1], prices.iloc[-1]
+    period_returns: Dict[str, Optional[float]] = {}
+    for label, period in RETURN_PERIODS.items():
+        reference = prices.asof(last_timestamp - pd.Timedelta(period))
+        period_returns[label] = _to_float(last_price / reference - 1)
+
+    summary = {
+        "first_price": _to_float(prices.iloc[0]),
+        "last_price": _to_float(last_price),
+        "total_return": _to_float(last_price / prices.iloc[0] - 1),
+        "max_drawdown": _to_float(drawdown.min()),
+        "volatility": _to_float(indicators["volatility"].iloc[-1]),
+        "returns": period_returns,
+    }
+
+    if max_points and len(indicators) > max_points:
+        positions = downsample(pd.Series(np.arange(len(indicators)), index=indicators.index),
+                               max_points=max_points).to_numpy()
+        indicators = indicators.iloc[positions]
+
+    series = [
+        {"created_at": _format_timestamp(timestamp), **{
+            column: _to_float(value) for column, value in zip(indicators.columns, values)
+        }}
+        for timestamp, values in zip(indicators.index, indicators.to_numpy())
+    ]
+    return {"summary": summary, "series": series}
+
+
+def _mover_records(movers: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convert a frame of movers into JSON serializable records.
+    """
+    return [
+        {
+            "name": name,
+            "price": _to_float(row.price),
+            "previous_price": _to_float(row.previous_price),
+            "change": _to_float(row.change),
+            "change_percent": _to_float(row.change_percent),
+            "ticks": int(row.ticks),
+        }
+        for name, row in zip(movers.index, movers.itertuples(index=False))
+    ]
+
+
+def market_movers(batch: pd.DataFrame, previous_quotes: Dict[str, float], limit: int) -> Dict[str, Any]:
+    """
+    Compare a batch of ingested prices against the previous quotes.
+
+    Args:
+        batch (pd.DataFrame): Ingested rows with `name` and `price` columns, in ingest order.
+        previous_quotes (Dict[str, float]): Latest price per stock name before the batch.
+        limit (int): Number of stocks reported in each movers list.
+
+    Returns:
+        Dict[str, Any]: The updated `quotes`, the `gainers`, `losers` and
+        `most_active` lists and the summary counters of `MarketSnapshot`.
+    """
+    grouped = batch.groupby("name", sort=False)["price"]
+    movers = pd.DataFrame({
+        "price": grouped.last().astype(np.float64),
+        "ticks": grouped.size(),
+    })
+    movers["previous_price"] = pd.Series(previous_quotes, dtype=np.float64).reindex(movers.index)
+    movers["change"] = movers["price"] - movers["previous_price"]
+    movers["change_percent"] = movers["change"] / movers["previous_price"] * 100
+    movers = movers[["price", "previous_price", "change", "change_percent", "ticks"]]
+
+    quoted = movers.dropna(subset=["change_percent"])
+    gainers = quoted[quoted["change_percent"] > 0].nlargest(limit, "change_percent")
+    losers = quoted[quoted["change_percent"] < 0].nsmallest(limit, "change_percent")
+    most_active = movers.assign(magnitude=movers["change_percent"].abs()).sort_values(
+        ["ticks", "magnitude"], ascending=False).head(limit).drop(columns="magnitude")
+
+    quotes = {**previous_quotes, **movers["price"].round(6).to_dict()}
+    return {
+        "quotes": quotes,
+        "gainers": _mover_records(gainers),
+        "losers": _mover_records(losers),
+        "most_active": _mover_records(most_active),
+        "symbols": len(quotes),
+        "updated": len(movers),
+        "advancers": int((movers["change"] > 0).sum()),
+        "decliners": int((movers["change"] < 0).sum()),
+        "unchanged": int((movers["change"] == 0).sum()),
+        "listed": int(movers["previous_price"].isna().sum()),
+    }
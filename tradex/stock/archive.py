@@ -0,0 +1,296 @@
+import json
+import os
+import re
+import numpy as np
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.db.models import Max, Q
+from rest_framework.fields import DateTimeField
+
+from .models import PriceTick
+
+# Record layout of an archive partition: microseconds since the epoch and price
+ARCHIVE_DTYPE = np.dtype([("ts", "<i8"), ("price", "<f8")])
+MANIFEST_FILE = "manifest.json"
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Stock names double as partition directory names, so they must be a single path component
+SAFE_NAME_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+def is_safe_name(name: str) -> bool:
+    """
+    Check that a stock name can be used as a directory name in the archive,
+    so that it can never point outside of it.
+
+    Args:
+        name (str): Stock name.
+
+    Returns:
+        bool: True if the name only uses letters, digits, dots, underscores and
+        dashes and starts with a letter or digit.
+    """
+    return SAFE_NAME_PATTERN.fullmatch(name) is not None
+
+
+def month_start(value: datetime) -> datetime:
+    """
+    Truncate a datetime to the first instant of its month (UTC).
+
+    Args:
+        value (datetime): The datetime to truncate.
+
+    Returns:
+        datetime: The first instant of the month.
+    """
+    value = value.astimezone(dt_timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def to_epoch_us(value: datetime) -> int:
+    """
+    Convert an aware datetime to integer microseconds since the epoch.
+    """
+    delta = value - EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_epoch_us(value: int) -> datetime:
+    """
+    Convert integer microseconds since the epoch to an aware UTC datetime.
+    """
+    return EPOCH + timedelta(microseconds=value)
+
+
+class PriceArchive:
+    """
+    Columnar archive of historical stock prices.
+
+    Each symbol owns one NumPy `.npy` file per month holding a structured array
+    of `(ts, price)` records sorted by timestamp. Partitions are immutable once
+    written and are read through memory maps, so serving a range only slices
+    the mapped arrays. A manifest records the global `archived_until` boundary:
+    every price older than it is served from the archive, everything newer
+    from the database. It also records the highest tick id seen by the last
+    run, so ticks stored later with an older timestamp are merged into the
+    months already archived.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Initialize the archive and ensure its root directory exists.
+
+        Args:
+            root (Optional[str]): Archive directory. Defaults to `settings.STOCK_ARCHIVE_DIR`.
+        """
+        self._root = str(root or settings.STOCK_ARCHIVE_DIR)
+        os.makedirs(self._root, exist_ok=True)
+
+    def _partition_path(self, name: str, month: datetime) -> str:
+        """
+        Path of the partition holding a symbol's prices for a month.
+        """
+        return os.path.join(self._symbol_dir(name), f"{month:%Y-%m}.npy")
+
+    def _symbol_dir(self, name: str) -> str:
+        """
+        Directory holding the partitions of a symbol.
+
+        Raises:
+            ValueError: If the name is not a safe directory name.
+        """
+        if not is_safe_name(name):
+            raise ValueError(f"Stock name {name!r} cannot be archived")
+        return os.path.join(self._root, name)
+
+    def _write_atomic(self, path: str, write: Any) -> None:
+        """
+        Write a file through a temporary sibling and rename it into place so
+        readers never observe a partially written file.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def archived_until(self) -> Optional[datetime]:
+        """
+        Get the boundary below which prices are served from the archive.
+
+        Returns:
+            Optional[datetime]: The boundary, or None if nothing has been archived.
+        """
+        try:
+            return datetime.fromisoformat(self._read_manifest()["archived_until"])
+        except (KeyError, ValueError):
+            return None
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """
+        Read the manifest, empty if nothing has been archived.
+        """
+        try:
+            with open(os.path.join(self._root, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def write_partition(self, name: str, month: datetime, records: np.ndarray, merge: bool = False) -> None:
+        """
+        Write the prices of a symbol for a month.
+
+        Args:
+            name (str): Stock name.
+            month (datetime): Any instant within the month.
+            records (np.ndarray): Records of `ARCHIVE_DTYPE` sorted by timestamp.
+            merge (bool): Merge the records into the existing partition instead
+                of replacing it.
+        """
+        path = self._partition_path(name, month_start(month))
+        if merge and os.path.exists(path):
+            records = np.concatenate([np.load(path), records])
+            records = records[np.argsort(records["ts"], kind="stable")]
+        self._write_atomic(path, lambda f: np.save(f, records, allow_pickle=False))
+
+    def archive_history(self, until: datetime, chunk_size: int = 10_000) -> int:
+        """
+        Archive every price recorded before the start of the month of `until`
+        that is not archived yet, then advance the manifest boundary.
+
+        Ticks stored since the last run with a timestamp below its boundary
+        are merged into the partitions already written, even when the
+        boundary does not move.
+
+        Args:
+            until (datetime): Prices in months before this one are archived.
+            chunk_size (int): Number of rows fetched from the database per round trip.
+
+        Returns:
+            int: Number of prices archived.
+
+        Raises:
+            ValueError: If a stock name cannot be used as an archive directory.
+        """
+        manifest = self._read_manifest()
+        previous = self.archived_until()
+        archived_tick_id = manifest.get("archived_tick_id")
+        boundary = max(month_start(until), previous) if previous is not None else month_start(until)
+        # Ticks stored while this run reads are left to the next one
+        last_tick_id = PriceTick.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+
+        rows = PriceTick.objects.filter(created_at__lt=boundary, id__lte=last_tick_id)
+        if previous is not None:
+            # A manifest without a tick id predates the late tick tracking
+            late = Q(id__gt=archived_tick_id, created_at__lt=previous) if archived_tick_id is not None else Q(pk__in=[])
+            rows = rows.filter(Q(created_at__gte=previous) | late)
+        rows = rows.order_by("symbol_id", "created_at").values_list(
+            "symbol__name", "created_at", "price").iterator(chunk_size=chunk_size)
+
+        archived = 0
+        group_key = lambda row: (row[0], month_start(row[1]))
+        for (name, month), group in groupby(rows, key=group_key):
+            records = np.array(
+                [(to_epoch_us(created_at), float(price)) for _, created_at, price in group],
+                dtype=ARCHIVE_DTYPE
+            )
+            # Months below the previous boundary are already archived, the
+            # others may only hold partitions of an interrupted run
+            self.write_partition(name, month, records, merge=previous is not None and month < previous)
+            archived += len(records)
+
+        # The manifest moves last so readers only see fully written partitions
+        self._write_atomic(
+            os.path.join(self._root, MANIFEST_FILE),
+            lambda f: f.write(json.dumps({
+                "archived_until": boundary.isoformat(),
+                "archived_tick_id": last_tick_id,
+            }).encode())
+        )
+        return archived
+
+    def read(self, name: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[np.ndarray]:
+        """
+        Read the archived prices of a symbol in the half-open range `[start, end)`.
+
+        The returned arrays are slices of memory-mapped partitions, so no price
+        data is copied until it is consumed.
+
+        Args:
+            name (str): Stock name.
+            start (Optional[datetime]): Inclusive lower bound, unbounded if None.
+            end (Optional[datetime]): Exclusive upper bound, unbounded if None.
+
+        Returns:
+            List[np.ndarray]: Record arrays ordered by timestamp.
+        """
+        if not is_safe_name(name):
+            return []
+        symbol_dir = self._symbol_dir(name)
+        if not os.path.isdir(symbol_dir):
+            return []
+
+        first_month = month_start(start) if start else None
+        start_us = to_epoch_us(start) if start else None
+        end_us = to_epoch_us(end) if end else None
+
+        slices: List[np.ndarray] = []
+        for file_name in sorted(f for f in os.listdir(symbol_dir) if f.endswith(".npy")):
+            month = datetime.strptime(file_name[:-4], "%Y-%m").replace(tzinfo=dt_timezone.utc)
+            if first_month and month < first_month:
+                continue
+            if end and month >= end:
+                break
+
+            records = np.load(os.path.join(symbol_dir, file_name), mmap_mode="r")
+            lo = np.searchsorted(records["ts"], start_us, side="left") if start_us is not None else 0
+            hi = np.searchsorted(records["ts"], end_us, side="left") if end_us is not None else len(records)
+            if hi > lo:
+                slices.append(records[lo:hi])
+        return slices
+
+
+def archive_to_representation(slices: List[np.ndarray]) -> Iterator[Dict[str, str]]:
+    """
+    Render archived records in the same shape as `StockDetailsSerializer`.
+
+    Args:
+        slices (List[np.ndarray]): Record arrays returned by `PriceArchive.read`.
+
+    Yields:
+        Dict[str, str]: Dictionaries with `price` and `created_at` keys.
+    """
+    datetime_field = DateTimeField()
+    for records in slices:
+        for ts, price in zip(records["ts"].tolist(), records["price"].tolist()):
+            yield {
+                "price": f"{price:.6f}",
+                "created_at": datetime_field.to_representation(from_epoch_us(ts))
+            }
+
+
+def split_range(
+    archive: PriceArchive,
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> Tuple[Optional[Tuple[Optional[datetime], datetime]], Optional[Tuple[Optional[datetime], Optional[datetime]]]]:
+    """
+    Split a requested half-open range `[start, end)` into the part served by
+    the archive and the part served by the database.
+
+    Args:
+        archive (PriceArchive): The price archive.
+        start (Optional[datetime]): Inclusive lower bound, unbounded if None.
+        end (Optional[datetime]): Exclusive upper bound, unbounded if None.
+
+    Returns:
+        Tuple: The archive range and the database range, either of which is None
+        when that tier is not involved.
+    """
+    boundary = archive.archived_until()
+    if boundary is None or (start is not None and start >= boundary):
+        return None, (start, end)
+    if end is not None and end <= boundary:
+        return (start, end), None
+    return (start, boundary), (boundary, end)
@@ -0,0 +1,69 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from typing import Iterable
+
+from .models import StockDataAudit
+
+INGEST_VERSION_KEY = "stock:ingest_version"
+HOLDINGS_VERSION_KEY = "stock:holdings_version:{user_id}"
+
+
+def get_ingest_version() -> int:
+    """
+    Get the version of the ingested price data, which changes whenever new
+    stock data files are ingested. Cached computations include it in their keys
+    so they are invalidated by the next ingest.
+
+    Returns:
+        int: The id of the latest `StockDataAudit` record, or 0 if nothing was ingested.
+    """
+    version = cache.get(INGEST_VERSION_KEY)
+    if version is None:
+        version = bump_ingest_version()
+    return version
+
+
+def bump_ingest_version() -> int:
+    """
+    Refresh the cached ingest version from the database. Called at the end of
+    every ingest.
+
+    Returns:
+        int: The new ingest version.
+    """
+    version: int = StockDataAudit.objects.order_by(
+        "-id").values_list("id", flat=True).first() or 0
+    cache.set(INGEST_VERSION_KEY, version,
+              timeout=settings.INGEST_VERSION_TIMEOUT)
+    return version
+
+
+def get_holdings_version(user_id: int) -> int:
+    """
+    Get the version of a user's holdings, which changes whenever the user
+    trades or one of their orders is filled. A user without a cached version
+    gets a new one, so an evicted version can never match an older cache entry.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        int: The holdings version.
+    """
+    return cache.get_or_set(
+        HOLDINGS_VERSION_KEY.format(user_id=user_id), time.time_ns, timeout=None)
+
+
+def bump_holdings_versions(user_ids: Iterable[int]) -> None:
+    """
+    Give the holdings of the given users a new version, invalidating their
+    cached portfolios. Called once the holdings changes are committed.
+
+    Args:
+        user_ids (Iterable[int]): The ids of the users whose holdings changed.
+    """
+    version = time.time_ns()
+    cache.set_many(
+        {HOLDINGS_VERSION_KEY.format(user_id=user_id): version for user_id in user_ids},
+        timeout=None)
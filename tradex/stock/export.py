@@ -0,0 +1,192 @@
+import csv
+import gzip
+import os
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.utils import timezone
+
+from .models import DataExport, PriceTick, Symbol, UserStock
+from .price_snapshot import latest_ticks
+
+# Columns of each export kind, in file order
+EXPORT_COLUMNS: Dict[str, List[str]] = {
+    DataExport.HOLDINGS: ["user_id", "username", "name", "quantity", "invested_amount",
+                          "latest_price", "market_value", "unrealized_pnl"],
+    DataExport.PRICES: ["name", "price", "created_at"],
+}
+FILE_EXTENSIONS: Dict[str, str] = {
+    DataExport.CSV: "csv.gz",
+    DataExport.PARQUET: "parquet",
+}
+
+
+def chunked(rows: Iterable[Tuple[Any, ...]], size: int) -> Iterator[List[Tuple[Any, ...]]]:
+    """
+    Group rows into lists of at most `size` rows.
+
+    Args:
+        rows (Iterable[Tuple[Any, ...]]): The rows.
+        size (int): Maximum number of rows per chunk.
+
+    Yields:
+        List[Tuple[Any, ...]]: The next chunk.
+    """
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def holdings_rows(chunk_size: int) -> Iterator[Tuple[Any, ...]]:
+    """
+    Stream every holding with its valuation at the latest price.
+
+    The latest prices are loaded once per symbol, then the holdings are read
+    through a server-side cursor where the database supports one, so memory
+    stays bounded by the number of symbols, not of holdings.
+
+    Args:
+        chunk_size (int): Number of rows fetched from the database per round trip.
+
+    Yields:
+        Tuple[Any, ...]: One row per holding, in the order of `EXPORT_COLUMNS`.
+    """
+    latest_prices: Dict[int, Decimal] = dict(
+        latest_ticks(Symbol.objects.all(), sources=["latest_price"]).values_list("id", "latest_price"))
+
+    rows = UserStock.objects.order_by("id").values_list(
+        "user_id", "user__username", "symbol_id", "symbol__name", "quantity", "invested_amount"
+    ).iterator(chunk_size=chunk_size)
+    for user_id, username, symbol_id, name, quantity, invested_amount in rows:
+        price = latest_prices.get(symbol_id)
+        market_value = price * quantity if price is not None else None
+        unrealized_pnl = market_value - invested_amount if market_value is not None else None
+        yield user_id, username, name, quantity, invested_amount, price, market_value, unrealized_pnl
+
+
+def price_rows(start: Optional[datetime], end: Optional[datetime], chunk_size: int) -> Iterator[Tuple[Any, ...]]:
+    """
+    Stream the price history within an inclusive range, oldest first.
+
+    Args:
+        start (Optional[datetime]): Inclusive lower bound, unbounded if None.
+        end (Optional[datetime]): Inclusive upper bound, unbounded if None.
+        chunk_size (int): Number of rows fetched from the database per round trip.
+
+    Returns:
+        Iterator[Tuple[Any, ...]]: One row per tick, in the order of `EXPORT_COLUMNS`.
+    """
+    ticks = PriceTick.objects.all()
+    if start:
+        ticks = ticks.filter(created_at__gte=start)
+    if end:
+        ticks = ticks.filter(created_at__lte=end)
+    return ticks.order_by("created_at", "id").values_list(
+        "symbol__name", "price", "created_at").iterator(chunk_size=chunk_size)
+
+
+def write_csv(path: str, kind: str, rows: Iterable[Tuple[Any, ...]], chunk_size: int) -> int:
+    """
+    Write rows to a gzip compressed CSV file with a header line.
+
+    Returns:
+        int: Number of rows written.
+    """
+    count = 0
+    with gzip.open(path, "wt", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS[kind])
+        for chunk in chunked(rows, chunk_size):
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                for row in chunk
+            )
+            count += len(chunk)
+    return count
+
+
+def write_parquet(path: str, kind: str, rows: Iterable[Tuple[Any, ...]], chunk_size: int) -> int:
+    """
+    Write rows to a zstd compressed Parquet file, one row group per chunk.
+
+    Returns:
+        int: Number of rows written.
+    """
+    # pyarrow is only loaded by the workers running exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    money = pa.decimal128(18, 6)
+    schema = {
+        DataExport.HOLDINGS: pa.schema([
+            ("user_id", pa.int64()), ("username", pa.string()), ("name", pa.string()),
+            ("quantity", pa.int64()), ("invested_amount", money), ("latest_price", money),
+            ("market_value", money), ("unrealized_pnl", money),
+        ]),
+        DataExport.PRICES: pa.schema([
+            ("name", pa.string()), ("price", money), ("created_at", pa.timestamp("us", tz="UTC")),
+        ]),
+    }[kind]
+
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for chunk in chunked(rows, chunk_size):
+            columns = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+            count += len(chunk)
+    return count
+
+
+FILE_WRITERS: Dict[str, Callable[[str, str, Iterable[Tuple[Any, ...]], int], int]] = {
+    DataExport.CSV: write_csv,
+    DataExport.PARQUET: write_parquet,
+}
+
+
+def export_path(file_name: str) -> str:
+    """
+    Get the path of an export file in `DATA_EXPORT_DIR`.
+    """
+    return os.path.join(settings.DATA_EXPORT_DIR, file_name)
+
+
+def run_export(export: DataExport) -> DataExport:
+    """
+    Write the file of an export and record its outcome.
+
+    The file is written next to its final name and renamed into place once
+    complete, so the admin never offers a partial file for download.
+
+    Args:
+        export (DataExport): The export to run.
+
+    Returns:
+        DataExport: The export, done or failed.
+    """
+    export.status = DataExport.RUNNING
+    export.save(update_fields=["status", "modified_at"])
+
+    chunk_size = settings.DATA_EXPORT_CHUNK_SIZE
+    file_name = f"{export.kind}_{export.pk}_{timezone.now():%Y%m%d%H%M%S}.{FILE_EXTENSIONS[export.file_format]}"
+    path = export_path(file_name)
+    tmp_path = f"{path}.tmp"
+    try:
+        if export.kind == DataExport.HOLDINGS:
+            rows = holdings_rows(chunk_size)
+        else:
+            rows = price_rows(export.start, export.end, chunk_size)
+        os.makedirs(settings.DATA_EXPORT_DIR, exist_ok=True)
+        count = FILE_WRITERS[export.file_format](tmp_path, export.kind, rows, chunk_size)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        export.status, export.error = DataExport.FAILED, str(e)
+        export.save(update_fields=["status", "error", "modified_at"])
+        return export
+
+    export.status, export.file_name, export.rows = DataExport.DONE, file_name, count
+    export.save(update_fields=["status", "file_name", "rows", "modified_at"])
+    return export
@@ -0,0 +1,44 @@
+from django import forms
+from django.conf import settings
+from django.core.validators import MaxValueValidator
+from typing import Any, Dict
+
+from .utils import CSV_FORMAT, SUPPORTED_FORMATS
+
+
+class StockGenerationForm(forms.Form):
+    """
+    Admin form collecting the size parameters of a stock data generation job.
+    """
+    n = forms.IntegerField(
+        label="Number of stocks",
+        min_value=1,
+        initial=10,
+        help_text="Ignored when generating prices for the existing stocks."
+    )
+    # Prices are stored with 6 decimal places and must be positive to be ingested
+    min_price = forms.FloatField(min_value=0.01, initial=20.0)
+    max_price = forms.FloatField(min_value=0.01, initial=100.0)
+    file_format = forms.ChoiceField(
+        choices=[(file_format, file_format) for file_format in SUPPORTED_FORMATS],
+        initial=CSV_FORMAT
+    )
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Initialize the form, bounding the number of stocks by `STOCK_GENERATION_MAX_ROWS`.
+        """
+        super().__init__(*args, **kwargs)
+        self.fields["n"].validators.append(
+            MaxValueValidator(settings.STOCK_GENERATION_MAX_ROWS))
+        self.fields["n"].widget.attrs["max"] = settings.STOCK_GENERATION_MAX_ROWS
+
+    def clean(self) -> Dict[str, Any]:
+        """
+        Validate that the price range is not empty.
+        """
+        cleaned_data = super().clean()
+        min_price, max_price = cleaned_data.get("min_price"), cleaned_data.get("max_price")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise forms.ValidationError("Minimum price cannot exceed the maximum price.")
+        return cleaned_data
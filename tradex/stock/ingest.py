@@ -0,0 +1,771 @@
+import io
+import logging
+import os
+import random
+import string
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils.crypto import get_random_string
+from datetime import datetime
+from typing import BinaryIO, Callable, List, Dict, Optional, Set, Tuple, Union
+from .analytics import market_movers
+from .archive import SAFE_NAME_PATTERN, PriceArchive, to_epoch_us
+from .cache import bump_ingest_version
+from .models import MarketSnapshot, PriceTick, StockDataAudit, Symbol
+from .orders import match_orders
+from .price_snapshot import get_latest_prices, latest_price_snapshot, latest_ticks
+from .utils import (
+    CSV_FORMAT, PARQUET_FORMAT, ARROW_FORMAT, FEATHER_FORMAT, MARKET_SNAPSHOT_ID,
+    get_file_format, read_file_content
+)
+
+logger = logging.getLogger(__name__)
+
+# Optional column holding the time of each tick, the ingest time is used without it
+TIMESTAMP_COLUMN = "timestamp"
+
+# Files are read from a path or from a binary buffer of their content
+FileSource = Union[str, BinaryIO]
+
+FILE_READERS: Dict[str, Callable[..., pd.DataFrame]] = {
+    CSV_FORMAT: lambda source, columns: pd.read_csv(source, usecols=columns),
+    PARQUET_FORMAT: lambda source, columns: pd.read_parquet(source, columns=columns),
+    # Arrow IPC files and Feather (v2) files share the same on-disk layout
+    ARROW_FORMAT: lambda source, columns: pd.read_feather(source, columns=columns),
+    FEATHER_FORMAT: lambda source, columns: pd.read_feather(source, columns=columns),
+}
+
+
+def _arrow_columns(source: FileSource) -> List[str]:
+    """
+    Read the column names of an Arrow IPC or Feather (v2) file from its schema.
+    """
+    import pyarrow as pa
+
+    if not isinstance(source, str):
+        return pa.ipc.open_file(source).schema.names
+    with pa.memory_map(source) as mapped:
+        return pa.ipc.open_file(mapped).schema.names
+
+
+def _parquet_columns(source: FileSource) -> List[str]:
+    """
+    Read the column names of a Parquet file from its footer.
+    """
+    import pyarrow.parquet as pq
+
+    return pq.read_schema(source).names
+
+
+# Read the column names of a file without reading its rows
+FILE_COLUMNS: Dict[str, Callable[[FileSource], List[str]]] = {
+    CSV_FORMAT: lambda source: pd.read_csv(source, nrows=0).columns.tolist(),
+    PARQUET_FORMAT: _parquet_columns,
+    ARROW_FORMAT: _arrow_columns,
+    FEATHER_FORMAT: _arrow_columns,
+}
+
+FILE_WRITERS: Dict[str, Callable[[pd.DataFrame, str], None]] = {
+    CSV_FORMAT: lambda df, path: df.to_csv(path, index=False),
+    PARQUET_FORMAT: lambda df, path: df.to_parquet(path, index=False),
+    ARROW_FORMAT: lambda df, path: df.to_feather(path),
+    FEATHER_FORMAT: lambda df, path: df.to_feather(path),
+}
+
+
+def validate_stock_frame(
+    df: pd.DataFrame,
+    not_before: Optional[datetime] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split the rows of a stock data file into the rows that fit the `Symbol`
+    and `PriceTick` columns and the invalid ones, with one vectorized check
+    per rule instead of a check per row.
+
+    Args:
+        df (pd.DataFrame): Rows of one file, with `name` and `price` columns
+            and an optional `timestamp` column.
+        not_before (Optional[datetime]): Earliest accepted timestamp, the
+            boundary of the archived history, if any.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The valid rows, with string names,
+        numeric prices and UTC timestamps, and the invalid rows with their
+        1-based `row` number in the file and the `reason` they were rejected.
+    """
+    name_max_length = Symbol._meta.get_field("name").max_length
+    price_field = PriceTick._meta.get_field("price")
+    price_limit = 10 ** (price_field.max_digits - price_field.decimal_places)
+
+    names = df["name"].astype("string")
+    name_lengths = names.str.len()
+    prices = pd.to_numeric(df["price"], errors="coerce").astype("float64")
+    has_timestamps = TIMESTAMP_COLUMN in df
+    # Naive timestamps are read in UTC, the time zone of the project
+    timestamps = pd.to_datetime(
+        df[TIMESTAMP_COLUMN], utc=True, errors="coerce", format="ISO8601") if has_timestamps else None
+    # The first failing rule of a row is its reason
+    reasons = np.select(
+        [
+            names.isna().to_numpy() | (name_lengths == 0).fillna(False).to_numpy(),
+            (name_lengths > name_max_length).fillna(False).to_numpy(),
+            # Names are also archive directory names
+            ~names.str.fullmatch(SAFE_NAME_PATTERN.pattern).fillna(True).to_numpy(dtype=bool),
+            ~np.isfinite(prices.to_numpy()),
+            (prices <= 0).to_numpy(),
+            (prices.round(price_field.decimal_places) >= price_limit).to_numpy(),
+            timestamps.isna().to_numpy() if has_timestamps else np.zeros(len(df), dtype=bool),
+            # A future tick would stay the latest price until its time comes
+            (timestamps > pd.Timestamp.now(tz="UTC")).to_numpy() if has_timestamps
+            else np.zeros(len(df), dtype=bool),
+            # The archived months are immutable and served without the database
+            (timestamps < pd.Timestamp(not_before)).to_numpy() if has_timestamps and not_before
+            else np.zeros(len(df), dtype=bool),
+        ],
+        [
+            "missing name",
+            f"name longer than {name_max_length} characters",
+            "invalid name",
+            "non-numeric price",
+            "non-positive price",
+            f"price of {price_limit} or more",
+            "invalid timestamp",
+            "timestamp in the future",
+            "timestamp before the archived history",
+        ],
+        default=""
+    )
+    valid = reasons == ""
+    invalid_rows = df[~valid].assign(row=np.flatnonzero(~valid) + 1, reason=reasons[~valid])
+    valid_rows = df[valid].assign(name=names[valid].astype(str), price=prices[valid])
+    if has_timestamps:
+        valid_rows[TIMESTAMP_COLUMN] = timestamps[valid]
+    return valid_rows, invalid_rows
+
+
+def suppress_unchanged(df: pd.DataFrame, stored_prices: Dict[str, float], min_change: float) -> pd.DataFrame:
+    """
+    Keep the ticks whose price moved by more than `min_change` (relative)
+    from the last kept price of the same stock, or from its last stored price
+    for the first one, so a slow drift of small steps is still stored once it
+    adds up. With a `min_change` of 0 every change is kept.
+
+    Args:
+        df (pd.DataFrame): Rows of one file, in file order.
+        stored_prices (Dict[str, float]): Latest stored price per stock name,
+            updated with the kept ticks so the next file is compared against them.
+        min_change (float): Minimum relative move of a kept tick.
+
+    Returns:
+        pd.DataFrame: The rows to store.
+    """
+    prices = df["price"].astype("float64").round(6)
+    if not min_change:
+        # Dropping a tick equal to its predecessor keeps the reference equal
+        # to it, so comparing with the previous tick is exact and vectorized
+        reference = prices.groupby(df["name"], sort=False).shift().fillna(
+            df["name"].map(stored_prices))
+        kept = df[reference.isna() | (prices != reference)]
+        stored_prices.update(
+            kept.groupby("name", sort=False)["price"].last().astype("float64").to_dict())
+        return kept
+
+    # The reference only moves when a tick is kept, so scan each stock in order
+    values = prices.to_numpy()
+    keep = np.zeros(len(df), dtype=bool)
+    for name, positions in df.groupby("name", sort=False).indices.items():
+        reference = stored_prices.get(name)
+        for position in positions:
+            price = values[position]
+            if reference is None or abs(price - reference) > abs(reference) * min_change:
+                keep[position] = True
+                reference = price
+        if reference is not None:
+            stored_prices[name] = float(reference)
+    return df[keep]
+
+
+class BaseStockData:
+    """
+    Base class to handle common functionalities related to stock data files.
+    """
+
+    def __init__(self):
+        """
+        Initialize the base stock data directory and ensure it exists.
+        """
+        self._stock_data_dir = os.path.join(settings.MEDIA_ROOT, 'stock_data')
+        os.makedirs(self._stock_data_dir, exist_ok=True)
+
+    def _get_filenames(self) -> List[str]:
+        """
+        Get a list of filenames in the stock data directory that are in a supported format.
+
+        Returns:
+            List[str]: List of filenames with a '.csv', '.parquet', '.arrow' or '.feather' extension.
+        """
+        return [
+            f for f in os.listdir(self._stock_data_dir)
+            if get_file_format(f) and os.path.isfile(os.path.join(self._stock_data_dir, f))
+        ]
+
+
+class StockNameGenerator:
+    """
+    A utility class to generate random stock names.
+    """
+
+    @staticmethod
+    def generate_random_stock_name() -> str:
+        """
+        Generate a random stock name with 3 or 4 uppercase characters.
+
+        Returns:
+            str: Random stock name.
+        """
+        length = random.choice([3, 4])
+        return ''.join(random.choices(string.ascii_uppercase, k=length))
+
+
+class StockPriceGenerator:
+    """
+    A utility class to generate random stock prices.
+    """
+
+    @staticmethod
+    def generate_random_stock_price(min_value: float, max_value: float) -> float:
+        """
+        Generate a random stock price between min_value and max_value.
+
+        Args:
+            min_value (float): Minimum price.
+            max_value (float): Maximum price.
+
+        Returns:
+            float: Random stock price rounded to 6 decimal places.
+        """
+        return round(random.uniform(min_value, max_value), 6)
+
+
+class StockDataGenerator(BaseStockData):
+    """
+    A class for generating and saving stock data to CSV, Parquet or Arrow files.
+    """
+
+    def __init__(self):
+        """
+        Initialize StockDataGenerator.
+        """
+        super().__init__()
+
+    # Number of rows generated between two progress reports
+    CHUNK_SIZE: int = 10_000
+
+    def __get_existing_stock_names(self) -> List[str]:
+        """
+        Retrieve the distinct existing stock names from the database.
+
+        Returns:
+            List[str]: List of stock names.
+        """
+        return list(Symbol.objects.values_list("name", flat=True))
+
+    def generate_random_stocks(
+        self,
+        n: int = 10,
+        min_price: float = 20.0,
+        max_price: float = 100.0,
+        use_existing_names: bool = False,
+        file_format: str = CSV_FORMAT,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> str:
+        """
+        Generate random stocks and save them to a file in the requested format.
+
+        Args:
+            n (int): Number of stocks to generate.
+            min_price (float): Minimum stock price.
+            max_price (float): Maximum stock price.
+            use_existing_names (bool): Whether to use existing stock names.
+            file_format (str): One of 'csv', 'parquet', 'arrow' or 'feather'.
+            progress_callback (Optional[Callable[[int, int], None]]): Called with the
+                number of generated rows and the total after every chunk.
+
+        Returns:
+            str: File name of the saved file.
+        """
+        if file_format not in FILE_WRITERS:
+            raise ValueError(f"Unsupported file format: {file_format}")
+
+        existing_names = self.__get_existing_stock_names() if use_existing_names else None
+        total = len(existing_names) if existing_names is not None else n
+
+        names: List[str] = []
+        prices: List[float] = []
+        for chunk_start in range(0, total, self.CHUNK_SIZE):
+            size = min(self.CHUNK_SIZE, total - chunk_start)
+            if existing_names is not None:
+                names.extend(existing_names[chunk_start:chunk_start + size])
+            else:
+                names.extend(StockNameGenerator.generate_random_stock_name() for _ in range(size))
+            prices.extend(StockPriceGenerator.generate_random_stock_price(min_price, max_price) for _ in range(size))
+            if progress_callback:
+                progress_callback(chunk_start + size, total)
+
+        df = pd.DataFrame({"name": names, "price": prices})
+        file_name = f'{get_random_string(length=10)}.{file_format}'
+        file_path = os.path.join(self._stock_data_dir, file_name)
+        # Write under a name the parser ignores, then rename, so a running
+        # ingest never picks up a partially written file
+        tmp_path = f'{file_path}.tmp'
+        FILE_WRITERS[file_format](df, tmp_path)
+        os.replace(tmp_path, file_path)
+        return file_name
+
+
+class StockDataParser(BaseStockData):
+    """
+    A class for parsing stock data from CSV, Parquet or Arrow files and saving them to the database.
+    """
+
+    # Columns required to build PriceTick objects
+    DEFAULT_COLUMNS: List[str] = ["name", "price"]
+    # Columns also read from the files that carry them
+    OPTIONAL_COLUMNS: List[str] = [TIMESTAMP_COLUMN]
+
+    def __init__(self, columns: Optional[List[str]] = None):
+        """
+        Initialize StockDataParser.
+
+        Args:
+            columns (Optional[List[str]]): Columns to project when reading files.
+                Defaults to the columns required to build PriceTick objects,
+                plus the optional columns present in each file.
+        """
+        super().__init__()
+        self._columns = columns or self.DEFAULT_COLUMNS
+        self._optional_columns = [] if columns else self.OPTIONAL_COLUMNS
+
+    def __filter_unprocessed_files(self, filenames: List[str]) -> List[str]:
+        """
+        Filter out files that have already been processed.
+
+        Args:
+            filenames (List[str]): List of filenames to filter.
+
+        Returns:
+            List[str]: List of unprocessed filenames.
+        """
+        processed_files = StockDataAudit.objects.filter(
+            file_name__in=filenames).values_list("file_name", flat=True)
+        return [file for file in filenames if file not in processed_files]
+
+    def __is_ingested(self, content_hash: str) -> bool:
+        """
+        Check whether a file with the given content was already processed.
+
+        Args:
+            content_hash (str): Content hash of the file to process.
+
+        Returns:
+            bool: Whether the hash is recorded on an audit.
+        """
+        return StockDataAudit.objects.filter(content_hash=content_hash).exists()
+
+    def __get_symbols(self, names: List[str]) -> Dict[str, Symbol]:
+        """
+        Get the symbols of the given stock names, creating the missing ones.
+
+        Args:
+            names (List[str]): Stock names.
+
+        Returns:
+            Dict[str, Symbol]: Symbol per stock name.
+        """
+        symbols = {symbol.name: symbol for symbol in Symbol.objects.filter(name__in=names)}
+        missing = [name for name in names if name not in symbols]
+        if missing:
+            # Ignore conflicts with a concurrent ingest creating the same symbols, then read them back
+            Symbol.objects.bulk_create(
+                [Symbol(name=name) for name in missing], batch_size=1000, ignore_conflicts=True)
+            symbols.update((symbol.name, symbol) for symbol in Symbol.objects.filter(name__in=missing))
+        return symbols
+
+    def __create_tick_objects(self, df: pd.DataFrame, symbols: Dict[str, Symbol]) -> List[PriceTick]:
+        """
+        Create a list of PriceTick objects from the DataFrame.
+
+        Args:
+            df (pd.DataFrame): DataFrame containing stock data.
+            symbols (Dict[str, Symbol]): Symbol per stock name.
+
+        Returns:
+            List[PriceTick]: List of PriceTick objects.
+        """
+        if TIMESTAMP_COLUMN in df:
+            return [
+                PriceTick(symbol=symbols[name], price=price, created_at=created_at.to_pydatetime())
+                for name, price, created_at in zip(df['name'], df['price'], df[TIMESTAMP_COLUMN])
+            ]
+        return [PriceTick(symbol=symbols[name], price=price) for name, price in zip(df['name'], df['price'])]
+
+    def read_file(self, file_path: str, content: Optional[bytes] = None) -> pd.DataFrame:
+        """
+        Read a stock data file, detecting the format from its extension and
+        reading only the projected columns, plus the optional columns the file has.
+
+        Args:
+            file_path (str): Path of the file to read.
+            content (Optional[bytes]): The content of the file, if already read,
+                parsed instead of reading the file again.
+
+        Returns:
+            pd.DataFrame: DataFrame containing the projected columns.
+        """
+        file_format = get_file_format(file_path)
+        if file_format is None:
+            raise ValueError(f"Unsupported file format: {file_path}")
+
+        def source() -> FileSource:
+            # A fresh stream per read, sharing the content without copying it
+            return file_path if content is None else io.BytesIO(content)
+
+        columns = self._columns
+        if self._optional_columns:
+            available = FILE_COLUMNS[file_format](source())
+            columns = columns + [column for column in self._optional_columns if column in available]
+        return FILE_READERS[file_format](source(), columns)
+
+    def __get_previous_quotes(self) -> Dict[str, float]:
+        """
+        Get the latest quote of every stock before the current ingest, from the
+        market snapshot or, before the first snapshot exists, from the database.
+
+        Returns:
+            Dict[str, float]: Latest price per stock name.
+        """
+        snapshot = MarketSnapshot.objects.filter(
+            id=MARKET_SNAPSHOT_ID).only("quotes").first()
+        if snapshot is not None:
+            return snapshot.quotes
+
+        return {
+            name: float(price)
+            for name, price in latest_ticks(Symbol.objects.all(), sources=["latest_price"]).values_list(
+                "name", "latest_price")
+        }
+
+    def __update_market_snapshot(self, batch: pd.DataFrame, previous_quotes: Dict[str, float]) -> None:
+        """
+        Compute the market movers of the ingested batch against the previous
+        quotes and store them as the current market snapshot.
+
+        Args:
+            batch (pd.DataFrame): All rows ingested in this run.
+            previous_quotes (Dict[str, float]): Latest price per stock name before the batch.
+        """
+        MarketSnapshot.objects.update_or_create(
+            id=MARKET_SNAPSHOT_ID,
+            defaults=market_movers(
+                batch, previous_quotes, settings.MARKET_MOVERS_LIMIT)
+        )
+
+    def __get_stored_prices(self, names: List[str]) -> Dict[str, float]:
+        """
+        Get the latest stored price of the given stocks, from the latest price
+        snapshot when it is fresh and from the database for the rest.
+
+        Args:
+            names (List[str]): Stock names.
+
+        Returns:
+            Dict[str, float]: Latest stored price per stock name, for the stocks that have one.
+        """
+        stored: Dict[str, float] = {}
+        latest_prices = get_latest_prices()
+        if latest_prices is not None:
+            for name in names:
+                record = latest_prices.lookup(name)
+                if record is not None:
+                    stored[name] = float(record["price"])
+
+        missing = [name for name in names if name not in stored]
+        if missing:
+            stored.update(
+                (name, float(price))
+                for name, price in latest_ticks(
+                    Symbol.objects.filter(name__in=missing), sources=["latest_price"]
+                ).values_list("name", "latest_price")
+            )
+        return stored
+
+    def __suppress_unchanged(self, df: pd.DataFrame, stored_prices: Dict[str, float]) -> pd.DataFrame:
+        """
+        Drop the ticks whose price did not move by more than
+        `STOCK_INGEST_MIN_CHANGE` (relative) from the last stored price.
+
+        Args:
+            df (pd.DataFrame): Rows of one file, in file order.
+            stored_prices (Dict[str, float]): Latest stored price per stock name.
+
+        Returns:
+            pd.DataFrame: The rows to store.
+        """
+        return suppress_unchanged(df, stored_prices, settings.STOCK_INGEST_MIN_CHANGE)
+
+    def __drop_duplicate_ticks(self, frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+        """
+        Drop the timestamped rows whose `(name, timestamp)` was already stored
+        or appears earlier in the run. Rows of files without timestamps are kept.
+
+        The stored ticks are fetched in one query bounded by the stocks and
+        the time range of the run, and the rows are compared as
+        `(name, epoch microseconds)` keys, one vectorized lookup per file.
+
+        Args:
+            frames (List[pd.DataFrame]): Valid rows of every file, in ingest order.
+
+        Returns:
+            List[pd.DataFrame]: The frames without their duplicate rows, empty ones removed.
+        """
+        stamped = [df for df in frames if TIMESTAMP_COLUMN in df]
+        if not stamped:
+            return frames
+
+        keys = pd.concat([df[["name", TIMESTAMP_COLUMN]] for df in stamped], ignore_index=True)
+        stored = PriceTick.objects.filter(
+            symbol__name__in=keys["name"].unique().tolist(),
+            created_at__range=(keys[TIMESTAMP_COLUMN].min().to_pydatetime(),
+                               keys[TIMESTAMP_COLUMN].max().to_pydatetime())
+        ).values_list("symbol__name", "created_at")
+        seen = {(name, to_epoch_us(created_at)) for name, created_at in stored.iterator()}
+
+        result = []
+        for df in frames:
+            if TIMESTAMP_COLUMN in df:
+                # Timestamps are stored with microsecond precision
+                index = pd.MultiIndex.from_arrays(
+                    [df["name"], df[TIMESTAMP_COLUMN].astype("int64") // 1000])
+                fresh = ~(index.isin(seen) | index.duplicated())
+                seen.update(index[fresh])
+                df = df[fresh]
+            if len(df):
+                result.append(df)
+        return result
+
+    def __live_rows(self, batch: pd.DataFrame, names: List[str]) -> pd.DataFrame:
+        """
+        Get the rows of the batch newer than the latest stored tick of their
+        stock, in time order. Back-dated rows only fill in the history: they
+        neither move the market snapshot nor trigger orders.
+
+        Args:
+            batch (pd.DataFrame): All rows ingested in this run, with a `timestamp` column.
+            names (List[str]): Stock names of the batch.
+
+        Returns:
+            pd.DataFrame: The live rows, with their timestamps.
+        """
+        latest = dict(latest_ticks(
+            Symbol.objects.filter(name__in=names), sources=["latest_created_at"]
+        ).values_list("name", "latest_created_at"))
+        # Rows without a timestamp are stored at the ingest time
+        timestamps = batch[TIMESTAMP_COLUMN].fillna(pd.Timestamp.now(tz="UTC"))
+        stored = pd.to_datetime(batch["name"].map(latest), utc=True)
+        live = batch.assign(**{TIMESTAMP_COLUMN: timestamps})[stored.isna() | (timestamps > stored)]
+        return live.sort_values(TIMESTAMP_COLUMN, kind="stable", ignore_index=True)
+
+    def __match_orders(self, batch: pd.DataFrame, symbols: Dict[str, Symbol]) -> int:
+        """
+        Fill the resting orders triggered by the ingested batch.
+
+        Args:
+            batch (pd.DataFrame): All rows ingested in this run, in ingest order.
+            symbols (Dict[str, Symbol]): Symbol per stock name of the batch.
+
+        Returns:
+            int: Number of filled orders.
+        """
+        prices = batch["price"].to_numpy(dtype="float64")
+        ticks = {
+            symbols[name].pk: prices[positions]
+            for name, positions in batch.groupby("name", sort=False).indices.items()
+        }
+        return match_orders(ticks)
+
+    def __bulk_insert(self, tick_objects: List[PriceTick], audit_objects: List[StockDataAudit]) -> None:
+        """
+        Bulk insert tick and audit objects into the database.
+
+        Args:
+            tick_objects (List[PriceTick]): List of PriceTick objects to insert.
+            audit_objects (List[StockDataAudit]): List of StockDataAudit objects to insert.
+        """
+        if tick_objects:
+            PriceTick.objects.bulk_create(tick_objects, batch_size=1000)
+        if audit_objects:
+            try:
+                with transaction.atomic():
+                    StockDataAudit.objects.bulk_create(audit_objects)
+            except Exception:
+                logger.exception("Bulk create failed on audit data, recording the files one by one")
+                for audit in audit_objects:
+                    self.__record_audit(audit)
+
+    def __record_audit(self, audit: StockDataAudit) -> None:
+        """
+        Save the audit record of a single file. A record that cannot be saved
+        is replaced by a rejected one carrying the error, so the file is still
+        marked as processed. Failing that, e.g. because a concurrent run already
+        recorded the file, the error is only logged.
+
+        Args:
+            audit (StockDataAudit): The unsaved audit record.
+        """
+        try:
+            with transaction.atomic():
+                audit.save()
+            return
+        except Exception as e:
+            logger.exception("Failed to record the audit of %s", audit.file_name)
+            failed = StockDataAudit(
+                file_name=audit.file_name, status=StockDataAudit.REJECTED,
+                error=f"Audit record failed: {e}")
+        try:
+            with transaction.atomic():
+                failed.save()
+        except Exception:
+            logger.exception("Failed to record the audit failure of %s", audit.file_name)
+
+    def __quarantine(self, file: str, invalid_rows: pd.DataFrame) -> str:
+        """
+        Write the invalid rows of a file and their reasons to `STOCK_QUARANTINE_DIR`.
+
+        Args:
+            file (str): Name of the stock data file.
+            invalid_rows (pd.DataFrame): The invalid rows, with their `row` and `reason`.
+
+        Returns:
+            str: Name of the quarantine file.
+        """
+        os.makedirs(settings.STOCK_QUARANTINE_DIR, exist_ok=True)
+        quarantine_file = f"{file}.quarantine.csv"
+        columns = ["row", *[column for column in invalid_rows.columns if column not in ("row", "reason")], "reason"]
+        invalid_rows[columns].to_csv(
+            os.path.join(settings.STOCK_QUARANTINE_DIR, quarantine_file), index=False)
+        return quarantine_file
+
+    def __read_valid_rows(
+        self,
+        file: str,
+        content: bytes,
+        not_before: Optional[datetime]
+    ) -> Tuple[Optional[pd.DataFrame], StockDataAudit]:
+        """
+        Parse the content of a stock data file and validate its rows,
+        quarantining the invalid ones.
+
+        A file that cannot be parsed at all is rejected as a whole. Either way
+        the returned audit record marks the file as processed, so a bad file
+        costs a single pass instead of failing every ingest run. Timestamped
+        rows are returned in time order.
+
+        Args:
+            file (str): Name of the file in the stock data directory.
+            content (bytes): Content of the file.
+            not_before (Optional[datetime]): Earliest accepted timestamp.
+
+        Returns:
+            Tuple[Optional[pd.DataFrame], StockDataAudit]: The valid rows, or
+            None if there are none, and the unsaved audit record of the file.
+        """
+        audit = StockDataAudit(file_name=file)
+        try:
+            df = self.read_file(os.path.join(self._stock_data_dir, file), content)
+        except Exception as e:
+            audit.status, audit.error = StockDataAudit.REJECTED, f"Unreadable file: {e}"
+            return None, audit
+
+        valid_rows, invalid_rows = validate_stock_frame(df, not_before)
+        audit.total_rows, audit.valid_rows, audit.quarantined_rows = len(df), len(valid_rows), len(invalid_rows)
+        if len(invalid_rows):
+            audit.quarantine_file = self.__quarantine(file, invalid_rows)
+            audit.status = StockDataAudit.PARTIAL if len(valid_rows) else StockDataAudit.REJECTED
+        if TIMESTAMP_COLUMN in valid_rows:
+            valid_rows = valid_rows.sort_values(TIMESTAMP_COLUMN, kind="stable")
+        return (valid_rows if len(valid_rows) else None), audit
+
+    def parse_files(self) -> None:
+        """
+        Parse unprocessed stock data files and save stock data to the database.
+
+        Each file is read once and its content hashed, and a file whose content
+        was already ingested, under any name, is recorded as a duplicate
+        without being parsed. Rows
+        that do not fit the database columns are quarantined with their
+        reasons and the rest of the file still loads. With
+        `STOCK_INGEST_DEDUP_ROWS`, timestamped rows already stored are dropped.
+        With `STOCK_INGEST_SUPPRESS_UNCHANGED`, only ticks that moved from the
+        last stored price are saved; the market snapshot still sees every valid tick.
+        Rows timed before the archived history or in the future are quarantined,
+        and rows older than the latest stored tick of their stock are stored
+        without moving the market snapshot or triggering orders.
+        """
+        files_to_process = self.__filter_unprocessed_files(
+            self._get_filenames())
+        tick_objects, audit_objects, frames = [], [], []
+        not_before = PriceArchive().archived_until()
+
+        seen_hashes: Set[str] = set()
+        for file in files_to_process:
+            # The buffer that is hashed is the one parsed, the file is read once
+            content, content_hash = read_file_content(os.path.join(self._stock_data_dir, file))
+            if content_hash in seen_hashes or self.__is_ingested(content_hash):
+                audit_objects.append(StockDataAudit(
+                    file_name=file, status=StockDataAudit.DUPLICATE, content_hash=content_hash))
+                continue
+            seen_hashes.add(content_hash)
+
+            valid_rows, audit = self.__read_valid_rows(file, content, not_before)
+            # Release the raw content before the next file is read
+            del content
+            audit.content_hash = content_hash
+            audit_objects.append(audit)
+            if valid_rows is not None:
+                frames.append(valid_rows)
+
+        if settings.STOCK_INGEST_DEDUP_ROWS and frames:
+            frames = self.__drop_duplicate_ticks(frames)
+
+        batch = pd.concat(frames, ignore_index=True) if frames else None
+        # Read before inserting, the new rows would otherwise be their own previous quotes
+        previous_quotes = self.__get_previous_quotes() if batch is not None else {}
+
+        names = batch["name"].unique().tolist() if batch is not None else []
+        symbols = self.__get_symbols(names) if names else {}
+        # Read before inserting, the new rows would otherwise be their own latest ticks
+        live = self.__live_rows(batch, names) if batch is not None and TIMESTAMP_COLUMN in batch else batch
+        suppress = settings.STOCK_INGEST_SUPPRESS_UNCHANGED and batch is not None
+        stored_prices = self.__get_stored_prices(names) if suppress else {}
+        for df in frames:
+            if suppress:
+                df = self.__suppress_unchanged(df, stored_prices)
+            tick_objects.extend(self.__create_tick_objects(df, symbols))
+
+        self.__bulk_insert(tick_objects, audit_objects)
+        if batch is not None:
+            try:
+                if len(live):
+                    self.__update_market_snapshot(live, previous_quotes)
+                    self.__match_orders(live, symbols)
+            finally:
+                # The ticks are stored: invalidate computations cached against the
+                # previous prices and publish the new ones even if matching failed
+                version = bump_ingest_version()
+                if settings.LATEST_PRICE_SNAPSHOT_ENABLED:
+                    latest_price_snapshot.publish(tick_objects, version)
+        elif settings.LATEST_PRICE_SNAPSHOT_ENABLED:
+            # No new prices, the published prices are still the latest ones
+            latest_price_snapshot.touch()
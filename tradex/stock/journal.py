@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import groupby
+from typing import Any, Dict, Iterable, List
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import HoldingSnapshot, Trade
+
+# Holdings are kept as {name: {"quantity": int, "invested_amount": Decimal}}
+Holdings = Dict[str, Dict[str, Any]]
+
+
+def record_trades(trades: List[Trade]) -> None:
+    """
+    Append trades to the journal with a single bulk insert.
+
+    Args:
+        trades (List[Trade]): Unsaved trades.
+    """
+    if trades:
+        Trade.objects.bulk_create(trades, batch_size=1000)
+
+
+def realized_pnl(quantity: int, invested_amount: Decimal, sell_quantity: int, sell_price: Decimal) -> Decimal:
+    """
+    Compute the profit or loss realized by selling part of a holding at its
+    average cost basis.
+
+    Args:
+        quantity (int): Quantity held before the sell.
+        invested_amount (Decimal): Amount invested in the holding before the sell.
+        sell_quantity (int): Quantity sold.
+        sell_price (Decimal): Price of the sell.
+
+    Returns:
+        Decimal: The realized profit (positive) or loss (negative).
+    """
+    average_price = Decimal(invested_amount) / quantity
+    return (Decimal(sell_price) - average_price) * sell_quantity
+
+
+def replay(holdings: Holdings, trades: Iterable[Trade]) -> Holdings:
+    """
+    Apply trades, in journal order, on top of a set of holdings.
+
+    Args:
+        holdings (Holdings): The starting holdings, left unchanged.
+        trades (Iterable[Trade]): Trades in creation order, with their symbols.
+
+    Returns:
+        Holdings: The resulting holdings.
+    """
+    result: Holdings = {name: dict(holding) for name, holding in holdings.items()}
+    for trade in trades:
+        holding = result.setdefault(
+            trade.symbol.name, {"quantity": 0, "invested_amount": Decimal(0)})
+        invested_amount = Decimal(holding["invested_amount"])
+        if trade.side == Trade.BUY:
+            holding["quantity"] += trade.quantity
+            holding["invested_amount"] = invested_amount + Decimal(trade.price) * trade.quantity
+        else:
+            average_price = invested_amount / holding["quantity"] if holding["quantity"] else Decimal(0)
+            holding["quantity"] -= trade.quantity
+            holding["invested_amount"] = invested_amount - average_price * trade.quantity
+        if holding["quantity"] <= 0:
+            del result[trade.symbol.name]
+    return result
+
+
+def _load_holdings(snapshot_holdings: Dict[str, Dict[str, Any]]) -> Holdings:
+    """
+    Convert holdings stored in a snapshot back to Decimal amounts.
+    """
+    return {
+        name: {"quantity": int(holding["quantity"]), "invested_amount": Decimal(holding["invested_amount"])}
+        for name, holding in snapshot_holdings.items()
+    }
+
+
+def _dump_holdings(holdings: Holdings) -> Dict[str, Dict[str, Any]]:
+    """
+    Convert holdings to JSON serializable values for a snapshot.
+    """
+    return {
+        name: {"quantity": holding["quantity"], "invested_amount": str(holding["invested_amount"])}
+        for name, holding in holdings.items()
+    }
+
+
+def holdings_as_of(user: User, at: datetime) -> Holdings:
+    """
+    Reconstruct a user's holdings at a point in time from the nearest earlier
+    snapshot and the trades created since it was taken.
+
+    Args:
+        user (User): The user.
+        at (datetime): The point in time.
+
+    Returns:
+        Holdings: The holdings at that time.
+    """
+    snapshot = HoldingSnapshot.objects.filter(
+        user=user, taken_at__lte=at).order_by("-taken_at").first()
+    holdings = _load_holdings(snapshot.holdings) if snapshot else {}
+    trades = Trade.objects.filter(user=user, created_at__lte=at).order_by("created_at", "id")
+    if snapshot:
+        trades = trades.filter(created_at__gte=snapshot.taken_at)
+    return replay(holdings, trades.select_related("symbol").only(
+        "symbol__name", "side", "quantity", "price").iterator())
+
+
+def take_snapshots(chunk_size: int = 2000) -> int:
+    """
+    Snapshot the holdings of every user who traded since their last snapshot.
+
+    A snapshot holds every trade created before its `taken_at`. Trades are
+    not committed in id or creation order, so a run only covers the trades
+    created more than `HOLDING_SNAPSHOT_LOOKBACK` seconds ago, which are all
+    committed, and the next run picks up from there. Latest snapshots are
+    loaded in one query and the trades created since the previous run's
+    cutoff are streamed in a second one, so the cost is proportional to the
+    number of trades since the previous run.
+
+    Args:
+        chunk_size (int): Number of trades fetched from the database per round trip.
+
+    Returns:
+        int: Number of snapshots taken.
+    """
+    latest_ids = HoldingSnapshot.objects.order_by().values(
+        "user").annotate(latest_id=Max("id")).values("latest_id")
+    snapshots = {
+        snapshot.user_id: snapshot
+        for snapshot in HoldingSnapshot.objects.filter(id__in=latest_ids)
+    }
+
+    # Trades created before the cutoff had time to commit, later ones are left to the next run
+    cutoff = timezone.now() - timedelta(seconds=settings.HOLDING_SNAPSHOT_LOOKBACK)
+    trades = Trade.objects.filter(created_at__lt=cutoff)
+    if snapshots:
+        # A user who traded before the previous cutoff got a snapshot at that run
+        previous_cutoff = max(snapshot.taken_at for snapshot in snapshots.values())
+        trades = trades.filter(created_at__gte=previous_cutoff)
+    trades = trades.order_by("user_id", "created_at", "id").select_related("symbol").only(
+        "user_id", "symbol__name", "side", "quantity", "price", "created_at").iterator(chunk_size=chunk_size)
+
+    new_snapshots: List[HoldingSnapshot] = []
+    for user_id, group in groupby(trades, key=lambda trade: trade.user_id):
+        snapshot = snapshots.get(user_id)
+        user_trades = [trade for trade in group if snapshot is None or trade.created_at >= snapshot.taken_at]
+        if not user_trades:
+            continue
+        holdings = replay(_load_holdings(snapshot.holdings) if snapshot else {}, user_trades)
+        new_snapshots.append(HoldingSnapshot(
+            user_id=user_id,
+            last_trade_id=max(trade.id for trade in user_trades),
+            holdings=_dump_holdings(holdings),
+            taken_at=cutoff
+        ))
+
+    HoldingSnapshot.objects.bulk_create(new_snapshots, batch_size=1000)
+    return len(new_snapshots)
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandParser
+from typing import Any, List
+
+from stock.ingest import (
+    FILE_READERS,
+    FILE_WRITERS,
+    StockDataParser,
+    StockNameGenerator,
+    StockPriceGenerator,
+)
+
+
+class Command(BaseCommand):
+    """
+    Management command comparing parse throughput and on-disk size of the
+    supported stock data file formats.
+    """
+    help = "Benchmark parse throughput and file size for each stock data file format."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Register command line arguments.
+
+        Args:
+            parser (CommandParser): The argument parser of the command.
+        """
+        parser.add_argument("--rows", type=int, default=1_000_000,
+                            help="Number of rows in the generated dataset.")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Number of timed reads per format; the best run is reported.")
+        parser.add_argument("--formats", nargs="+", default=list(FILE_READERS),
+                            choices=list(FILE_READERS), help="Formats to benchmark.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Write the same dataset in every requested format to a temporary directory
+        (never the ingest directory) and time how long the parser takes to read it back.
+        """
+        rows: int = options["rows"]
+        repeat: int = options["repeat"]
+        formats: List[str] = options["formats"]
+
+        df = pd.DataFrame({
+            "name": [StockNameGenerator.generate_random_stock_name() for _ in range(rows)],
+            "price": [StockPriceGenerator.generate_random_stock_price(20.0, 100.0) for _ in range(rows)],
+        })
+        parser = StockDataParser()
+
+        self.stdout.write(
+            f"{'format':<10}{'size (MB)':>12}{'best read (s)':>16}{'rows/s':>14}")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for file_format in formats:
+                file_path = os.path.join(tmp_dir, f"benchmark.{file_format}")
+                FILE_WRITERS[file_format](df, file_path)
+                size_mb = os.path.getsize(file_path) / (1024 * 1024)
+
+                timings: List[float] = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    parser.read_file(file_path)
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+
+                self.stdout.write(
+                    f"{file_format:<10}{size_mb:>12.2f}{best:>16.4f}{rows / best:>14,.0f}")
@@ -0,0 +1,96 @@
+import re
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from typing import Any, Dict, List, Set, Tuple
+
+# Loads what a web worker loads before serving its first request
+WEB_WORKER_STARTUP = """
+from tradex.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+# "import time:      1234 |      5678 |   package.module"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+\d+\s+\|\s+(\S+)$")
+
+
+class Command(BaseCommand):
+    """
+    Management command measuring the import time of a web worker with
+    `python -X importtime`, and failing when it imports a module reserved for
+    the Celery workers or exceeds a time budget.
+    """
+    help = "Benchmark web worker startup imports and guard against heavy imports."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Register command line arguments.
+
+        Args:
+            parser (CommandParser): The argument parser of the command.
+        """
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="Number of measured startups; the median is reported.")
+        parser.add_argument("--top", type=int, default=10,
+                            help="Number of most expensive packages listed.")
+        parser.add_argument("--forbid", nargs="+", default=["pandas", "pyarrow"],
+                            help="Modules a web worker must not import at startup.")
+        parser.add_argument("--max-ms", type=float, default=None,
+                            help="Fail when the median import time exceeds this many milliseconds.")
+
+    def _measure(self) -> Tuple[float, Dict[str, int], Set[str]]:
+        """
+        Start a fresh interpreter loading the web worker and parse its import times.
+
+        Returns:
+            Tuple[float, Dict[str, int], Set[str]]: The total import time in
+            milliseconds, the self time in microseconds summed per root package,
+            and every imported module.
+        """
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", WEB_WORKER_STARTUP],
+            cwd=settings.BASE_DIR, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Web worker startup failed:\n{result.stderr[-2000:]}")
+
+        packages: Dict[str, int] = {}
+        modules: Set[str] = set()
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            self_us, module = int(match.group(1)), match.group(2)
+            modules.add(module)
+            package = module.split(".")[0]
+            packages[package] = packages.get(package, 0) + self_us
+        return sum(packages.values()) / 1000, packages, modules
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Measure the startup imports, report the median and the heaviest packages,
+        and raise `CommandError` on a forbidden import or an exceeded budget.
+        """
+        totals: List[float] = []
+        packages: Dict[str, int] = {}
+        modules: Set[str] = set()
+        for _ in range(options["repeat"]):
+            total_ms, packages, modules = self._measure()
+            totals.append(total_ms)
+        median_ms = statistics.median(totals)
+
+        self.stdout.write(f"Median import time: {median_ms:.1f} ms over {len(totals)} runs")
+        self.stdout.write(f"{'package':<30}{'import time (ms)':>18}")
+        for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:options["top"]]:
+            self.stdout.write(f"{package:<30}{self_us / 1000:>18.1f}")
+
+        forbidden = sorted(module for module in options["forbid"] if module in modules)
+        if forbidden:
+            raise CommandError(f"Web worker startup imports {', '.join(forbidden)}")
+        if options["max_ms"] is not None and median_ms > options["max_ms"]:
+            raise CommandError(
+                f"Median import time {median_ms:.1f} ms exceeds the {options['max_ms']:.1f} ms budget")
+        self.stdout.write(self.style.SUCCESS("Startup imports are within budget"))
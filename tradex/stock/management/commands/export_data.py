@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from typing import Any
+
+from stock.models import DataExport
+from stock.utils import parse_datetime_param
+
+
+class Command(BaseCommand):
+    """
+    Management command exporting every holding with its valuation, or the
+    price history of a date range, to a compressed CSV or Parquet file in
+    `DATA_EXPORT_DIR`. The rows are streamed in chunks, so memory stays
+    constant whatever the size of the export.
+    """
+    help = "Export holdings with valuations, or price history, to a compressed CSV or Parquet file."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Register command line arguments.
+
+        Args:
+            parser (CommandParser): The argument parser of the command.
+        """
+        parser.add_argument("kind", choices=[DataExport.HOLDINGS, DataExport.PRICES],
+                            help="What to export.")
+        parser.add_argument("--format", dest="file_format", default=DataExport.CSV,
+                            choices=[DataExport.CSV, DataExport.PARQUET],
+                            help="File format, CSV is gzip compressed and Parquet zstd compressed.")
+        parser.add_argument("--start", default=None,
+                            help="Inclusive ISO 8601 start of the price history range.")
+        parser.add_argument("--end", default=None,
+                            help="Inclusive ISO 8601 end of the price history range.")
+        parser.add_argument("--async", dest="run_async", action="store_true",
+                            help="Queue the export on the Celery worker instead of running it here.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Record the export, then run it or queue it.
+        """
+        try:
+            start = parse_datetime_param(options["start"])
+            end = parse_datetime_param(options["end"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options["kind"] == DataExport.HOLDINGS and (start or end):
+            raise CommandError("--start and --end only apply to price history exports")
+
+        export = DataExport.objects.create(
+            kind=options["kind"], file_format=options["file_format"], start=start, end=end)
+
+        if options["run_async"]:
+            from stock.tasks import export_data
+
+            export_data.delay(export.id)
+            self.stdout.write(f"Export #{export.id} queued")
+            return
+
+        from stock.export import export_path, run_export
+
+        export = run_export(export)
+        if export.status == DataExport.FAILED:
+            raise CommandError(f"Export #{export.id} failed: {export.error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {export.rows} rows to {export_path(export.file_name)}"))
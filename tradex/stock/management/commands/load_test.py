@@ -0,0 +1,292 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from typing import Any, Dict, List, Optional, Tuple
+
+from stock.models import Symbol
+
+# Endpoint keys of the request mix, mapped to their HTTP method and path
+ENDPOINTS: Dict[str, Tuple[str, str]] = {
+    "portfolio": ("GET", "/api/stock/user-stocks/"),
+    "stocks": ("GET", "/api/stock/all/?limit=50"),
+    "buy": ("POST", "/api/stock/user-stocks/buy/"),
+    "sell": ("POST", "/api/stock/user-stocks/sell/"),
+}
+LOGIN_PATH = "/api/auth/login/"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list of values.
+
+    Args:
+        sorted_values (List[float]): The values, sorted ascending.
+        pct (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, or 0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """
+    Parse a request mix such as 'portfolio=4,stocks=4,buy=1,sell=1'.
+
+    Args:
+        value (str): Comma separated endpoint=weight pairs.
+
+    Returns:
+        Dict[str, int]: Weight per endpoint.
+
+    Raises:
+        CommandError: If an endpoint is unknown or a weight is invalid.
+    """
+    mix: Dict[str, int] = {}
+    for item in value.split(","):
+        endpoint, _, weight = item.partition("=")
+        endpoint = endpoint.strip()
+        if endpoint not in ENDPOINTS or not weight.strip().isdigit():
+            raise CommandError(f"Invalid mix entry: {item}")
+        mix[endpoint] = int(weight)
+    if not any(mix.values()):
+        raise CommandError("The request mix needs at least one positive weight")
+    return mix
+
+
+class LoadStats:
+    """
+    Thread-safe collector of request latencies and outcomes per endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.throttled: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, latency: float, status_code: int) -> None:
+        """
+        Record one request. Status 0 stands for a connection error.
+        """
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if status_code == 429:
+                self.throttled[endpoint] += 1
+            elif not 200 <= status_code < 300:
+                self.errors[endpoint] += 1
+
+
+class Command(BaseCommand):
+    """
+    Management command simulating concurrent traders against a running server.
+
+    It creates `--users` users, logs each one in through the API, then runs one
+    thread per user replaying a weighted mix of portfolio reads, stock list
+    reads and trades while a background thread keeps ingesting generated price
+    files, and reports throughput, latency percentiles and error rates per
+    endpoint. No Celery worker or broker is needed.
+    """
+    help = "Load test the trading API with simulated users while prices are ingested."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """
+        Register command line arguments.
+
+        Args:
+            parser (CommandParser): The argument parser of the command.
+        """
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000",
+                            help="URL of the server under test.")
+        parser.add_argument("--users", type=int, default=20,
+                            help="Number of simulated users, each running in its own thread.")
+        parser.add_argument("--duration", type=float, default=30.0,
+                            help="Duration of the test in seconds.")
+        parser.add_argument("--mix", default="portfolio=4,stocks=4,buy=1,sell=1",
+                            help="Request mix as endpoint=weight pairs (portfolio, stocks, buy, sell).")
+        parser.add_argument("--think-ms", type=float, default=250.0,
+                            help="Pause of each user between two requests, in milliseconds.")
+        parser.add_argument("--ingest-interval", type=float, default=5.0,
+                            help="Seconds between two background ingests of generated prices; 0 disables them.")
+        parser.add_argument("--timeout", type=float, default=10.0,
+                            help="Timeout of a single request, in seconds.")
+        parser.add_argument("--user-prefix", default="loadtest",
+                            help="Username prefix of the simulated users.")
+        parser.add_argument("--keep-users", action="store_true",
+                            help="Keep the simulated users, their holdings and trades after the test.")
+
+    def _request(self, base_url: str, method: str, path: str, timeout: float,
+                 token: Optional[str] = None, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        """
+        Send a JSON request and return its status code and decoded body.
+        Connection errors are reported as status 0.
+        """
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Token {token}"
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except (urllib.error.URLError, OSError, ValueError):
+            return 0, None
+
+    def _create_users(self, prefix: str, count: int, password: str) -> List[User]:
+        """
+        Create the simulated users, replacing leftovers of a previous run.
+        """
+        User.objects.filter(username__startswith=f"{prefix}_").delete()
+        # Hash once, every simulated user shares the same password
+        password_hash = make_password(password)
+        User.objects.bulk_create([
+            User(username=f"{prefix}_{i:05d}", password=password_hash)
+            for i in range(count)
+        ])
+        return list(User.objects.filter(username__startswith=f"{prefix}_").order_by("username"))
+
+    def _ingest_loop(self, stop: threading.Event, interval: float, ingests: List[float]) -> None:
+        """
+        Generate a price file for the existing stocks and ingest it every `interval` seconds.
+        """
+        # The ingest stack pulls in pandas, only load it when ingesting
+        from stock.ingest import StockDataGenerator
+        from stock.tasks import update_stocks
+
+        try:
+            while not stop.wait(interval):
+                start = time.perf_counter()
+                StockDataGenerator().generate_random_stocks(use_existing_names=True)
+                update_stocks()
+                ingests.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+
+    def _user_loop(self, options: Dict[str, Any], token: str, names: List[str],
+                   mix: Dict[str, int], deadline: float, stats: LoadStats) -> None:
+        """
+        Replay the request mix for one user until the deadline.
+        """
+        endpoints, weights = list(mix), list(mix.values())
+        # Quantity this user holds per stock, so sells target holdings that exist
+        held: Dict[str, int] = {}
+        while time.monotonic() < deadline:
+            endpoint = random.choices(endpoints, weights)[0]
+            payload = None
+            if endpoint == "sell" and not held:
+                endpoint = "buy"
+            if endpoint == "buy":
+                payload = {"name": random.choice(names), "quantity": 1}
+            elif endpoint == "sell":
+                payload = {"name": random.choice(sorted(held)), "quantity": 1}
+
+            method, path = ENDPOINTS[endpoint]
+            start = time.perf_counter()
+            status_code, _ = self._request(options["base_url"], method, path, options["timeout"], token, payload)
+            stats.record(endpoint, time.perf_counter() - start, status_code)
+
+            if status_code == 200 and endpoint in ("buy", "sell"):
+                held[payload["name"]] = held.get(payload["name"], 0) + (1 if endpoint == "buy" else -1)
+            if endpoint == "sell" and (status_code == 400 or held.get(payload["name"], 0) <= 0):
+                held.pop(payload["name"], None)
+            time.sleep(options["think_ms"] / 1000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """
+        Create the users, log them in, run the load and print the report.
+        """
+        mix = parse_mix(options["mix"])
+        if options["users"] <= 0 or options["duration"] <= 0:
+            raise CommandError("--users and --duration must be positive")
+        names = list(Symbol.objects.values_list("name", flat=True))
+        if not names:
+            raise CommandError("No stocks to trade, ingest some stock data first")
+
+        password = "loadtest-password"
+        users = self._create_users(options["user_prefix"], options["users"], password)
+        stats = LoadStats()
+        try:
+            tokens: List[str] = []
+            for user in users:
+                start = time.perf_counter()
+                status_code, body = self._request(
+                    options["base_url"], "POST", LOGIN_PATH, options["timeout"],
+                    payload={"username": user.username, "password": password})
+                stats.record("login", time.perf_counter() - start, status_code)
+                if status_code != 200:
+                    raise CommandError(f"Login of {user.username} failed with status {status_code}")
+                tokens.append(body["data"]["auth_token"])
+
+            stop = threading.Event()
+            ingests: List[float] = []
+            ingest_thread = None
+            if options["ingest_interval"] > 0:
+                ingest_thread = threading.Thread(
+                    target=self._ingest_loop, args=(stop, options["ingest_interval"], ingests), daemon=True)
+                ingest_thread.start()
+
+            self.stdout.write(
+                f"Running {len(tokens)} users for {options['duration']:.0f}s against {options['base_url']}")
+            started = time.monotonic()
+            deadline = started + options["duration"]
+            workers = [
+                threading.Thread(target=self._user_loop, args=(options, token, names, mix, deadline, stats))
+                for token in tokens
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.monotonic() - started
+
+            stop.set()
+            if ingest_thread is not None:
+                ingest_thread.join()
+        finally:
+            if not options["keep_users"]:
+                User.objects.filter(username__startswith=f"{options['user_prefix']}_").delete()
+
+        self._report(stats, elapsed, ingests)
+
+    def _report(self, stats: LoadStats, elapsed: float, ingests: List[float]) -> None:
+        """
+        Print throughput, latency percentiles and error rates per endpoint.
+        """
+        self.stdout.write(
+            f"{'endpoint':<12}{'requests':>10}{'req/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}"
+            f"{'p99 (ms)':>10}{'errors':>9}{'throttled':>11}")
+        total_requests, total_errors = 0, 0
+        for endpoint in ["login", *ENDPOINTS]:
+            latencies = sorted(stats.latencies.get(endpoint, []))
+            if not latencies:
+                continue
+            count, errors = len(latencies), stats.errors[endpoint]
+            total_requests += count
+            total_errors += errors
+            # Logins happen before the timed run, their rate is not meaningful
+            rate = f"{count / elapsed:>10.1f}" if endpoint != "login" else f"{'-':>10}"
+            self.stdout.write(
+                f"{endpoint:<12}{count:>10}{rate}"
+                f"{percentile(latencies, 50) * 1000:>10.1f}"
+                f"{percentile(latencies, 95) * 1000:>10.1f}"
+                f"{percentile(latencies, 99) * 1000:>10.1f}"
+                f"{errors / count:>9.1%}{stats.throttled[endpoint] / count:>11.1%}")
+
+        if ingests:
+            self.stdout.write(
+                f"Background ingests: {len(ingests)}, average {sum(ingests) / len(ingests):.2f}s")
+        summary = f"Total: {total_requests} requests, {total_errors / max(total_requests, 1):.1%} errors"
+        self.stdout.write(self.style.SUCCESS(summary) if total_errors == 0 else self.style.WARNING(summary))
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-19 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0008_stockdataaudit'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['name', 'created_at'], name='stock_name_created_at_idx'),
+        ),
+    ]
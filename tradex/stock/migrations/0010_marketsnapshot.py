@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-19 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0009_stock_name_created_at_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='modified at')),
+                ('quotes', models.JSONField(default=dict)),
+                ('gainers', models.JSONField(default=list)),
+                ('losers', models.JSONField(default=list)),
+                ('most_active', models.JSONField(default=list)),
+                ('symbols', models.IntegerField(default=0)),
+                ('updated', models.IntegerField(default=0)),
+                ('advancers', models.IntegerField(default=0)),
+                ('decliners', models.IntegerField(default=0)),
+                ('unchanged', models.IntegerField(default=0)),
+                ('listed', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Market Snapshot',
+                'verbose_name_plural': 'Market Snapshots',
+                'db_table': 'market_snapshot',
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1 on 2026-10-19 10:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0011_stock_created_at_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoldingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_trade_id', models.BigIntegerField()),
+                ('holdings', models.JSONField(default=dict)),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Holding Snapshot',
+                'verbose_name_plural': 'Holding Snapshots',
+                'db_table': 'holding_snapshot',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['user', 'taken_at'], name='holding_snapshot_user_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Trade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=10)),
+                ('side', models.CharField(choices=[('buy', 'Buy'), ('sell', 'Sell')], max_length=4)),
+                ('quantity', models.IntegerField()),
+                ('price', models.DecimalField(decimal_places=6, max_digits=12)),
+                ('realized_pnl', models.DecimalField(decimal_places=6, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='created at')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trade',
+                'verbose_name_plural': 'Trades',
+                'db_table': 'trade',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='trade_user_id_idx')],
+            },
+        ),
+    ]
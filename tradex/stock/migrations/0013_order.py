@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-19 11:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0012_trade_journal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='modified at')),
+                ('name', models.CharField(max_length=10)),
+                ('side', models.CharField(choices=[('buy', 'Buy'), ('sell', 'Sell')], max_length=4)),
+                ('order_type', models.CharField(choices=[('limit', 'Limit'), ('stop', 'Stop')], max_length=5)),
+                ('quantity', models.IntegerField()),
+                ('trigger_price', models.DecimalField(decimal_places=6, max_digits=12)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('filled', 'Filled'), ('cancelled', 'Cancelled'), ('rejected', 'Rejected')], default='open', max_length=9)),
+                ('filled_price', models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True)),
+                ('filled_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Order',
+                'verbose_name_plural': 'Orders',
+                'db_table': 'stock_order',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['name', 'status', 'trigger_price'], name='order_book_idx'), models.Index(fields=['user', 'status'], name='order_user_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The data copy must be committed before the tables it filled are altered:
+    # PostgreSQL refuses to ALTER a table with pending trigger events
+    atomic = False
+
+    dependencies = [
+        ('stock', '0013_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Symbol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=10, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Symbol',
+                'verbose_name_plural': 'Symbols',
+                'db_table': 'symbol',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceTick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=6, max_digits=12)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='created at')),
+                ('symbol', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='stock.symbol')),
+            ],
+            options={
+                'verbose_name': 'Price Tick',
+                'verbose_name_plural': 'Price Ticks',
+                'db_table': 'price_tick',
+                'ordering': ['-id'],
+                'indexes': [
+                    models.Index(fields=['symbol', 'created_at'], name='price_tick_symbol_created_idx'),
+                    models.Index(fields=['created_at'], name='price_tick_created_at_idx'),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name='userstock',
+            name='symbol',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='stock.symbol'),
+        ),
+        # Move the data with set-based statements, the price history can be large.
+        # Ticks are copied in id order so their new ids keep the ingest order.
+        # The old table is dropped below, so the copy cannot be reversed.
+        migrations.RunSQL(
+            sql=[
+                "INSERT INTO symbol (name) SELECT DISTINCT name FROM stock ORDER BY name",
+                "INSERT INTO price_tick (symbol_id, price, created_at) "
+                "SELECT symbol.id, stock.price, stock.created_at "
+                "FROM stock INNER JOIN symbol ON symbol.name = stock.name ORDER BY stock.id",
+                "UPDATE user_stock SET symbol_id = ("
+                "SELECT symbol.id FROM stock INNER JOIN symbol ON symbol.name = stock.name "
+                "WHERE stock.id = user_stock.stock_id)",
+            ],
+            reverse_sql=None,
+        ),
+        migrations.RemoveConstraint(
+            model_name='userstock',
+            name='unique_user_stock_mapping',
+        ),
+        migrations.RemoveField(
+            model_name='userstock',
+            name='stock',
+        ),
+        migrations.AlterField(
+            model_name='userstock',
+            name='symbol',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='stock.symbol'),
+        ),
+        migrations.AddConstraint(
+            model_name='userstock',
+            constraint=models.UniqueConstraint(fields=('user', 'symbol'), name='unique_user_stock_mapping'),
+        ),
+        migrations.DeleteModel(
+            name='Stock',
+        ),
+    ]
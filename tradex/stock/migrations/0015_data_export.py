@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0014_symbol_price_tick'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='modified at')),
+                ('kind', models.CharField(choices=[('holdings', 'Holdings with valuations'), ('prices', 'Price history')], max_length=8)),
+                ('file_format', models.CharField(choices=[('csv', 'CSV (gzip)'), ('parquet', 'Parquet (zstd)')], default='csv', max_length=7)),
+                ('start', models.DateTimeField(blank=True, help_text='Inclusive start of the price history range, unbounded if empty.', null=True)),
+                ('end', models.DateTimeField(blank=True, help_text='Inclusive end of the price history range, unbounded if empty.', null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=7)),
+                ('file_name', models.CharField(blank=True, max_length=256)),
+                ('rows', models.BigIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Data Export',
+                'verbose_name_plural': 'Data Exports',
+                'db_table': 'data_export',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0015_data_export'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockdataaudit',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='stockdataaudit',
+            name='quarantine_file',
+            field=models.CharField(blank=True, max_length=256),
+        ),
+        migrations.AddField(
+            model_name='stockdataaudit',
+            name='quarantined_rows',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockdataaudit',
+            name='status',
+            field=models.CharField(choices=[('loaded', 'Loaded'), ('partial', 'Partially loaded'), ('rejected', 'Rejected')], default='loaded', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='stockdataaudit',
+            name='total_rows',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockdataaudit',
+            name='valid_rows',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-19 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0016_stock_data_audit_validation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockdataaudit',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='stockdataaudit',
+            name='status',
+            field=models.CharField(choices=[('loaded', 'Loaded'), ('partial', 'Partially loaded'), ('rejected', 'Rejected'), ('duplicate', 'Duplicate')], default='loaded', max_length=9),
+        ),
+    ]
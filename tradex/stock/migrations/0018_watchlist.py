@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-19 11:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0017_stock_data_audit_content_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Watchlist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='modified at')),
+                ('name', models.CharField(max_length=64)),
+                ('symbols', models.ManyToManyField(blank=True, db_table='watchlist_symbol', related_name='watchlists', to='stock.symbol')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Watchlist',
+                'verbose_name_plural': 'Watchlists',
+                'db_table': 'watchlist',
+                'ordering': ['name'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'name'), name='unique_user_watchlist_name')],
+            },
+        ),
+    ]
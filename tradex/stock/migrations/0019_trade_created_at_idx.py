@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-19 11:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0018_watchlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['created_at'], name='trade_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-19 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0019_trade_created_at_idx'),
+    ]
+
+    operations = [
+        # The names are dropped once copied, and restored before the copy is reversed
+        migrations.AlterField(
+            model_name='trade',
+            name='name',
+            field=models.CharField(max_length=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='name',
+            field=models.CharField(max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='symbol',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='stock.symbol'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='symbol',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='stock.symbol'),
+        ),
+    ]
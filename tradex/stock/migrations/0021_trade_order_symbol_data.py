@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-19 12:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Point trades and orders at their symbol. Runs on its own, between the
+    schema additions and the constraint changes, so no table is altered while
+    these updates are pending.
+    """
+
+    dependencies = [
+        ('stock', '0020_trade_order_symbol'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                # Names traded before their first price was ingested get a symbol too
+                "INSERT INTO symbol (name) SELECT DISTINCT name FROM trade "
+                "WHERE NOT EXISTS (SELECT 1 FROM symbol WHERE symbol.name = trade.name)",
+                "INSERT INTO symbol (name) SELECT DISTINCT name FROM stock_order "
+                "WHERE NOT EXISTS (SELECT 1 FROM symbol WHERE symbol.name = stock_order.name)",
+                "UPDATE trade SET symbol_id = (SELECT symbol.id FROM symbol WHERE symbol.name = trade.name)",
+                "UPDATE stock_order SET symbol_id = ("
+                "SELECT symbol.id FROM symbol WHERE symbol.name = stock_order.name)",
+            ],
+            reverse_sql=[
+                "UPDATE trade SET name = (SELECT symbol.name FROM symbol WHERE symbol.id = trade.symbol_id)",
+                "UPDATE stock_order SET name = ("
+                "SELECT symbol.name FROM symbol WHERE symbol.id = stock_order.symbol_id)",
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-19 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0021_trade_order_symbol_data'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_book_idx',
+        ),
+        migrations.RemoveField(
+            model_name='trade',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='name',
+        ),
+        migrations.AlterField(
+            model_name='trade',
+            name='symbol',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='stock.symbol'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='symbol',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='stock.symbol'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['symbol', 'status', 'trigger_price'], name='order_book_idx'),
+        ),
+    ]
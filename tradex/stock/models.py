@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 # Abstract model to track creation and modification timestamps
@@ -21,31 +22,69 @@ class AuditModel(models.Model):
     class Meta:
         abstract = True  # This model is abstract and won't create a table
 
-# Model for storing stock information
-class Stock(AuditModel):
+# Symbol master, one row per traded stock
+class Symbol(models.Model):
     """
-    A model to store stock information.
+    A model storing the identity of a stock. Price history and holdings refer
+    to it by its integer id instead of repeating the name.
     """
     name = models.CharField(
         max_length=10,
-        db_index=True
+        unique=True
+    )
+
+    def __str__(self) -> str:
+        """
+        Return the string representation of the symbol, which is its name.
+        """
+        return self.name
+
+    class Meta:
+        verbose_name = 'Symbol'
+        verbose_name_plural = 'Symbols'
+        db_table = 'symbol'
+        ordering = ['name']
+
+# Model for storing the price history, one narrow row per ingested tick
+class PriceTick(models.Model):
+    """
+    A model to store the price of a symbol at a point in time. Ticks are never
+    updated, so the table skips the `modified_at` column of `AuditModel`.
+    """
+    symbol = models.ForeignKey(
+        Symbol,
+        on_delete=models.CASCADE,
+        db_index=False  # Covered by the (symbol, created_at) index
     )
     price = models.DecimalField(
         max_digits=12,
         decimal_places=6
     )
+    created_at = models.DateTimeField(
+        verbose_name=_("created at"),
+        default=timezone.now,
+        editable=False
+    )
 
     def __str__(self) -> str:
         """
-        Return the string representation of the stock, which is its name.
+        Return the string representation of the tick.
         """
-        return self.name
+        return f"{self.symbol_id} @ {self.price}"
 
     class Meta:
-        verbose_name = 'Stock'
-        verbose_name_plural = 'Stocks'
-        db_table = 'stock'
-        ordering = ['-id']  # Order stocks by ID in descending order
+        verbose_name = 'Price Tick'
+        verbose_name_plural = 'Price Ticks'
+        db_table = 'price_tick'
+        ordering = ['-id']  # Order ticks by ID in descending order
+        indexes = [
+            # Serves per-symbol history range scans and latest price lookups
+            models.Index(fields=["symbol", "created_at"],
+                         name="price_tick_symbol_created_idx"),
+            # Serves date range filters across all symbols
+            models.Index(fields=["created_at"],
+                         name="price_tick_created_at_idx")
+        ]
 
 # Model for tracking user stock holdings and investments
 class UserStock(AuditModel):
@@ -56,8 +95,8 @@ class UserStock(AuditModel):
         User,
         on_delete=models.CASCADE
     )
-    stock = models.ForeignKey(
-        Stock,
+    symbol = models.ForeignKey(
+        Symbol,
         on_delete=models.CASCADE
     )
     quantity = models.IntegerField(
@@ -73,7 +112,7 @@ class UserStock(AuditModel):
         """
         Return a string representation of the user stock entry, showing the username and stock name.
         """
-        return f"{self.user.username} - {self.stock.name}"
+        return f"{self.user.username} - {self.symbol.name}"
 
     class Meta:
         verbose_name = 'User Stock'
@@ -83,7 +122,7 @@ class UserStock(AuditModel):
         ordering = ['-id']
         constraints = [
             models.UniqueConstraint(
-                fields=("user", "stock"),
+                fields=("user", "symbol"),
                 name="unique_user_stock_mapping"
             )
         ]
@@ -91,13 +130,54 @@ class UserStock(AuditModel):
 # Model for auditing stock data files
 class StockDataAudit(AuditModel):
     """
-    A model to keep a record of stock data files.
+    A model to keep a record of stock data files, with the outcome of their
+    validation and the hash of their content. A rejected file is recorded too,
+    so it is never retried, and so is a file whose content was already ingested
+    under another name.
     """
+    LOADED = "loaded"
+    PARTIAL = "partial"
+    REJECTED = "rejected"
+    DUPLICATE = "duplicate"
+    STATUS_CHOICES = [(LOADED, "Loaded"), (PARTIAL, "Partially loaded"), (REJECTED, "Rejected"),
+                      (DUPLICATE, "Duplicate")]
+
     file_name = models.CharField(
         max_length=256,
         unique=True,
         db_index=True
     )
+    status = models.CharField(
+        max_length=9,
+        choices=STATUS_CHOICES,
+        default=LOADED
+    )
+    # SHA-256 of the file content, looked up to skip re-delivered copies
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True
+    )
+    total_rows = models.IntegerField(
+        null=True,
+        blank=True
+    )
+    valid_rows = models.IntegerField(
+        null=True,
+        blank=True
+    )
+    quarantined_rows = models.IntegerField(
+        null=True,
+        blank=True
+    )
+    # Name of the file holding the invalid rows and their reasons, in STOCK_QUARANTINE_DIR
+    quarantine_file = models.CharField(
+        max_length=256,
+        blank=True
+    )
+    error = models.TextField(
+        blank=True
+    )
 
     class Meta:
         verbose_name = 'Stock Data Audit'
@@ -105,3 +185,314 @@ class StockDataAudit(AuditModel):
         db_table = 'stock_data_audit'
         # Order stock data audits by ID in descending order
         ordering = ['-id']
+
+# Model for the market summary computed at the end of each ingest
+class MarketSnapshot(AuditModel):
+    """
+    A model to store the latest quote of every stock together with the market
+    movers and summary statistics of the most recent ingest. Only one row is
+    kept, so reading the market summary is a single-row lookup.
+    """
+    quotes = models.JSONField(
+        default=dict
+    )  # Latest price per stock name
+    gainers = models.JSONField(
+        default=list
+    )
+    losers = models.JSONField(
+        default=list
+    )
+    most_active = models.JSONField(
+        default=list
+    )
+    symbols = models.IntegerField(
+        default=0
+    )  # Number of stocks with a quote
+    updated = models.IntegerField(
+        default=0
+    )  # Number of stocks quoted by the latest ingest
+    advancers = models.IntegerField(
+        default=0
+    )
+    decliners = models.IntegerField(
+        default=0
+    )
+    unchanged = models.IntegerField(
+        default=0
+    )
+    listed = models.IntegerField(
+        default=0
+    )  # Number of stocks quoted for the first time by the latest ingest
+
+    class Meta:
+        verbose_name = 'Market Snapshot'
+        verbose_name_plural = 'Market Snapshots'
+        db_table = 'market_snapshot'
+
+# Append-only journal of executed trades
+class Trade(models.Model):
+    """
+    A model recording every executed buy or sell. Rows are never updated, so
+    the table skips the `modified_at` column of `AuditModel` to stay narrow.
+    """
+    BUY = "buy"
+    SELL = "sell"
+    SIDE_CHOICES = [(BUY, "Buy"), (SELL, "Sell")]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE
+    )
+    symbol = models.ForeignKey(
+        Symbol,
+        on_delete=models.CASCADE
+    )
+    side = models.CharField(
+        max_length=4,
+        choices=SIDE_CHOICES
+    )
+    quantity = models.IntegerField()
+    price = models.DecimalField(
+        max_digits=12,
+        decimal_places=6
+    )
+    realized_pnl = models.DecimalField(
+        max_digits=14,
+        decimal_places=6,
+        default=0
+    )  # Profit or loss realized by a sell, zero for buys
+    created_at = models.DateTimeField(
+        verbose_name=_("created at"),
+        default=timezone.now,
+        editable=False
+    )
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the trade.
+        """
+        return f"{self.side} {self.quantity} {self.symbol.name}"
+
+    class Meta:
+        verbose_name = 'Trade'
+        verbose_name_plural = 'Trades'
+        db_table = 'trade'
+        ordering = ['-id']
+        indexes = [
+            # Serves per-user history pages and replays after a snapshot
+            models.Index(fields=["user", "id"], name="trade_user_id_idx"),
+            # Serves the lookback of holding snapshot runs
+            models.Index(fields=["created_at"], name="trade_created_at_idx")
+        ]
+
+# Periodic snapshot of a user's holdings reconstructed from the trade journal
+class HoldingSnapshot(models.Model):
+    """
+    A model storing a user's holdings after every trade created before
+    `taken_at`, so holdings at any point in time are rebuilt from the nearest
+    snapshot plus a short replay.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE
+    )
+    last_trade_id = models.BigIntegerField()  # Highest trade id included in the snapshot
+    holdings = models.JSONField(
+        default=dict
+    )  # {name: {"quantity": int, "invested_amount": str}}
+    taken_at = models.DateTimeField(
+        default=timezone.now
+    )
+
+    class Meta:
+        verbose_name = 'Holding Snapshot'
+        verbose_name_plural = 'Holding Snapshots'
+        db_table = 'holding_snapshot'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=["user", "taken_at"],
+                         name="holding_snapshot_user_idx")
+        ]
+
+# Resting limit and stop orders, matched against the prices of every ingest
+class Order(AuditModel):
+    """
+    A model storing a user's limit or stop order until it is filled or cancelled.
+
+    A buy limit and a sell stop trigger when the price falls to the trigger
+    price or below; a sell limit and a buy stop when it rises to it or above.
+    A triggered order is filled at the price of the tick that triggered it.
+    """
+    LIMIT = "limit"
+    STOP = "stop"
+    ORDER_TYPE_CHOICES = [(LIMIT, "Limit"), (STOP, "Stop")]
+
+    OPEN = "open"
+    FILLED = "filled"
+    CANCELLED = "cancelled"
+    REJECTED = "rejected"
+    STATUS_CHOICES = [(OPEN, "Open"), (FILLED, "Filled"),
+                      (CANCELLED, "Cancelled"), (REJECTED, "Rejected")]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE
+    )
+    symbol = models.ForeignKey(
+        Symbol,
+        on_delete=models.CASCADE,
+        db_index=False  # Covered by the order book index
+    )
+    side = models.CharField(
+        max_length=4,
+        choices=Trade.SIDE_CHOICES
+    )
+    order_type = models.CharField(
+        max_length=5,
+        choices=ORDER_TYPE_CHOICES
+    )
+    quantity = models.IntegerField()
+    trigger_price = models.DecimalField(
+        max_digits=12,
+        decimal_places=6
+    )
+    status = models.CharField(
+        max_length=9,
+        choices=STATUS_CHOICES,
+        default=OPEN
+    )
+    filled_price = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        null=True,
+        blank=True
+    )
+    filled_at = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the order.
+        """
+        return f"{self.side} {self.quantity} {self.symbol.name} {self.order_type} @ {self.trigger_price}"
+
+    class Meta:
+        verbose_name = 'Order'
+        verbose_name_plural = 'Orders'
+        db_table = 'stock_order'
+        ordering = ['-id']
+        indexes = [
+            # Price-sorted order book of every stock, serves the matching range scans
+            models.Index(fields=["symbol", "status", "trigger_price"],
+                         name="order_book_idx"),
+            # Serves the user's order list
+            models.Index(fields=["user", "status"],
+                         name="order_user_status_idx")
+        ]
+
+# Bulk exports of holdings or price history, written to MEDIA_ROOT for download
+class DataExport(AuditModel):
+    """
+    A model tracking a bulk export file, from its request until it is written.
+    """
+    HOLDINGS = "holdings"
+    PRICES = "prices"
+    KIND_CHOICES = [(HOLDINGS, "Holdings with valuations"), (PRICES, "Price history")]
+
+    CSV = "csv"
+    PARQUET = "parquet"
+    FORMAT_CHOICES = [(CSV, "CSV (gzip)"), (PARQUET, "Parquet (zstd)")]
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"),
+                      (DONE, "Done"), (FAILED, "Failed")]
+
+    kind = models.CharField(
+        max_length=8,
+        choices=KIND_CHOICES
+    )
+    file_format = models.CharField(
+        max_length=7,
+        choices=FORMAT_CHOICES,
+        default=CSV
+    )
+    start = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Inclusive start of the price history range, unbounded if empty."
+    )
+    end = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Inclusive end of the price history range, unbounded if empty."
+    )
+    status = models.CharField(
+        max_length=7,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    file_name = models.CharField(
+        max_length=256,
+        blank=True
+    )
+    rows = models.BigIntegerField(
+        null=True,
+        blank=True
+    )
+    error = models.TextField(
+        blank=True
+    )
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the export.
+        """
+        return f"{self.kind} export #{self.pk} ({self.file_format})"
+
+    class Meta:
+        verbose_name = 'Data Export'
+        verbose_name_plural = 'Data Exports'
+        db_table = 'data_export'
+        ordering = ['-id']
+
+# Named lists of stocks a user follows without holding them
+class Watchlist(AuditModel):
+    """
+    A model storing a user's named list of watched stocks.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE
+    )
+    name = models.CharField(
+        max_length=64
+    )
+    symbols = models.ManyToManyField(
+        Symbol,
+        related_name="watchlists",
+        blank=True,
+        db_table="watchlist_symbol"
+    )
+
+    def __str__(self) -> str:
+        """
+        Return the string representation of the watchlist, which is its name.
+        """
+        return self.name
+
+    class Meta:
+        verbose_name = 'Watchlist'
+        verbose_name_plural = 'Watchlists'
+        db_table = 'watchlist'
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=("user", "name"),
+                name="unique_user_watchlist_name"
+            )
+        ]
@@ -0,0 +1,192 @@
+import numpy as np
+from decimal import Decimal
+from typing import Dict, List, Set, Tuple
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_holdings_versions
+from .journal import realized_pnl, record_trades
+from .models import Order, Trade, UserStock
+
+# Number of symbols, or order ids, per query, well below the bound parameter limit of every backend
+MATCH_CHUNK_SIZE = 500
+
+
+def triggers_on_fall(order: Order) -> bool:
+    """
+    Whether an order is triggered by the price falling to its trigger price
+    (buy limit, sell stop) rather than rising to it (sell limit, buy stop).
+    """
+    return (order.side == Trade.BUY) == (order.order_type == Order.LIMIT)
+
+
+def first_crossings(ticks: np.ndarray, triggers: np.ndarray, falling: bool) -> np.ndarray:
+    """
+    Find, for every trigger price, the first tick reaching it.
+
+    The running minimum (or maximum) of the ticks is monotonic, so every
+    trigger is located with one binary search over it.
+
+    Args:
+        ticks (np.ndarray): Prices of one stock, in ingest order.
+        triggers (np.ndarray): Trigger prices.
+        falling (bool): Whether the triggers are reached by falling prices.
+
+    Returns:
+        np.ndarray: Index of the first crossing tick per trigger, `len(ticks)` if none.
+    """
+    if falling:
+        running_min = np.minimum.accumulate(ticks)
+        return np.searchsorted(-running_min, -triggers, side="left")
+    running_max = np.maximum.accumulate(ticks)
+    return np.searchsorted(running_max, triggers, side="left")
+
+
+def _candidate_order_ids(ticks: Dict[int, np.ndarray]) -> List[int]:
+    """
+    Find the open orders the new prices can trigger, from the lowest and
+    highest price of every stock.
+
+    The open orders of the ingested stocks are read through the order book
+    index in chunks of `MATCH_CHUNK_SIZE` symbols, so the query stays the same
+    size however many stocks are ingested, and each chunk is filtered against
+    the price range of its stocks in one vectorized pass.
+    """
+    lows = {symbol_id: prices.min() for symbol_id, prices in ticks.items()}
+    highs = {symbol_id: prices.max() for symbol_id, prices in ticks.items()}
+    symbol_ids = sorted(ticks)
+    candidates: List[int] = []
+    for start in range(0, len(symbol_ids), MATCH_CHUNK_SIZE):
+        rows = list(Order.objects.filter(
+            status=Order.OPEN, symbol_id__in=symbol_ids[start:start + MATCH_CHUNK_SIZE]
+        ).order_by().values_list("id", "symbol_id", "side", "order_type", "trigger_price"))
+        if not rows:
+            continue
+        ids, order_symbols, sides, order_types, trigger_prices = zip(*rows)
+        falling = (np.array(sides) == Trade.BUY) == (np.array(order_types) == Order.LIMIT)
+        triggers = np.array([float(price) for price in trigger_prices], dtype=np.float64)
+        low = np.array([lows[symbol_id] for symbol_id in order_symbols], dtype=np.float64)
+        high = np.array([highs[symbol_id] for symbol_id in order_symbols], dtype=np.float64)
+        reachable = np.where(falling, triggers >= low, triggers <= high)
+        candidates.extend(np.array(ids)[reachable].tolist())
+    return candidates
+
+
+def _triggered(orders: List[Order], ticks: Dict[int, np.ndarray]) -> List[Tuple[Order, Decimal]]:
+    """
+    Match orders sorted by stock and trigger price against the new prices.
+
+    Returns:
+        List[Tuple[Order, Decimal]]: The triggered orders with their fill
+        price, in the order their triggering ticks arrived per stock.
+    """
+    triggered: List[Tuple[int, int, Order, Decimal]] = []
+    for symbol_id in {order.symbol_id for order in orders}:
+        book = [order for order in orders if order.symbol_id == symbol_id]
+        prices = ticks[symbol_id]
+        for falling in (True, False):
+            side = [order for order in book if triggers_on_fall(order) == falling]
+            if not side:
+                continue
+            triggers = np.array([float(order.trigger_price) for order in side], dtype=np.float64)
+            crossings = first_crossings(prices, triggers, falling)
+            triggered.extend(
+                (int(index), order.id, order, Decimal(f"{prices[index]:.6f}"))
+                for order, index in zip(side, crossings) if index < len(prices)
+            )
+    triggered.sort(key=lambda item: (item[2].symbol_id, item[0], item[1]))
+    return [(order, price) for _, _, order, price in triggered]
+
+
+def match_orders(ticks: Dict[int, np.ndarray]) -> int:
+    """
+    Fill the open orders triggered by newly ingested prices.
+
+    The open orders of the ingested stocks are screened against the range of
+    the new prices on a few columns, and only the orders within range are
+    locked and loaded in full.
+    Each stock's book is matched against its ticks in one vectorized pass, and
+    the fills are applied with bulk writes in a single transaction. Sells
+    exceeding the holding at execution time are rejected.
+
+    Args:
+        ticks (Dict[int, np.ndarray]): New prices per symbol id, in ingest order.
+
+    Returns:
+        int: Number of filled orders.
+    """
+    if not ticks:
+        return 0
+    candidate_ids = _candidate_order_ids(ticks)
+    if not candidate_ids:
+        return 0
+
+    with transaction.atomic():
+        # Lock the candidates, skipping those filled or cancelled since they were read
+        orders: List[Order] = []
+        for start in range(0, len(candidate_ids), MATCH_CHUNK_SIZE):
+            orders.extend(Order.objects.select_for_update().filter(
+                id__in=candidate_ids[start:start + MATCH_CHUNK_SIZE], status=Order.OPEN))
+        orders.sort(key=lambda order: (order.symbol_id, order.trigger_price, order.id))
+        executions = _triggered(orders, ticks)
+        if not executions:
+            return 0
+
+        holdings: Dict[Tuple[int, int], UserStock] = {
+            (holding.user_id, holding.symbol_id): holding
+            for holding in UserStock.objects.select_for_update().filter(
+                user_id__in={order.user_id for order, _ in executions},
+                symbol_id__in={order.symbol_id for order, _ in executions}
+            )
+        }
+
+        now = timezone.now()
+        trades: List[Trade] = []
+        touched: Set[Tuple[int, int]] = set()
+        for order, price in executions:
+            key = (order.user_id, order.symbol_id)
+            holding = holdings.get(key)
+            trade = Trade(user_id=order.user_id, symbol_id=order.symbol_id, side=order.side,
+                          quantity=order.quantity, price=price, created_at=now)
+
+            if order.side == Trade.BUY:
+                if holding is None:
+                    holding = holdings[key] = UserStock(
+                        user_id=order.user_id, symbol_id=order.symbol_id,
+                        quantity=0, invested_amount=Decimal(0))
+                holding.quantity += order.quantity
+                holding.invested_amount = Decimal(holding.invested_amount) + price * order.quantity
+            else:
+                if holding is None or holding.quantity < order.quantity:
+                    order.status, order.modified_at = Order.REJECTED, now
+                    continue
+                trade.realized_pnl = realized_pnl(
+                    holding.quantity, holding.invested_amount, order.quantity, price)
+                average_price = Decimal(holding.invested_amount) / holding.quantity
+                holding.quantity -= order.quantity
+                holding.invested_amount = Decimal(holding.invested_amount) - average_price * order.quantity
+
+            holding.modified_at = now
+            touched.add(key)
+            order.status, order.filled_price, order.filled_at, order.modified_at = Order.FILLED, price, now, now
+            trades.append(trade)
+
+        emptied = [holdings[key].pk for key in touched
+                   if holdings[key].quantity <= 0 and holdings[key].pk is not None]
+        created = [holdings[key] for key in touched
+                   if holdings[key].quantity > 0 and holdings[key].pk is None]
+        updated = [holdings[key] for key in touched
+                   if holdings[key].quantity > 0 and holdings[key].pk is not None]
+
+        UserStock.objects.filter(pk__in=emptied).delete()
+        UserStock.objects.bulk_create(created, batch_size=1000)
+        UserStock.objects.bulk_update(
+            updated, ["quantity", "invested_amount", "modified_at"], batch_size=1000)
+        Order.objects.bulk_update(
+            [order for order, _ in executions],
+            ["status", "filled_price", "filled_at", "modified_at"], batch_size=1000)
+        record_trades(trades)
+        # Invalidate the cached portfolios of the traders once the fills are committed
+        user_ids = {user_id for user_id, _ in touched}
+        transaction.on_commit(lambda: bump_holdings_versions(user_ids))
+    return len(trades)
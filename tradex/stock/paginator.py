@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, QuerySet
+from django.utils.functional import cached_property
+from typing import Optional
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables that never runs an exact `COUNT(*)` over
+    the whole table.
+
+    Unfiltered querysets are counted from the database statistics (or the
+    highest primary key where no statistics are available), and filtered
+    querysets are counted up to `ADMIN_PAGINATOR_COUNT_LIMIT` rows only.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        """
+        Return the estimated total number of objects.
+        """
+        queryset: QuerySet = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimate_table_rows(queryset)
+            if estimate is not None:
+                return estimate
+        return queryset.order_by().values("pk")[:settings.ADMIN_PAGINATOR_COUNT_LIMIT].count()
+
+    def _estimate_table_rows(self, queryset: QuerySet) -> Optional[int]:
+        """
+        Estimate the number of rows of the queryset's table in constant time.
+
+        Args:
+            queryset (QuerySet): An unfiltered queryset.
+
+        Returns:
+            Optional[int]: The estimate, or None if the table is empty or has never been analyzed.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 until the table is vacuumed or analyzed
+            return int(row[0]) if row and row[0] >= 0 else None
+
+        # Primary keys are ascending, so the highest one bounds the row count
+        # and is read straight from the primary key index
+        return queryset.order_by().aggregate(highest=Max("pk"))["highest"]
@@ -0,0 +1,298 @@
+import os
+import time
+import numpy as np
+from datetime import datetime
+from decimal import Decimal
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.db.models import DecimalField, OuterRef, QuerySet, Subquery
+
+from .archive import from_epoch_us, to_epoch_us
+from .cache import get_ingest_version
+from .models import PriceTick, Symbol
+
+SNAPSHOT_MAGIC = b"TRDXLP02"
+# File layout: one header record followed by `count` price records sorted by name
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u8"), ("count", "<u8")])
+RECORD_DTYPE = np.dtype([("name", "S10"), ("price", "<f8"), ("id", "<i8"), ("created_at", "<i8")])
+
+
+def latest_tick_annotations(
+    symbol: OuterRef,
+    at: Optional[datetime] = None,
+    sources: Optional[Iterable[str]] = None
+) -> Dict[str, Subquery]:
+    """
+    Build the annotations read by `StockSerializer`: the price, timestamp and
+    id of the latest tick of a symbol, each looked up through the
+    (symbol, created_at) index.
+
+    Args:
+        symbol (OuterRef): Reference to the symbol id in the outer query.
+        at (Optional[datetime]): Only consider ticks at or before this time, if given.
+        sources (Optional[Iterable[str]]): Only build the annotations among these
+            attribute names, if given; the id is always built.
+
+    Returns:
+        Dict[str, Subquery]: The `latest_price`, `latest_created_at` and `latest_tick_id` annotations.
+    """
+    latest_tick = PriceTick.objects.filter(symbol=symbol).order_by("-created_at", "-id")
+    if at is not None:
+        latest_tick = latest_tick.filter(created_at__lte=at)
+    annotations = {
+        "latest_price": Subquery(
+            latest_tick.values("price")[:1],
+            output_field=DecimalField(max_digits=12, decimal_places=6)
+        ),
+        "latest_created_at": Subquery(latest_tick.values("created_at")[:1]),
+        "latest_tick_id": Subquery(latest_tick.values("id")[:1]),
+    }
+    if sources is not None:
+        # Every annotation is a subquery per row, skip the ones nobody reads
+        sources = set(sources) | {"latest_tick_id"}
+        annotations = {name: value for name, value in annotations.items() if name in sources}
+    return annotations
+
+
+def latest_ticks(
+    symbols: QuerySet,
+    at: Optional[datetime] = None,
+    sources: Optional[Iterable[str]] = None
+) -> QuerySet:
+    """
+    Annotate symbols with their latest tick, the newest by `(created_at, id)`,
+    leaving out the symbols without one. Every reader of "the latest price"
+    goes through this ordering, so back-dated ticks never become the latest.
+
+    Args:
+        symbols (QuerySet): The symbols.
+        at (Optional[datetime]): Only consider ticks at or before this time, if given.
+        sources (Optional[Iterable[str]]): Only build these `latest_*` annotations, if given.
+
+    Returns:
+        QuerySet: The symbols with a tick, annotated as by `latest_tick_annotations`.
+    """
+    return symbols.annotate(
+        **latest_tick_annotations(OuterRef("pk"), at, sources)
+    ).filter(latest_tick_id__isnull=False)
+
+
+class LatestPrices:
+    """
+    Read-only view over a published latest price snapshot.
+
+    The records are a memory map of the snapshot file: every process maps the
+    same pages and lookups only slice them, without copying or locking.
+    """
+
+    def __init__(self, records: np.ndarray, version: int):
+        self.records = records
+        self.version = version
+
+    def lookup(self, name: str) -> Optional[np.void]:
+        """
+        Find the latest price record of a stock by binary search.
+
+        Args:
+            name (str): Stock name.
+
+        Returns:
+            Optional[np.void]: The record, or None if the stock is not in the snapshot.
+        """
+        key = name.encode()
+        index = int(np.searchsorted(self.records["name"], key))
+        if index < len(self.records) and self.records["name"][index] == key:
+            return self.records[index]
+        return None
+
+    def latest_tick(self, name: str) -> Optional[PriceTick]:
+        """
+        Build an unsaved `PriceTick` instance carrying the id, price and
+        timestamp of the latest tick of a stock.
+
+        Args:
+            name (str): Stock name.
+
+        Returns:
+            Optional[PriceTick]: The tick, or None if the stock is not in the snapshot.
+        """
+        record = self.lookup(name)
+        if record is None:
+            return None
+        return PriceTick(
+            id=int(record["id"]),
+            price=Decimal(f"{float(record['price']):.6f}"),
+            created_at=from_epoch_us(int(record["created_at"]))
+        )
+
+    def prices(self, names: Iterable[str]) -> Optional[Dict[str, Decimal]]:
+        """
+        Get the latest price of several stocks.
+
+        Args:
+            names (Iterable[str]): Stock names.
+
+        Returns:
+            Optional[Dict[str, Decimal]]: Price per stock name, or None if any
+            stock is missing from the snapshot.
+        """
+        result: Dict[str, Decimal] = {}
+        for name in names:
+            record = self.lookup(name)
+            if record is None:
+                return None
+            result[name] = Decimal(f"{float(record['price']):.6f}")
+        return result
+
+    def search(self, term: Optional[str]) -> np.ndarray:
+        """
+        Get the records whose name contains a term, case-insensitively, newest
+        price row first (the order of the stocks endpoint).
+
+        Args:
+            term (Optional[str]): The search term, or None for every record.
+
+        Returns:
+            np.ndarray: The matching records.
+        """
+        records = self.records
+        if term:
+            names = np.char.lower(records["name"].astype(str))
+            records = records[np.char.find(names, term.lower()) >= 0]
+        return records[np.argsort(-records["id"], kind="stable")]
+
+
+class LatestPriceSnapshot:
+    """
+    Publisher and per-process reader of the latest price snapshot file.
+
+    The ingest pipeline writes a new file next to the current one and renames
+    it into place, so readers never see a partial file and never need a lock:
+    a reader keeps using its old mapping until it notices the new file. The
+    header carries the ingest version the snapshot was published for, and a
+    snapshot of another version, such as one left behind by a failed publish,
+    is treated as stale so callers fall back to the database. Every ingest run
+    also touches a current file, and a snapshot older than
+    `LATEST_PRICE_SNAPSHOT_MAX_AGE` seconds is stale as well.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = str(path or settings.LATEST_PRICE_SNAPSHOT_PATH)
+        self._lock = Lock()
+        self._identity: Optional[Tuple[int, int]] = None
+        self._prices: Optional[LatestPrices] = None
+
+    def _map(self) -> Optional[LatestPrices]:
+        """
+        Memory-map the snapshot file currently in place.
+        """
+        header = np.fromfile(self._path, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header["magic"][0] != SNAPSHOT_MAGIC:
+            return None
+        count = int(header["count"][0])
+        if count == 0:
+            records = np.empty(0, dtype=RECORD_DTYPE)
+        else:
+            records = np.memmap(self._path, dtype=RECORD_DTYPE, mode="r",
+                                offset=HEADER_DTYPE.itemsize, shape=(count,))
+        return LatestPrices(records, int(header["version"][0]))
+
+    def get(self) -> Optional[LatestPrices]:
+        """
+        Get the current snapshot, remapping it if a new one was published.
+
+        Returns:
+            Optional[LatestPrices]: The snapshot, or None if it is missing, stale
+                or published for another ingest version.
+        """
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        if time.time() - stat.st_mtime > settings.LATEST_PRICE_SNAPSHOT_MAX_AGE:
+            return None
+
+        identity = (stat.st_ino, stat.st_size)
+        if identity != self._identity:
+            with self._lock:
+                if identity != self._identity:
+                    self._prices = self._map()
+                    self._identity = identity
+        prices = self._prices
+        if prices is None or prices.version != get_ingest_version():
+            return None
+        return prices
+
+    def touch(self) -> None:
+        """
+        Mark the published snapshot as still current after an ingest run that
+        found no new files. A snapshot of an older ingest version is left to
+        expire.
+        """
+        try:
+            current = self._map()
+            if current is not None and current.version == get_ingest_version():
+                os.utime(self._path)
+        except FileNotFoundError:
+            pass
+
+    def publish(self, ticks: List[PriceTick], version: int) -> None:
+        """
+        Publish the latest prices after an ingest.
+
+        The new ticks are merged with the current snapshot, keeping the newest
+        tick of every stock by `(created_at, id)`, so a back-dated tick never
+        replaces a newer price. Without a current snapshot, or when the
+        inserted ticks carry no primary keys, the latest ticks are read from
+        the database.
+
+        Args:
+            ticks (List[PriceTick]): The ticks inserted by the ingest, with their symbols.
+            version (int): The ingest version of the snapshot.
+        """
+        current = self._map() if os.path.exists(self._path) else None
+        if current is None or any(tick.pk is None for tick in ticks):
+            rows = latest_ticks(Symbol.objects.all()).values_list(
+                "name", "latest_price", "latest_tick_id", "latest_created_at")
+            existing = np.empty(0, dtype=RECORD_DTYPE)
+        else:
+            rows = ((tick.symbol.name, tick.price, tick.pk, tick.created_at) for tick in ticks)
+            existing = np.array(current.records)
+
+        new = np.array(
+            [(name, float(price), pk, to_epoch_us(created_at)) for name, price, pk, created_at in rows],
+            dtype=RECORD_DTYPE
+        )
+        merged = np.concatenate([existing, new])
+        # Sort by name, then timestamp and id, and keep the last (newest) row of every name
+        merged = merged[np.lexsort((merged["id"], merged["created_at"], merged["name"]))]
+        is_last = np.append(merged["name"][1:] != merged["name"][:-1], True) if len(merged) else np.empty(0, bool)
+        merged = merged[is_last]
+
+        header = np.array([(SNAPSHOT_MAGIC, version, len(merged))], dtype=HEADER_DTYPE)
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(merged.tobytes())
+        os.replace(tmp_path, self._path)
+
+
+# Per-process reader shared by every request handled by the process
+latest_price_snapshot = LatestPriceSnapshot()
+
+
+def get_latest_prices() -> Optional[LatestPrices]:
+    """
+    Get the current latest price snapshot of this process, if it is fresh.
+
+    Returns:
+        Optional[LatestPrices]: The snapshot, or None if callers must use the database.
+    """
+    if not settings.LATEST_PRICE_SNAPSHOT_ENABLED:
+        return None
+    try:
+        return latest_price_snapshot.get()
+    except (OSError, ValueError):
+        return None
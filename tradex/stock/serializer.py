@@ -4,27 +4,96 @@ from rest_framework.serializers import (
     Serializer,
     IntegerField,
     CharField,
+    DateTimeField,
+    ListField,
+    SlugRelatedField,
     ValidationError
 )
-from .models import UserStock, Stock
+from django.conf import settings
+from django.db import transaction
+from .cache import bump_holdings_versions
+from .journal import realized_pnl, record_trades
+from .models import MarketSnapshot, Order, PriceTick, Symbol, UserStock, Trade, Watchlist
+from .price_snapshot import get_latest_prices
 from decimal import Decimal
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set
 
 
-class StockSerializer(ModelSerializer):
+class SparseFieldsMixin:
     """
-    Serializer for the Stock model, including fields: name, price, created_at, and id.
+    Serializer mixin limiting the output to the fields named in a `fields`
+    argument. Fields of a nested serializer are named with a dot, e.g. `stock.price`.
     """
-    class Meta:
-        model = Stock
-        fields = ["name", "price", "created_at", "id"]
 
+    def __init__(self, *args: Any, fields: Optional[List[str]] = None, **kwargs: Any) -> None:
+        """
+        Initialize the serializer, dropping the fields that were not requested.
+
+        :param args: Positional arguments of the serializer.
+        :param fields: The requested fields, or None for every field.
+        :param kwargs: Additional keyword arguments.
+        :raises ValueError: If a requested field does not exist.
+        """
+        super().__init__(*args, **kwargs)
+        if fields:
+            self.prune_fields(fields)
+
+    def prune_fields(self, fields: List[str]) -> None:
+        """
+        Drop the fields that were not requested, recursing into nested serializers.
+
+        :param fields: The requested fields.
+        :raises ValueError: If a requested field does not exist.
+        """
+        requested: Dict[str, List[str]] = {}
+        for field in fields:
+            name, _, nested = field.partition(".")
+            requested.setdefault(name, [])
+            if nested:
+                requested[name].append(nested)
+
+        unknown = [name for name, nested in requested.items() if name not in self.fields or (
+            nested and not isinstance(self.fields[name], SparseFieldsMixin))]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        for name in list(self.fields):
+            if name not in requested:
+                self.fields.pop(name)
+            elif requested[name]:
+                self.fields[name].prune_fields(requested[name])
+
+    def sources(self) -> Set[str]:
+        """
+        Get the attributes read by the remaining fields, so the views only fetch those.
+
+        :return: The attribute names, including those read by nested serializers of the same object.
+        """
+        result: Set[str] = set()
+        for field in self.fields.values():
+            if isinstance(field, SparseFieldsMixin) and field.source == "*":
+                result |= field.sources()
+            else:
+                result.add(field.source)
+        return result
 
-class UserStockSerializer(ModelSerializer):
+
+class StockSerializer(SparseFieldsMixin, Serializer):
+    """
+    Serializer for the latest tick of a stock, including fields: name, price, created_at, and id.
+    Reads the `name` and `latest_*` attributes annotated by the views.
     """
-    Serializer for the UserStock model, including related Stock details and latest_price.
+    name = CharField()
+    price = DecimalField(max_digits=12, decimal_places=6, source="latest_price")
+    created_at = DateTimeField(source="latest_created_at")
+    id = IntegerField(source="latest_tick_id")
+
+
+class UserStockSerializer(SparseFieldsMixin, ModelSerializer):
     """
-    stock = StockSerializer()
+    Serializer for the UserStock model, including the latest tick of its stock and latest_price.
+    """
+    stock = StockSerializer(source="*")
     latest_price = DecimalField(max_digits=12, decimal_places=6)
 
     class Meta:
@@ -34,13 +103,91 @@ class UserStockSerializer(ModelSerializer):
 
 class StockDetailsSerializer(ModelSerializer):
     """
-    Serializer for detailed Stock information, including price and created_at.
+    Serializer for the price history of a stock, including price and created_at.
     """
     class Meta:
-        model = Stock
+        model = PriceTick
         fields = ["price", "created_at"]
 
 
+class MarketSnapshotSerializer(ModelSerializer):
+    """
+    Serializer for the market summary, including the movers lists and counters
+    but not the full quote map.
+    """
+    class Meta:
+        model = MarketSnapshot
+        fields = ["gainers", "losers", "most_active", "symbols", "updated",
+                  "advancers", "decliners", "unchanged", "listed", "modified_at"]
+
+
+class TradeSerializer(ModelSerializer):
+    """
+    Serializer for the Trade model, including fields: name, side, quantity, price, realized_pnl, created_at and id.
+    """
+    name = CharField(source="symbol.name", read_only=True)
+
+    class Meta:
+        model = Trade
+        fields = ["name", "side", "quantity", "price", "realized_pnl", "created_at", "id"]
+
+
+class OrderSerializer(ModelSerializer):
+    """
+    Serializer for placing and listing limit and stop orders.
+    """
+    # Orders refer to the symbol, clients name the stock
+    name = SlugRelatedField(
+        source="symbol", slug_field="name", queryset=Symbol.objects.all(),
+        error_messages={"does_not_exist": "Stock does not exist."})
+
+    class Meta:
+        model = Order
+        fields = ["name", "side", "order_type", "quantity", "trigger_price", "status",
+                  "filled_price", "filled_at", "created_at", "id"]
+        read_only_fields = ["status", "filled_price", "filled_at", "created_at", "id"]
+
+    def validate_quantity(self, value: int) -> int:
+        """
+        Validate the quantity field.
+
+        :param value: The quantity value to validate.
+        :raises ValidationError: If the quantity is invalid.
+        :return: The validated quantity.
+        """
+        if value <= 0:
+            raise ValidationError("Quantity cannot be less than 1.")
+        return value
+
+    def validate_trigger_price(self, value: Decimal) -> Decimal:
+        """
+        Validate the trigger price field.
+
+        :param value: The trigger price to validate.
+        :raises ValidationError: If the trigger price is not positive.
+        :return: The validated trigger price.
+        """
+        if value <= 0:
+            raise ValidationError("Trigger price must be positive.")
+        return value
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate that a sell order does not exceed the current holding. The
+        holding is checked again when the order is filled.
+
+        :param attrs: The validated fields.
+        :raises ValidationError: If the user holds less than the quantity to sell.
+        :return: The validated fields.
+        """
+        if attrs["side"] == Trade.SELL:
+            holding = UserStock.objects.filter(
+                user=self.context["user"], symbol=attrs["symbol"]).only("quantity").first()
+            if holding is None or holding.quantity < attrs["quantity"]:
+                raise ValidationError({"quantity": "Cannot sell more than you own."})
+        return attrs
+
+
 class ModifyUserStockSerializer(Serializer):
     """
     Serializer for modifying UserStock instances, including validation and saving logic.
@@ -52,17 +199,21 @@ class ModifyUserStockSerializer(Serializer):
         """
         Initialize the serializer, setting the mode and fetching the latest stock price.
 
-        :param instance: The instance to update (if any).
+        :param instance: The instance to update (if any), with its symbol.
         :param data: The data to validate and use for the update.
         :param kwargs: Additional keyword arguments.
         """
         self.mode: Optional[str] = kwargs.pop("mode", None)
-        if instance and instance.stock:
-            self.latest_stock: Optional[Stock] = Stock.objects.filter(
-                name=instance.stock.name
-            ).order_by("-created_at").only("price").first()
-        else:
-            self.latest_stock = None
+        self.latest_tick: Optional[PriceTick] = None
+        if instance and instance.symbol:
+            # Prefer the shared latest price snapshot, the database is the fallback
+            latest_prices = get_latest_prices()
+            if latest_prices is not None:
+                self.latest_tick = latest_prices.latest_tick(instance.symbol.name)
+            if self.latest_tick is None:
+                self.latest_tick = PriceTick.objects.filter(
+                    symbol=instance.symbol
+                ).order_by("-created_at", "-id").only("price").first()
         super().__init__(instance, data, **kwargs)
 
     def validate_quantity(self, value: int) -> int:
@@ -85,28 +236,192 @@ class ModifyUserStockSerializer(Serializer):
         """
         Save the UserStock instance with updated values based on the mode.
 
+        The holding is read again under a row lock, so an order filled since
+        the instance was loaded is neither overwritten nor oversold.
+
         :param kwargs: Additional keyword arguments.
+        :raises ValidationError: If no price is known, or the locked holding
+            is smaller than the quantity to sell.
         :return: The updated UserStock instance.
         """
-        if self.latest_stock is None:
+        if self.latest_tick is None:
             raise ValidationError("Latest stock information is not available.")
 
-        self.instance.stock = self.latest_stock
         quantity_to_update: int = int(self.validated_data["quantity"])
+        trade = Trade(
+            user=self.instance.user,
+            symbol=self.instance.symbol,
+            side=self.mode,
+            quantity=quantity_to_update,
+            price=self.latest_tick.price
+        )
+
+        # The holding and its journal entry are written together or not at all
+        with transaction.atomic():
+            holding = UserStock.objects.select_for_update().filter(
+                user_id=self.instance.user_id, symbol_id=self.instance.symbol_id).first()
+            if holding is None:
+                if self.mode == "sell":
+                    raise ValidationError({"quantity": "Cannot sell more than you own."})
+                # A buy of a stock not held yet
+                holding = self.instance
+            holding.symbol = self.instance.symbol
+            self.instance = holding
+
+            # Invalidate the cached portfolio once the trade is committed
+            user_id = holding.user_id
+            transaction.on_commit(lambda: bump_holdings_versions([user_id]))
+            if self.mode == "sell":
+                if holding.quantity < quantity_to_update:
+                    raise ValidationError({"quantity": "Cannot sell more than you own."})
+                trade.realized_pnl = realized_pnl(
+                    holding.quantity, holding.invested_amount,
+                    quantity_to_update, self.latest_tick.price)
+                average_stock_price: float = float(
+                    holding.invested_amount / holding.quantity)
+                holding.quantity -= quantity_to_update
+                if holding.quantity <= 0:
+                    holding.delete()
+                    record_trades([trade])
+                    return holding
+                holding.invested_amount -= Decimal(
+                    average_stock_price * quantity_to_update)
+            elif self.mode == "buy":
+                holding.quantity += quantity_to_update
+                holding.invested_amount += Decimal(
+                    self.latest_tick.price * quantity_to_update)
+
+            holding.save()
+            record_trades([trade])
+        return holding
+
+
+class SymbolNamesField(ListField):
+    """
+    List of stock names, read from a many-to-many relation to `Symbol`.
+    """
+    child = CharField(max_length=10)
+
+    def to_representation(self, data: Any) -> List[str]:
+        """
+        Represent the related symbols by their names.
+
+        :param data: The related manager of the symbols.
+        :return: The stock names.
+        """
+        return [symbol.name for symbol in data.all()]
+
+
+def get_symbols(names: List[str]) -> List[Symbol]:
+    """
+    Resolve stock names to their symbols in a single query.
+
+    :param names: The stock names.
+    :raises ValidationError: If any of the stocks does not exist.
+    :return: The symbols, without duplicates.
+    """
+    names = list(dict.fromkeys(names))
+    symbols = list(Symbol.objects.filter(name__in=names))
+    missing = set(names) - {symbol.name for symbol in symbols}
+    if missing:
+        raise ValidationError(f"Stock does not exist: {', '.join(sorted(missing))}.")
+    return symbols
+
+
+class WatchlistSerializer(ModelSerializer):
+    """
+    Serializer for creating and listing watchlists, including fields: name, symbols, created_at and id.
+    """
+    symbols = SymbolNamesField(required=False, max_length=settings.WATCHLIST_MAX_SYMBOLS)
+
+    class Meta:
+        model = Watchlist
+        fields = ["name", "symbols", "created_at", "id"]
+        read_only_fields = ["created_at", "id"]
+
+    def validate_name(self, value: str) -> str:
+        """
+        Validate that the user has no other watchlist with this name.
+
+        :param value: The watchlist name to validate.
+        :raises ValidationError: If the name is already used.
+        :return: The validated name.
+        """
+        if Watchlist.objects.filter(user=self.context["user"], name=value).exists():
+            raise ValidationError("Watchlist already exists.")
+        return value
+
+    def validate_symbols(self, value: List[str]) -> List[Symbol]:
+        """
+        Validate that every watched stock exists.
+
+        :param value: The stock names to validate.
+        :raises ValidationError: If any of the stocks does not exist.
+        :return: The symbols of the stocks.
+        """
+        return get_symbols(value)
+
+    def create(self, validated_data: Dict[str, Any]) -> Watchlist:
+        """
+        Create the watchlist with its stocks.
+
+        :param validated_data: The validated fields.
+        :return: The created watchlist.
+        """
+        symbols = validated_data.pop("symbols", [])
+        with transaction.atomic():
+            watchlist = Watchlist.objects.create(**validated_data)
+            watchlist.symbols.set(symbols)
+        return watchlist
+
+
+class ModifyWatchlistSerializer(Serializer):
+    """
+    Serializer for adding stocks to or removing stocks from a watchlist.
+    """
+    symbols = SymbolNamesField(allow_empty=False, max_length=settings.WATCHLIST_MAX_SYMBOLS)
+
+    def __init__(self, instance: Optional[Watchlist] = None, data: Any = ..., **kwargs: Any) -> None:
+        """
+        Initialize the serializer, setting the mode.
+
+        :param instance: The watchlist to modify.
+        :param data: The stock names to add or remove.
+        :param kwargs: Additional keyword arguments.
+        """
+        self.mode: Optional[str] = kwargs.pop("mode", None)
+        super().__init__(instance, data, **kwargs)
+
+    def validate_symbols(self, value: List[str]) -> List[Symbol]:
+        """
+        Validate that every stock exists and that the watchlist stays within
+        `WATCHLIST_MAX_SYMBOLS` stocks.
+
+        :param value: The stock names to validate.
+        :raises ValidationError: If a stock does not exist or the watchlist would be too long.
+        :return: The symbols of the stocks.
+        """
+        symbols = get_symbols(value)
+        if self.mode == "add":
+            watched = set(self.instance.symbols.values_list("id", flat=True))
+            if len(watched | {symbol.id for symbol in symbols}) > settings.WATCHLIST_MAX_SYMBOLS:
+                raise ValidationError(
+                    f"A watchlist cannot have more than {settings.WATCHLIST_MAX_SYMBOLS} stocks.")
+        return symbols
 
-        if self.mode == "sell":
-            average_stock_price: float = float(
-                self.instance.invested_amount / self.instance.quantity)
-            self.instance.quantity -= quantity_to_update
-            if self.instance.quantity <= 0:
-                self.instance.delete()
-                return self.instance
-            self.instance.invested_amount -= Decimal(
-                average_stock_price * quantity_to_update)
-        elif self.mode == "buy":
-            self.instance.quantity += quantity_to_update
-            self.instance.invested_amount += Decimal(
-                self.latest_stock.price * quantity_to_update)
-
-        self.instance.save()
+    def save(self, **kwargs: Any) -> Watchlist:
+        """
+        Add or remove the stocks based on the mode.
+
+        :param kwargs: Additional keyword arguments.
+        :return: The modified watchlist.
+        """
+        symbols = self.validated_data["symbols"]
+        with transaction.atomic():
+            if self.mode == "add":
+                self.instance.symbols.add(*symbols)
+            elif self.mode == "remove":
+                self.instance.symbols.remove(*symbols)
+            # A new modification time invalidates the cached quotes
+            self.instance.save(update_fields=["modified_at"])
         return self.instance
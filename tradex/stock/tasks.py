@@ -1,5 +1,12 @@
-from celery import shared_task
-from .utils import StockDataParser
+from celery import Task, shared_task
+from datetime import timedelta
+from typing import Any, Dict
+from django.conf import settings
+from django.utils import timezone
+from tradex.db_router import pin_to_primary
+from .archive import PriceArchive
+from .journal import take_snapshots
+from .utils import CSV_FORMAT
 
 @shared_task
 def update_stocks() -> None:
@@ -9,8 +16,111 @@ def update_stocks() -> None:
     This task creates an instance of `StockDataParser` and calls its `parse_files` method
     to process stock data files. The task does not return any value and is executed asynchronously.
     """
+    # The ingest stack pulls in pandas, import it only when a worker runs the task
+    from .ingest import StockDataParser
+
     # Create an instance of StockDataParser
     parser = StockDataParser()
-    
-    # Call the parse_files method to process stock data
-    parser.parse_files()
+
+    # Call the parse_files method to process stock data, reading the audit
+    # records from the primary so lagging replicas never cause a re-ingest
+    with pin_to_primary():
+        parser.parse_files()
+
+
+@shared_task
+def archive_stock_history() -> int:
+    """
+    Celery task to move price history older than `STOCK_ARCHIVE_AFTER_DAYS` into
+    the columnar price archive.
+
+    Only whole months are archived, so the task is cheap when run more often
+    than monthly. It does nothing unless `STOCK_ARCHIVE_ENABLED` is set.
+
+    Returns:
+        int: Number of prices archived.
+    """
+    if not settings.STOCK_ARCHIVE_ENABLED:
+        return 0
+
+    cutoff = timezone.now() - timedelta(days=settings.STOCK_ARCHIVE_AFTER_DAYS)
+    with pin_to_primary():
+        return PriceArchive().archive_history(cutoff)
+
+
+@shared_task
+def snapshot_holdings() -> int:
+    """
+    Celery task snapshotting the holdings of every user who traded since
+    their last snapshot, bounding the replay needed to rebuild past holdings.
+
+    Returns:
+        int: Number of snapshots taken.
+    """
+    with pin_to_primary():
+        return take_snapshots()
+
+
+@shared_task(bind=True)
+def generate_stock_data(
+    self: Task,
+    n: int = 10,
+    min_price: float = 20.0,
+    max_price: float = 100.0,
+    use_existing_names: bool = False,
+    file_format: str = CSV_FORMAT
+) -> Dict[str, Any]:
+    """
+    Celery task generating a random stock data file in the background.
+
+    Progress is published as a `PROGRESS` state with `done` and `total` counts,
+    which `django_celery_results` stores on the task result.
+
+    Args:
+        n (int): Number of stocks to generate when not using existing names.
+        min_price (float): Minimum stock price.
+        max_price (float): Maximum stock price.
+        use_existing_names (bool): Whether to use the existing stock names.
+        file_format (str): One of 'csv', 'parquet', 'arrow' or 'feather'.
+
+    Returns:
+        Dict[str, Any]: The generated file name.
+    """
+    def report_progress(done: int, total: int) -> None:
+        self.update_state(state="PROGRESS", meta={"done": done, "total": total})
+
+    from .ingest import StockDataGenerator
+
+    generator = StockDataGenerator()
+    with pin_to_primary():
+        file_name = generator.generate_random_stocks(
+            n=n,
+            min_price=min_price,
+            max_price=max_price,
+            use_existing_names=use_existing_names,
+            file_format=file_format,
+            progress_callback=report_progress
+        )
+    return {"file_name": file_name}
+
+
+@shared_task
+def export_data(export_id: int) -> Dict[str, Any]:
+    """
+    Celery task writing the file of a `DataExport` to `DATA_EXPORT_DIR`.
+
+    Args:
+        export_id (int): The id of the export to run.
+
+    Returns:
+        Dict[str, Any]: The status, file name and number of rows of the export.
+    """
+    from .export import run_export
+    from .models import DataExport
+
+    # The export was just created, read it from the primary; the export
+    # queries themselves may run on a replica
+    with pin_to_primary():
+        export = DataExport.objects.get(id=export_id)
+    export = run_export(export)
+    return {"status": export.status, "file_name": export.file_name, "rows": export.rows}
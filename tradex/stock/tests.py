@@ -1,3 +1,791 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .archive import PriceArchive
+from .cache import bump_ingest_version
+from .export import export_path, run_export
+from .forms import StockGenerationForm
+from .ingest import FILE_WRITERS, StockDataGenerator, StockDataParser, suppress_unchanged, validate_stock_frame
+from .journal import holdings_as_of, take_snapshots
+from .models import DataExport, HoldingSnapshot, Order, PriceTick, StockDataAudit, Symbol, Trade, UserStock
+from .orders import match_orders
+from .price_snapshot import LatestPriceSnapshot
+from .serializer import ModifyUserStockSerializer
+from .utils import ARROW_FORMAT, FEATHER_FORMAT, PARQUET_FORMAT
+
+
+class SuppressUnchangedTests(SimpleTestCase):
+    """
+    Tests for storing only the ticks that moved from the last kept price.
+    """
+
+    def test_slow_drift_is_stored_once_it_adds_up(self) -> None:
+        df = pd.DataFrame({"name": ["ABC"] * 7, "price": [100.5, 101, 101.5, 102, 102.5, 103, 103.2]})
+        stored_prices = {"ABC": 100.0}
+
+        kept = suppress_unchanged(df, stored_prices, 0.01)
+
+        # Each step is below 1%, but 101.5 and 103 are more than 1% from the last kept price
+        self.assertEqual(kept["price"].tolist(), [101.5, 103])
+        self.assertEqual(stored_prices, {"ABC": 103})
+
+    def test_stocks_are_compared_with_their_own_reference(self) -> None:
+        df = pd.DataFrame({"name": ["ABC", "XYZ", "ABC", "XYZ"], "price": [100.2, 50, 101.5, 50.1]})
+        stored_prices = {"ABC": 100.0}
+
+        kept = suppress_unchanged(df, stored_prices, 0.01)
+
+        # A stock without a stored price keeps its first tick
+        self.assertEqual(kept["price"].tolist(), [50, 101.5])
+        self.assertEqual(stored_prices, {"ABC": 101.5, "XYZ": 50})
+
+    def test_without_min_change_every_change_is_stored(self) -> None:
+        df = pd.DataFrame({"name": ["ABC"] * 4, "price": [100, 100, 100.000001, 100.000001]})
+        stored_prices = {"ABC": 100.0}
+
+        kept = suppress_unchanged(df, stored_prices, 0)
+
+        self.assertEqual(kept["price"].tolist(), [100.000001])
+        self.assertEqual(stored_prices, {"ABC": 100.000001})
+
+
+class ValidateStockFrameTests(SimpleTestCase):
+    """
+    Tests for quarantining rows that do not fit the stored columns.
+    """
+
+    def test_names_that_are_not_a_single_path_component_are_invalid(self) -> None:
+        df = pd.DataFrame({"name": ["ABC", "../x", ".", "A/B"], "price": [1, 2, 3, 4]})
+
+        valid_rows, invalid_rows = validate_stock_frame(df)
+
+        self.assertEqual(valid_rows["name"].tolist(), ["ABC"])
+        self.assertEqual(invalid_rows["reason"].tolist(), ["invalid name"] * 3)
+
+
+class PriceArchiveTests(TestCase):
+    """
+    Tests for moving old prices to the archive.
+    """
+
+    def setUp(self) -> None:
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.archive = PriceArchive(root)
+        self.symbol = Symbol.objects.create(name="ABC")
+
+    def add_tick(self, price: float, created_at: datetime) -> None:
+        PriceTick.objects.create(symbol=self.symbol, price=price, created_at=created_at)
+
+    def archived_prices(self) -> list:
+        return [price for records in self.archive.read("ABC") for price in records["price"].tolist()]
+
+    def test_late_ticks_are_merged_into_archived_months(self) -> None:
+        self.add_tick(1, datetime(2024, 1, 10, tzinfo=dt_timezone.utc))
+        self.add_tick(3, datetime(2024, 2, 10, tzinfo=dt_timezone.utc))
+        self.archive.archive_history(datetime(2024, 3, 5, tzinfo=dt_timezone.utc))
+
+        # Stored after the run, but older than its boundary
+        self.add_tick(2, datetime(2024, 1, 20, tzinfo=dt_timezone.utc))
+        archived = self.archive.archive_history(datetime(2024, 3, 20, tzinfo=dt_timezone.utc))
+
+        self.assertEqual(archived, 1)
+        self.assertEqual(self.archived_prices(), [1, 2, 3])
+        self.assertEqual(self.archive.archived_until(), datetime(2024, 3, 1, tzinfo=dt_timezone.utc))
+
+
+@override_settings(HOLDING_SNAPSHOT_LOOKBACK=60)
+class TakeSnapshotsTests(TestCase):
+    """
+    Tests for snapshotting holdings from the trade journal.
+    """
+
+    def setUp(self) -> None:
+        self.symbol = Symbol.objects.create(name="ABC")
+
+    def add_trade(self, user: User, trade_id: int, quantity: int, seconds_ago: int) -> None:
+        Trade.objects.create(
+            id=trade_id, user=user, symbol=self.symbol, side=Trade.BUY, quantity=quantity, price=10,
+            created_at=timezone.now() - timedelta(seconds=seconds_ago))
+
+    def test_trade_committed_late_with_a_lower_id_is_snapshotted(self) -> None:
+        first, second = User.objects.create(username="first"), User.objects.create(username="second")
+        self.add_trade(second, 10, 1, seconds_ago=600)
+        self.assertEqual(take_snapshots(), 1)
+
+        # Its id was taken before the previous run, its transaction committed after it
+        self.add_trade(first, 5, 2, seconds_ago=30)
+        with override_settings(HOLDING_SNAPSHOT_LOOKBACK=0):
+            self.assertEqual(take_snapshots(), 1)
+
+        snapshot = HoldingSnapshot.objects.get(user=first)
+        self.assertEqual(snapshot.last_trade_id, 5)
+        self.assertEqual(snapshot.holdings["ABC"]["quantity"], 2)
+
+    def test_own_trade_committed_late_with_a_lower_id_is_snapshotted(self) -> None:
+        user = User.objects.create(username="trader")
+        self.add_trade(user, 10, 1, seconds_ago=600)
+        self.assertEqual(take_snapshots(), 1)
+
+        # An order fill took id 5 before the trade above, but committed after the run
+        self.add_trade(user, 5, 2, seconds_ago=30)
+        # Still within the lookback, the run leaves it to a later one
+        self.assertEqual(take_snapshots(), 0)
+        with override_settings(HOLDING_SNAPSHOT_LOOKBACK=0):
+            self.assertEqual(take_snapshots(), 1)
+
+        latest = HoldingSnapshot.objects.filter(user=user).order_by("-taken_at").first()
+        self.assertEqual(latest.holdings["ABC"]["quantity"], 3)
+        self.assertEqual(holdings_as_of(user, timezone.now())["ABC"]["quantity"], 3)
+        self.assertEqual(holdings_as_of(user, timezone.now() - timedelta(seconds=300))["ABC"]["quantity"], 1)
+
+
+class MatchOrdersTests(TestCase):
+    """
+    Tests for filling open orders from a batch of new prices.
+    """
+
+    def setUp(self) -> None:
+        self.user = User.objects.create(username="trader")
+        self.symbol = Symbol.objects.create(name="ABC")
+        UserStock.objects.create(user=self.user, symbol=self.symbol, quantity=10, invested_amount=1000)
+
+    def place(self, side: str, order_type: str, quantity: int, trigger_price: int) -> Order:
+        return Order.objects.create(user=self.user, symbol=self.symbol, side=side, order_type=order_type,
+                                    quantity=quantity, trigger_price=trigger_price)
+
+    def test_orders_fill_at_the_first_tick_crossing_their_trigger(self) -> None:
+        buy_limit = self.place(Trade.BUY, Order.LIMIT, 2, 95)
+        sell_stop = self.place(Trade.SELL, Order.STOP, 3, 90)
+        buy_stop = self.place(Trade.BUY, Order.STOP, 1, 105)
+        sell_limit = self.place(Trade.SELL, Order.LIMIT, 1, 98)
+
+        self.assertEqual(match_orders({self.symbol.pk: np.array([97, 96, 94, 89, 97.5, 99])}), 3)
+
+        # Limits buy on the way down and sell on the way up, stops the other way round
+        for order, price in ((buy_limit, 94), (sell_stop, 89), (sell_limit, 99)):
+            order.refresh_from_db()
+            self.assertEqual(order.status, Order.FILLED)
+            self.assertEqual(order.filled_price, price)
+        buy_stop.refresh_from_db()
+        self.assertEqual(buy_stop.status, Order.OPEN)
+        self.assertEqual(UserStock.objects.get(user=self.user).quantity, 8)
+        self.assertEqual(Trade.objects.filter(user=self.user).count(), 3)
+
+    def test_sell_exceeding_the_holding_is_rejected(self) -> None:
+        sell_limit = self.place(Trade.SELL, Order.LIMIT, 11, 110)
+
+        self.assertEqual(match_orders({self.symbol.pk: np.array([105, 112])}), 0)
+
+        sell_limit.refresh_from_db()
+        self.assertEqual(sell_limit.status, Order.REJECTED)
+        self.assertEqual(UserStock.objects.get(user=self.user).quantity, 10)
+        self.assertFalse(Trade.objects.exists())
+
+
+class ModifyUserStockTests(TestCase):
+    """
+    Tests for buying and selling at the latest price.
+    """
+
+    def setUp(self) -> None:
+        self.user = User.objects.create(username="trader")
+        self.symbol = Symbol.objects.create(name="ABC")
+        PriceTick.objects.create(symbol=self.symbol, price=100)
+        self.holding = UserStock.objects.create(
+            user=self.user, symbol=self.symbol, quantity=10, invested_amount=1000)
+
+    def test_sell_checks_the_holding_at_execution_time(self) -> None:
+        serializer = ModifyUserStockSerializer(self.holding, data={"name": "ABC", "quantity": 8}, mode="sell")
+        self.assertTrue(serializer.is_valid())
+
+        # An order sold part of the holding after the request was validated
+        UserStock.objects.filter(pk=self.holding.pk).update(quantity=5, invested_amount=500)
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.assertEqual(UserStock.objects.get(pk=self.holding.pk).quantity, 5)
+        self.assertFalse(Trade.objects.exists())
+
+    def test_buy_adds_to_a_holding_created_since_the_request(self) -> None:
+        self.holding.delete()
+        serializer = ModifyUserStockSerializer(
+            UserStock(user=self.user, symbol=self.symbol), data={"name": "ABC", "quantity": 2}, mode="buy")
+        self.assertTrue(serializer.is_valid())
+
+        # An order filled in between created the holding
+        UserStock.objects.create(user=self.user, symbol=self.symbol, quantity=3, invested_amount=300)
+        serializer.save()
+
+        holding = UserStock.objects.get(user=self.user, symbol=self.symbol)
+        self.assertEqual((holding.quantity, holding.invested_amount), (5, 500))
+
+
+class MediaRootTestCase(TestCase):
+    """
+    Test case writing the media files, quarantine and archive to a temporary directory.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STOCK_QUARANTINE_DIR=os.path.join(self.media_root, "stock_quarantine"),
+            STOCK_ARCHIVE_DIR=os.path.join(self.media_root, "price_archive"),
+            DATA_EXPORT_DIR=os.path.join(self.media_root, "exports"),
+            LATEST_PRICE_SNAPSHOT_ENABLED=False,
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def write_stock_file(self, file_name: str, df: pd.DataFrame) -> str:
+        stock_data_dir = os.path.join(self.media_root, "stock_data")
+        os.makedirs(stock_data_dir, exist_ok=True)
+        path = os.path.join(stock_data_dir, file_name)
+        FILE_WRITERS[file_name.rsplit(".", 1)[1]](df, path)
+        return path
+
+
+class ColumnarIngestTests(MediaRootTestCase):
+    """
+    Tests for ingesting Parquet and Arrow stock data files.
+    """
+
+    def test_columnar_files_are_ingested(self) -> None:
+        for price, file_format in enumerate((PARQUET_FORMAT, ARROW_FORMAT, FEATHER_FORMAT), start=1):
+            self.write_stock_file(f"prices.{file_format}", pd.DataFrame({"name": ["ABC"], "price": [float(price)]}))
+
+        StockDataParser().parse_files()
+
+        self.assertEqual(sorted(PriceTick.objects.values_list("price", flat=True)), [1, 2, 3])
+
+    def test_only_the_projected_columns_are_read(self) -> None:
+        path = self.write_stock_file("prices.parquet", pd.DataFrame(
+            {"name": ["ABC"], "price": [1.0], "volume": [100]}))
+
+        self.assertEqual(StockDataParser().read_file(path).columns.tolist(), ["name", "price"])
+        self.assertEqual(StockDataParser(["price"]).read_file(path).columns.tolist(), ["price"])
+
+    def test_generator_writes_the_requested_format(self) -> None:
+        file_name = StockDataGenerator().generate_random_stocks(n=5, file_format=ARROW_FORMAT)
+
+        self.assertTrue(file_name.endswith(".arrow"))
+        df = StockDataParser().read_file(os.path.join(self.media_root, "stock_data", file_name))
+        self.assertEqual(len(df), 5)
+
+
+class ApiTestCase(TestCase):
+    """
+    Test case calling the API as a freshly created user.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        # Throttle buckets and cached responses live in the cache
+        cache.clear()
+        self.user = User.objects.create_user(username="trader", password="password")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+
+    def add_ticks(self, name: str, prices: list, start: datetime, step: timedelta = timedelta(minutes=1)) -> Symbol:
+        symbol, _ = Symbol.objects.get_or_create(name=name)
+        PriceTick.objects.bulk_create(
+            PriceTick(symbol=symbol, price=price, created_at=start + step * index)
+            for index, price in enumerate(prices))
+        return symbol
+
+
+class PortfolioHistoryTests(ApiTestCase):
+    """
+    Tests for the value of the user's holdings over time.
+    """
+
+    def test_holdings_are_weighted_on_a_common_time_grid(self) -> None:
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        abc = self.add_ticks("ABC", [10, 12], start, step=timedelta(minutes=2))
+        xyz = self.add_ticks("XYZ", [100], start + timedelta(minutes=1))
+        UserStock.objects.create(user=self.user, symbol=abc, quantity=2, invested_amount=20)
+        UserStock.objects.create(user=self.user, symbol=xyz, quantity=1, invested_amount=100)
+
+        response = self.client.get("/api/stock/portfolio/history/")
+
+        self.assertEqual(response.status_code, 200)
+        # XYZ is valued at its first price before it has one, ABC carries its price forward
+        self.assertEqual(response.data["data"], [
+            {"created_at": "2024-01-01T00:00:00Z", "value": "120.000000"},
+            {"created_at": "2024-01-01T00:01:00Z", "value": "120.000000"},
+            {"created_at": "2024-01-01T00:02:00Z", "value": "124.000000"},
+        ])
+
+    def test_points_cap_keeps_the_latest_value(self) -> None:
+        symbol = self.add_ticks("ABC", [1, 2, 3, 4, 5], datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        UserStock.objects.create(user=self.user, symbol=symbol, quantity=1, invested_amount=1)
+
+        response = self.client.get("/api/stock/portfolio/history/", {"points": 2})
+
+        self.assertEqual([point["value"] for point in response.data["data"]], ["1.000000", "5.000000"])
+        self.assertEqual(self.client.get("/api/stock/portfolio/history/", {"points": 0}).status_code, 400)
+
+
+class StockAnalyticsTests(ApiTestCase):
+    """
+    Tests for the technical analytics of a stock.
+    """
+
+    def test_indicators_over_the_history(self) -> None:
+        self.add_ticks("ABC", [100, 110, 99, 121], datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+
+        response = self.client.get("/api/stock/analytics/", {"name": "ABC", "window": 2})
+
+        self.assertEqual(response.status_code, 200)
+        summary, series = response.data["data"]["summary"], response.data["data"]["series"]
+        self.assertEqual((summary["first_price"], summary["last_price"]), (100, 121))
+        self.assertEqual(summary["total_return"], 0.21)
+        self.assertEqual(summary["max_drawdown"], -0.1)
+        self.assertIsNone(series[0]["sma"])
+        self.assertEqual([point["sma"] for point in series[1:]], [105, 104.5, 110])
+        self.assertEqual([point["drawdown"] for point in series], [0, 0, -0.1, 0])
+
+    def test_range_opens_with_the_price_known_at_its_start(self) -> None:
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.add_ticks("ABC", [100, 110, 99, 121], start)
+
+        response = self.client.get("/api/stock/analytics/", {
+            "name": "ABC", "window": 2, "start": "2024-01-01T00:01:30Z"})
+
+        series = response.data["data"]["series"]
+        self.assertEqual([point["created_at"] for point in series],
+                         ["2024-01-01T00:01:30Z", "2024-01-01T00:02:00Z", "2024-01-01T00:03:00Z"])
+        self.assertEqual([point["price"] for point in series], [110, 99, 121])
+
+    def test_window_out_of_range_is_rejected(self) -> None:
+        self.assertEqual(self.client.get("/api/stock/analytics/", {"name": "ABC", "window": 1}).status_code, 400)
+
+
+class StockBatchTests(ApiTestCase):
+    """
+    Tests for the histories of several stocks fetched at once.
+    """
+
+    def test_histories_are_grouped_and_capped_per_stock(self) -> None:
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.add_ticks("ABC", [1, 2, 3, 4, 5], start)
+        self.add_ticks("XYZ", [7], start)
+
+        response = self.client.get("/api/stock/batch/", {
+            "names": "ABC,XYZ,NOPE", "points": 2, "start": "2024-01-01T00:02:00Z"})
+
+        self.assertEqual(response.status_code, 200)
+        abc, xyz, unknown = response.data["data"]
+        self.assertEqual([float(point["price"]) for point in abc["history"]], [3, 5])
+        self.assertEqual(float(abc["latest_price"]), 5)
+        # No tick in the range, the last known price opens the history
+        self.assertEqual([(point["created_at"], float(point["price"])) for point in xyz["history"]],
+                         [("2024-01-01T00:02:00Z", 7)])
+        self.assertEqual(unknown, {"name": "NOPE", "latest_price": None, "history": []})
+
+    def test_too_many_names_are_rejected(self) -> None:
+        with override_settings(STOCK_BATCH_MAX_SYMBOLS=1):
+            self.assertEqual(self.client.get("/api/stock/batch/", {"names": "ABC,XYZ"}).status_code, 400)
+
+
+class MarketSummaryTests(MediaRootTestCase, ApiTestCase):
+    """
+    Tests for the market movers computed at the end of every ingest.
+    """
+
+    def test_movers_compare_the_batch_with_the_previous_quotes(self) -> None:
+        self.assertEqual(self.client.get("/api/stock/market/summary/").status_code, 404)
+        self.write_stock_file("first.csv", pd.DataFrame({"name": ["ABC", "XYZ", "QQQ"], "price": [100, 50, 10]}))
+        StockDataParser().parse_files()
+        self.write_stock_file("second.csv", pd.DataFrame(
+            {"name": ["ABC", "XYZ", "ABC", "NEW"], "price": [110, 45, 120, 5]}))
+        StockDataParser().parse_files()
+
+        response = self.client.get("/api/stock/market/summary/")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(data["gainers"], [{"name": "ABC", "price": 120, "previous_price": 100, "change": 20,
+                                            "change_percent": 20, "ticks": 2}])
+        self.assertEqual([(mover["name"], mover["change_percent"]) for mover in data["losers"]], [("XYZ", -10)])
+        self.assertEqual([mover["name"] for mover in data["most_active"]], ["ABC", "XYZ", "NEW"])
+        self.assertEqual({key: data[key] for key in ("symbols", "updated", "advancers", "decliners", "unchanged",
+                                                      "listed")},
+                         {"symbols": 4, "updated": 3, "advancers": 1, "decliners": 1, "unchanged": 0, "listed": 1})
+
+
+class StockGenerationFormTests(SimpleTestCase):
+    """
+    Tests for the parameters of a stock data generation job.
+    """
+
+    def form(self, min_price: float, max_price: float) -> StockGenerationForm:
+        return StockGenerationForm({"n": 10, "min_price": min_price, "max_price": max_price, "file_format": "csv"})
+
+    def test_prices_must_be_positive(self) -> None:
+        form = self.form(0, 10)
+        self.assertFalse(form.is_valid())
+        self.assertIn("min_price", form.errors)
+
+    def test_price_range_must_not_be_empty(self) -> None:
+        self.assertFalse(self.form(20, 10).is_valid())
+        self.assertTrue(self.form(10, 10).is_valid())
+
+
+class StreamingTests(ApiTestCase):
+    """
+    Tests for streaming large results instead of buffering them.
+    """
+
+    def test_stock_history_is_streamed_in_the_usual_envelope(self) -> None:
+        self.add_ticks("ABC", [1, 2, 3], datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+
+        buffered = self.client.get("/api/stock/details/", {"name": "ABC"})
+        streamed = self.client.get("/api/stock/details/", {"name": "ABC", "stream": "true"},
+                                   HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed["Content-Encoding"], "gzip")
+        body = json.loads(gzip.decompress(b"".join(streamed.streaming_content)))
+        self.assertEqual(body, json.loads(buffered.content))
+        self.assertEqual(len(body["data"]), 3)
+
+
+class LatestPriceSnapshotTests(TestCase):
+    """
+    Tests for the latest price snapshot shared by the web workers.
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.path = os.path.join(root, "latest_prices.bin")
+        self.snapshot = LatestPriceSnapshot(self.path)
+        self.now = timezone.now()
+        for name, price in (("XYZ", 3), ("ABC", 1), ("MNO", 2)):
+            symbol = Symbol.objects.create(name=name)
+            PriceTick.objects.create(symbol=symbol, price=price - 0.5, created_at=self.now - timedelta(minutes=1))
+            PriceTick.objects.create(symbol=symbol, price=price, created_at=self.now)
+
+    def new_ingest_version(self) -> int:
+        StockDataAudit.objects.create(file_name=f"prices-{StockDataAudit.objects.count()}.csv")
+        return bump_ingest_version()
+
+    def test_latest_prices_are_found_by_binary_search(self) -> None:
+        self.snapshot.publish([], self.new_ingest_version())
+
+        prices = self.snapshot.get()
+        self.assertEqual([prices.lookup(name)["price"] for name in ("ABC", "MNO", "XYZ")], [1, 2, 3])
+        for missing in ("AAA", "ABD", "ZZZ"):
+            self.assertIsNone(prices.lookup(missing))
+        self.assertIsNone(prices.prices(["ABC", "ZZZ"]))
+
+    def test_new_ticks_are_merged_unless_back_dated(self) -> None:
+        self.snapshot.publish([], self.new_ingest_version())
+        abc, xyz = Symbol.objects.get(name="ABC"), Symbol.objects.get(name="XYZ")
+        ticks = [PriceTick.objects.create(symbol=abc, price=5, created_at=self.now + timedelta(minutes=1)),
+                 PriceTick.objects.create(symbol=xyz, price=9, created_at=self.now - timedelta(hours=1))]
+
+        self.snapshot.publish(ticks, self.new_ingest_version())
+
+        prices = self.snapshot.get()
+        self.assertEqual(prices.latest_tick("ABC").id, ticks[0].id)
+        self.assertEqual(prices.lookup("XYZ")["price"], 3)
+
+    def test_stale_snapshots_fall_back_to_the_database(self) -> None:
+        self.snapshot.publish([], self.new_ingest_version())
+        self.assertIsNotNone(self.snapshot.get())
+
+        # Published for an older ingest, e.g. the publish of the latest one failed
+        self.new_ingest_version()
+        self.assertIsNone(self.snapshot.get())
+
+        self.snapshot.publish([], self.new_ingest_version())
+        # Not refreshed by the ingest runs for longer than the maximum age
+        expired = time.time() - 181
+        os.utime(self.path, (expired, expired))
+        with override_settings(LATEST_PRICE_SNAPSHOT_MAX_AGE=180):
+            self.assertIsNone(self.snapshot.get())
+
+
+@override_settings(PORTFOLIO_CACHE_ENABLED=True)
+class PortfolioCacheTests(MediaRootTestCase, ApiTestCase):
+    """
+    Tests for caching the user's holdings until they trade or new prices arrive.
+    """
+
+    def holding(self) -> tuple:
+        holding, = self.client.get("/api/stock/user-stocks/", {"fields": "quantity,latest_price"}).data["data"]
+        return holding["quantity"], float(holding["latest_price"])
+
+    def test_cache_is_invalidated_by_trades_and_ingests(self) -> None:
+        symbol = self.add_ticks("ABC", [10], timezone.now() - timedelta(minutes=1))
+        UserStock.objects.create(user=self.user, symbol=symbol, quantity=2, invested_amount=20)
+        self.assertEqual(self.holding(), (2, 10))
+
+        # A price stored outside of an ingest is not seen until the cache is invalidated
+        PriceTick.objects.create(symbol=symbol, price=11)
+        self.assertEqual(self.holding(), (2, 10))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/stock/user-stocks/buy/", {"name": "ABC", "quantity": 1}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.holding(), (3, 11))
+
+        self.write_stock_file("prices.csv", pd.DataFrame({"name": ["ABC"], "price": [12]}))
+        StockDataParser().parse_files()
+        self.assertEqual(self.holding(), (3, 12))
+
+
+class DataExportTests(MediaRootTestCase):
+    """
+    Tests for exporting the holdings and price history to files.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.symbol = Symbol.objects.create(name="ABC")
+        for minutes, price in enumerate((10, 11, 12)):
+            PriceTick.objects.create(symbol=self.symbol, price=price, created_at=self.start + timedelta(minutes=minutes))
+
+    def test_holdings_are_valued_at_the_latest_price(self) -> None:
+        user = User.objects.create(username="trader")
+        UserStock.objects.create(user=user, symbol=self.symbol, quantity=2, invested_amount=30)
+
+        export = run_export(DataExport.objects.create(kind=DataExport.HOLDINGS, file_format=DataExport.CSV))
+
+        self.assertEqual((export.status, export.rows), (DataExport.DONE, 1))
+        self.assertTrue(export.file_name.endswith(".csv.gz"))
+        with gzip.open(export_path(export.file_name), "rt") as f:
+            header, row = list(csv.reader(f))
+        values = dict(zip(header, row))
+        self.assertEqual([values[column] for column in ("user_id", "username", "name", "quantity")],
+                         [str(user.pk), "trader", "ABC", "2"])
+        self.assertEqual([float(values[column]) for column in (
+            "invested_amount", "latest_price", "market_value", "unrealized_pnl")], [30, 12, 24, -6])
+
+    def test_price_history_is_exported_within_the_range(self) -> None:
+        export = run_export(DataExport.objects.create(
+            kind=DataExport.PRICES, file_format=DataExport.PARQUET,
+            start=self.start + timedelta(minutes=1), end=self.start + timedelta(minutes=2)))
+
+        self.assertEqual((export.status, export.rows), (DataExport.DONE, 2))
+        df = pd.read_parquet(export_path(export.file_name))
+        self.assertEqual(df["name"].tolist(), ["ABC", "ABC"])
+        self.assertEqual([float(price) for price in df["price"]], [11, 12])
+        self.assertEqual(df["created_at"].iloc[0], pd.Timestamp(self.start + timedelta(minutes=1)))
+
+
+class IngestQuarantineTests(MediaRootTestCase):
+    """
+    Tests for loading the valid rows of a file and quarantining the rest.
+    """
+
+    def test_invalid_rows_are_quarantined_and_the_rest_loads(self) -> None:
+        self.write_stock_file("prices.csv", pd.DataFrame(
+            {"name": ["ABC", "ELEVENCHARS", "XYZ", "QQQ"], "price": ["10", "5", "n/a", "-1"]}))
+
+        StockDataParser().parse_files()
+
+        self.assertEqual(list(PriceTick.objects.values_list("symbol__name", "price")), [("ABC", 10)])
+        audit = StockDataAudit.objects.get(file_name="prices.csv")
+        self.assertEqual((audit.status, audit.total_rows, audit.valid_rows, audit.quarantined_rows),
+                         (StockDataAudit.PARTIAL, 4, 1, 3))
+        quarantined = pd.read_csv(os.path.join(self.media_root, "stock_quarantine", audit.quarantine_file))
+        self.assertEqual(quarantined["row"].tolist(), [2, 3, 4])
+        self.assertEqual(quarantined["reason"].tolist(),
+                         ["name longer than 10 characters", "non-numeric price", "non-positive price"])
+
+    def test_audits_are_recorded_one_by_one_when_the_bulk_insert_fails(self) -> None:
+        self.write_stock_file("first.csv", pd.DataFrame({"name": ["ABC"], "price": [10]}))
+        self.write_stock_file("second.csv", pd.DataFrame({"name": ["XYZ"], "price": [20]}))
+
+        with mock.patch.object(StockDataAudit.objects, "bulk_create", side_effect=DatabaseError("deadlock")), \
+                self.assertLogs("stock.ingest", "ERROR"):
+            StockDataParser().parse_files()
+
+        self.assertEqual(sorted(StockDataAudit.objects.values_list("file_name", "status")),
+                         [("first.csv", StockDataAudit.LOADED), ("second.csv", StockDataAudit.LOADED)])
+
+    def test_audit_that_cannot_be_saved_is_recorded_as_rejected(self) -> None:
+        self.write_stock_file("prices.csv", pd.DataFrame({"name": ["ABC"], "price": [10]}))
+        save = StockDataAudit.save
+
+        # Only the original record fails, the rejected one replacing it carries no hash
+        def save_without_hash(audit: StockDataAudit, *args, **kwargs) -> None:
+            if audit.content_hash:
+                raise DatabaseError("value too long")
+            save(audit, *args, **kwargs)
+
+        with mock.patch.object(StockDataAudit.objects, "bulk_create", side_effect=DatabaseError("value too long")), \
+                mock.patch.object(StockDataAudit, "save", save_without_hash), self.assertLogs("stock.ingest", "ERROR"):
+            StockDataParser().parse_files()
+
+        audit = StockDataAudit.objects.get(file_name="prices.csv")
+        self.assertEqual(audit.status, StockDataAudit.REJECTED)
+        self.assertEqual(audit.error, "Audit record failed: value too long")
+
+
+class IngestDeduplicationTests(MediaRootTestCase):
+    """
+    Tests for skipping files and rows that were already ingested.
+    """
+
+    def test_copies_are_skipped_after_a_single_read(self) -> None:
+        df = pd.DataFrame({"name": ["ABC"], "price": [10]})
+        self.write_stock_file("prices.csv", df)
+        self.write_stock_file("copy.csv", df)
+
+        with mock.patch("builtins.open", wraps=open) as opened:
+            StockDataParser().parse_files()
+
+        stock_files = [call.args[0] for call in opened.call_args_list if "stock_data" in str(call.args[0])]
+        self.assertEqual(sorted(os.path.basename(path) for path in stock_files), ["copy.csv", "prices.csv"])
+        self.assertEqual(PriceTick.objects.count(), 1)
+        self.assertEqual(sorted(StockDataAudit.objects.values_list("status", flat=True)),
+                         [StockDataAudit.DUPLICATE, StockDataAudit.LOADED])
+
+        # Re-delivered under a new name in a later run
+        self.write_stock_file("redelivered.csv", df)
+        StockDataParser().parse_files()
+        self.assertEqual(StockDataAudit.objects.get(file_name="redelivered.csv").status, StockDataAudit.DUPLICATE)
+        self.assertEqual(PriceTick.objects.count(), 1)
+
+    @override_settings(STOCK_INGEST_DEDUP_ROWS=True)
+    def test_timestamped_rows_already_stored_are_dropped(self) -> None:
+        self.write_stock_file("first.csv", pd.DataFrame(
+            {"name": ["ABC", "ABC"], "price": [10, 11], "timestamp": ["2024-01-01T00:00:00Z", "2024-01-01T00:01:00Z"]}))
+        StockDataParser().parse_files()
+        self.write_stock_file("second.csv", pd.DataFrame(
+            {"name": ["ABC", "ABC"], "price": [11, 12], "timestamp": ["2024-01-01T00:01:00Z", "2024-01-01T00:02:00Z"]}))
+        StockDataParser().parse_files()
+
+        self.assertEqual(list(PriceTick.objects.order_by("created_at").values_list("price", flat=True)), [10, 11, 12])
+
+
+class PricesAsOfTests(ApiTestCase):
+    """
+    Tests for the last prices of several stocks at a point in time.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.abc = self.add_ticks("ABC", [10, 11, 12], start)
+        self.add_ticks("XYZ", [20], start + timedelta(minutes=5))
+
+    def prices(self, **params: str) -> list:
+        response = self.client.get("/api/stock/as-of/", params)
+        self.assertEqual(response.status_code, 200)
+        return [(stock["name"], None if stock["price"] is None else float(stock["price"]))
+                for stock in response.data["data"]]
+
+    def test_last_price_at_or_before_the_time(self) -> None:
+        self.assertEqual(self.prices(at="2024-01-01T00:01:00Z", names="ABC,XYZ,NOPE"),
+                         [("ABC", 11), ("XYZ", None), ("NOPE", None)])
+        self.assertEqual(self.prices(at="2024-01-01T01:00:00Z", names="XYZ,ABC"), [("XYZ", 20), ("ABC", 12)])
+
+    def test_holdings_are_priced(self) -> None:
+        UserStock.objects.create(user=self.user, symbol=self.abc, quantity=1, invested_amount=10)
+        self.assertEqual(self.prices(at="2024-01-01T00:00:30Z", holdings="true"), [("ABC", 10)])
+
+    def test_stocks_are_priced_in_a_single_query(self) -> None:
+        with CaptureQueriesContext(connection) as one_stock:
+            self.prices(at="2024-01-01T01:00:00Z", names="ABC")
+        with CaptureQueriesContext(connection) as two_stocks:
+            self.prices(at="2024-01-01T01:00:00Z", names="ABC,XYZ")
+        self.assertEqual(len(one_stock.captured_queries), len(two_stocks.captured_queries))
+
+    def test_names_or_holdings_are_required(self) -> None:
+        for params in ({"at": "2024-01-01T00:00:00Z"}, {"at": "2024-01-01T00:00:00Z", "names": "ABC",
+                                                        "holdings": "true"}, {"names": "ABC"}):
+            self.assertEqual(self.client.get("/api/stock/as-of/", params).status_code, 400)
+
+
+@override_settings(WATCHLIST_SPARKLINE_POINTS=3)
+class WatchlistQuotesTests(ApiTestCase):
+    """
+    Tests for the quotes and sparklines of a watchlist.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.add_ticks("ABC", [10, 11, 12, 13, 14], datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        self.add_ticks("XYZ", [20], datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        Symbol.objects.create(name="NEW")
+        response = self.client.post("/api/stock/watchlists/create/", {"name": "Tech", "symbols": ["ABC", "NEW"]},
+                                    format="json")
+        self.watchlist_id = response.data["data"]["id"]
+
+    def quotes(self) -> list:
+        response = self.client.get(f"/api/stock/watchlists/{self.watchlist_id}/quotes/")
+        self.assertEqual(response.status_code, 200)
+        return response.data["data"]
+
+    def test_quotes_carry_the_change_and_the_latest_prices(self) -> None:
+        # Stocks without a price are left out
+        self.assertEqual(self.quotes(), [{
+            "name": "ABC", "price": "14.000000", "created_at": "2024-01-01T00:04:00Z", "change": "1.000000",
+            "change_percent": "7.69", "sparkline": ["12.000000", "13.000000", "14.000000"]}])
+
+    def test_quotes_follow_the_watchlist_changes(self) -> None:
+        self.assertEqual([quote["name"] for quote in self.quotes()], ["ABC"])
+
+        response = self.client.post(f"/api/stock/watchlists/{self.watchlist_id}/add/", {"symbols": ["XYZ"]},
+                                    format="json")
+        self.assertEqual(response.status_code, 200)
+
+        xyz = self.quotes()[1]
+        self.assertEqual((xyz["name"], xyz["change"], xyz["sparkline"]), ("XYZ", None, ["20.000000"]))
+
+    def test_other_users_watchlists_are_not_found(self) -> None:
+        other = User.objects.create_user(username="other", password="password")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=other).key}")
+        self.assertEqual(self.client.get(f"/api/stock/watchlists/{self.watchlist_id}/quotes/").status_code, 404)
+
+
+class SparseFieldsTests(ApiTestCase):
+    """
+    Tests for limiting the responses to the fields named in `?fields=`.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        symbol = self.add_ticks("ABC", [10], datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        UserStock.objects.create(user=self.user, symbol=symbol, quantity=2, invested_amount=20)
+
+    def test_only_the_requested_fields_are_read_and_returned(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/stock/user-stocks/", {"fields": "quantity,stock.name"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"], [{"stock": {"name": "ABC"}, "quantity": 2}])
+        holdings_query, = [query["sql"] for query in queries.captured_queries if 'FROM "user_stock"' in query["sql"]]
+        self.assertNotIn("invested_amount", holdings_query)
+
+    def test_unknown_fields_are_rejected(self) -> None:
+        for fields in ("quantity,volume", "quantity.name"):
+            response = self.client.get("/api/stock/user-stocks/", {"fields": fields})
+            self.assertEqual(response.status_code, 400)
@@ -5,6 +5,25 @@ urlpatterns = [
     path("user-stocks/", views.get_user_stocks, name="get_user_stocks"),
     re_path(r'^user-stocks/(buy|sell)/$',
             views.modify_user_stock, name='modify_user_stock'),
+    path("user-stocks/as-of/", views.get_user_holdings_as_of,
+         name="get_user_holdings_as_of"),
+    path("trades/", views.get_user_trades, name="get_user_trades"),
+    path("orders/", views.get_user_orders, name="get_user_orders"),
+    path("orders/place/", views.place_order, name="place_order"),
+    path("orders/<int:order_id>/cancel/", views.cancel_order, name="cancel_order"),
     path("all/", views.get_stocks, name="get_stocks"),
     path("details/", views.get_stock_details, name="get_stock_details"),
+    path("market/summary/", views.get_market_summary, name="get_market_summary"),
+    path("batch/", views.get_stock_batch, name="get_stock_batch"),
+    path("as-of/", views.get_prices_as_of, name="get_prices_as_of"),
+    path("analytics/", views.get_stock_analytics, name="get_stock_analytics"),
+    path("portfolio/history/", views.get_portfolio_history,
+         name="get_portfolio_history"),
+    path("watchlists/", views.get_watchlists, name="get_watchlists"),
+    path("watchlists/create/", views.create_watchlist, name="create_watchlist"),
+    re_path(r'^watchlists/(\d+)/(add|remove)/$',
+            views.modify_watchlist, name='modify_watchlist'),
+    path("watchlists/<int:watchlist_id>/delete/", views.delete_watchlist, name="delete_watchlist"),
+    path("watchlists/<int:watchlist_id>/quotes/", views.get_watchlist_quotes,
+         name="get_watchlist_quotes"),
 ]
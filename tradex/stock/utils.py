@@ -1,198 +1,108 @@
+import hashlib
 import os
-import random
-import string
-import pandas as pd
-from django.conf import settings
-from django.utils.crypto import get_random_string
-from typing import List, Dict, Optional
-from .models import Stock, StockDataAudit
+from datetime import datetime
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from typing import Any, List, Optional, Sequence, Tuple
 
 
-class BaseStockData:
-    """
-    Base class to handle common functionalities related to stock data files.
-    """
+# Supported stock data file formats, keyed by file extension
+CSV_FORMAT = "csv"
+PARQUET_FORMAT = "parquet"
+ARROW_FORMAT = "arrow"
+FEATHER_FORMAT = "feather"
+SUPPORTED_FORMATS: List[str] = [CSV_FORMAT, PARQUET_FORMAT, ARROW_FORMAT, FEATHER_FORMAT]
 
-    def __init__(self):
-        """
-        Initialize the base stock data directory and ensure it exists.
-        """
-        self._stock_data_dir = os.path.join(settings.MEDIA_ROOT, 'stock_data')
-        os.makedirs(self._stock_data_dir, exist_ok=True)
 
-    def _get_filenames(self) -> List[str]:
-        """
-        Get a list of filenames in the stock data directory that are CSV files.
-
-        Returns:
-            List[str]: List of filenames with '.csv' extension.
-        """
-        return [
-            f for f in os.listdir(self._stock_data_dir)
-            if f.endswith('.csv') and os.path.isfile(os.path.join(self._stock_data_dir, f))
-        ]
+def get_file_format(file_name: str) -> Optional[str]:
+    """
+    Detect the stock data format of a file from its extension.
 
+    Args:
+        file_name (str): Name or path of the file.
 
-class StockNameGenerator:
-    """
-    A utility class to generate random stock names.
+    Returns:
+        Optional[str]: The format key, or None if the extension is not supported.
     """
+    extension = os.path.splitext(file_name)[1].lstrip('.').lower()
+    return extension if extension in SUPPORTED_FORMATS else None
 
-    @staticmethod
-    def generate_random_stock_name() -> str:
-        """
-        Generate a random stock name with 3 or 4 uppercase characters.
 
-        Returns:
-            str: Random stock name.
-        """
-        length = random.choice([3, 4])
-        return ''.join(random.choices(string.ascii_uppercase, k=length))
+def read_file_content(file_path: str) -> Tuple[bytes, str]:
+    """
+    Read a file's content and compute its SHA-256, so the same buffer is
+    hashed and parsed without reading the file twice.
 
+    Args:
+        file_path (str): Path of the file.
 
-class StockPriceGenerator:
+    Returns:
+        Tuple[bytes, str]: The content and its hexadecimal digest.
     """
-    A utility class to generate random stock prices.
+    with open(file_path, "rb") as f:
+        content = f.read()
+    return content, hashlib.sha256(content).hexdigest()
+
+
+def parse_datetime_param(value: Optional[str]) -> Optional[datetime]:
     """
+    Parse an ISO 8601 query parameter into an aware datetime.
 
-    @staticmethod
-    def generate_random_stock_price(min_value: float, max_value: float) -> float:
-        """
-        Generate a random stock price between min_value and max_value.
+    Naive values are interpreted in the current time zone.
 
-        Args:
-            min_value (float): Minimum price.
-            max_value (float): Maximum price.
+    Args:
+        value (Optional[str]): The raw query parameter.
 
-        Returns:
-            float: Random stock price rounded to 6 decimal places.
-        """
-        return round(random.uniform(min_value, max_value), 6)
+    Returns:
+        Optional[datetime]: The parsed datetime, or None if the parameter is missing.
+
+    Raises:
+        ValueError: If the value is not a valid datetime.
+    """
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid datetime: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
 
-class StockDataGenerator(BaseStockData):
+def parse_list_param(value: Optional[str]) -> List[str]:
     """
-    A class for generating and saving stock data to CSV files.
+    Parse a comma separated query parameter into a list of unique, non-empty values.
+
+    Args:
+        value (Optional[str]): The raw query parameter.
+
+    Returns:
+        List[str]: The values in their original order.
     """
+    if not value:
+        return []
+    return list(dict.fromkeys(item.strip() for item in value.split(",") if item.strip()))
 
-    def __init__(self):
-        """
-        Initialize StockDataGenerator.
-        """
-        super().__init__()
-
-    def __get_existing_stock_names(self):
-        """
-        Retrieve existing stock names from the database.
-
-        Returns:
-            List[str]: List of stock names.
-        """
-        return Stock.objects.values_list("name", flat=True)
-
-    def generate_random_stocks(
-        self,
-        n: int = 10,
-        min_price: float = 20.0,
-        max_price: float = 100.0,
-        use_existing_names: bool = False
-    ) -> str:
-        """
-        Generate random stocks and save them to a CSV file.
-
-        Args:
-            n (int): Number of stocks to generate.
-            min_price (float): Minimum stock price.
-            max_price (float): Maximum stock price.
-            use_existing_names (bool): Whether to use existing stock names.
-
-        Returns:
-            str: File path of the saved CSV file.
-        """
-        if use_existing_names:
-            unique_names = set(self.__get_existing_stock_names())
-            stock_data = {
-                "name": list(unique_names),
-                "price": [StockPriceGenerator.generate_random_stock_price(min_price, max_price) for _ in range(len(unique_names))]
-            }
-        else:
-            stock_data = {
-                "name": [StockNameGenerator.generate_random_stock_name() for _ in range(n)],
-                "price": [StockPriceGenerator.generate_random_stock_price(min_price, max_price) for _ in range(n)]
-            }
-
-        df = pd.DataFrame(stock_data)
-        file_name = f'{get_random_string(length=10)}.csv'
-        file_path = os.path.join(self._stock_data_dir, file_name)
-        df.to_csv(file_path, index=False)
-        return file_name
-
-
-class StockDataParser(BaseStockData):
+
+def evenly_spaced(items: Sequence[Any], max_points: int) -> Sequence[Any]:
     """
-    A class for parsing stock data from CSV files and saving them to the database.
+    Downsample a sequence to at most `max_points` evenly spaced items, always
+    keeping the first and the last one.
+
+    Args:
+        items (Sequence[Any]): The items to downsample.
+        max_points (int): Maximum number of items to keep.
+
+    Returns:
+        Sequence[Any]: The downsampled items.
     """
+    if len(items) <= max_points:
+        return items
+    if max_points == 1:
+        return [items[-1]]
+    step = (len(items) - 1) / (max_points - 1)
+    return [items[round(i * step)] for i in range(max_points)]
+
 
-    def __init__(self):
-        """
-        Initialize StockDataParser.
-        """
-        super().__init__()
-
-    def __filter_unprocessed_files(self, filenames: List[str]) -> List[str]:
-        """
-        Filter out files that have already been processed.
-
-        Args:
-            filenames (List[str]): List of filenames to filter.
-
-        Returns:
-            List[str]: List of unprocessed filenames.
-        """
-        processed_files = StockDataAudit.objects.filter(
-            file_name__in=filenames).values_list("file_name", flat=True)
-        return [file for file in filenames if file not in processed_files]
-
-    def __create_stock_objects(self, df: pd.DataFrame) -> List[Stock]:
-        """
-        Create a list of Stock objects from the DataFrame.
-
-        Args:
-            df (pd.DataFrame): DataFrame containing stock data.
-
-        Returns:
-            List[Stock]: List of Stock objects.
-        """
-        return [Stock(name=row['name'], price=row['price']) for _, row in df.iterrows()]
-
-    def __bulk_insert(self, stock_objects: List[Stock], audit_objects: List[StockDataAudit]) -> None:
-        """
-        Bulk insert stock and audit objects into the database.
-
-        Args:
-            stock_objects (List[Stock]): List of Stock objects to insert.
-            audit_objects (List[StockDataAudit]): List of StockDataAudit objects to insert.
-        """
-        if stock_objects:
-            Stock.objects.bulk_create(stock_objects, batch_size=1000)
-        if audit_objects:
-            try:
-                StockDataAudit.objects.bulk_create(audit_objects)
-            except Exception as e:
-                print(f"Bulk create failed on audit data: {e}")
-
-    def parse_files(self) -> None:
-        """
-        Parse unprocessed CSV files and save stock data to the database.
-        """
-        files_to_process = self.__filter_unprocessed_files(
-            self._get_filenames())
-        stock_objects, audit_objects = [], []
-
-        for file in files_to_process:
-            file_path = os.path.join(self._stock_data_dir, file)
-            df = pd.read_csv(file_path)
-            stock_objects.extend(self.__create_stock_objects(df))
-            audit_objects.append(StockDataAudit(file_name=file))
-
-        self.__bulk_insert(stock_objects, audit_objects)
+# Primary key of the single market snapshot row
+MARKET_SNAPSHOT_ID = 1
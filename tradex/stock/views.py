@@ -1,25 +1,115 @@
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.db.models import OuterRef, Subquery, DecimalField
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DecimalField, F, OuterRef, Prefetch, Q, Subquery, Sum
 from django.core.paginator import Paginator
-from typing import Dict, Optional
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+from hashlib import md5
+from itertools import chain, groupby
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from .models import UserStock, Stock
-from .serializer import UserStockSerializer, StockSerializer, StockDetailsSerializer, ModifyUserStockSerializer
-from tradex.utils import response_structure, SERVER_ERROR_MESSAGE, SUCCESS_MESSAGE
+from .archive import PriceArchive, archive_to_representation, from_epoch_us, split_range
+from .cache import get_holdings_version, get_ingest_version
+from .journal import holdings_as_of
+from .models import MarketSnapshot, Order, PriceTick, Symbol, UserStock, Trade, Watchlist
+from .price_snapshot import get_latest_prices, latest_tick_annotations, latest_ticks
+from .serializer import (
+    UserStockSerializer,
+    StockSerializer,
+    StockDetailsSerializer,
+    ModifyUserStockSerializer,
+    MarketSnapshotSerializer,
+    OrderSerializer,
+    TradeSerializer,
+    WatchlistSerializer,
+    ModifyWatchlistSerializer
+)
+from .utils import MARKET_SNAPSHOT_ID, evenly_spaced, parse_datetime_param, parse_list_param
+from tradex.db_router import pin_client_to_primary
+from tradex.throttling import PortfolioThrottle, ReadThrottle, TradeThrottle, WatchlistThrottle
+from tradex.utils import (
+    response_structure,
+    streaming_response_structure,
+    serialize_queryset,
+    is_truthy,
+    SERVER_ERROR_MESSAGE,
+    SUCCESS_MESSAGE
+)
+
+# Representation of each `StockSerializer` field from a latest price snapshot record
+SNAPSHOT_STOCK_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "name": lambda record: record["name"].decode(),
+    "price": lambda record: f"{record['price']:.6f}",
+    "created_at": lambda record: DateTimeField().to_representation(from_epoch_us(int(record["created_at"]))),
+    "id": lambda record: int(record["id"]),
+}
+
+
+def wants_gzip(request: Request) -> bool:
+    """
+    Whether the client accepts a gzip encoded response body.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        bool: True if 'gzip' is listed in the Accept-Encoding header.
+    """
+    return "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+
+def last_known_prices(names: Iterable[str], at: datetime) -> Dict[str, Decimal]:
+    """
+    Get the last price of each stock known strictly before a point in time, so
+    a range starting at that point opens with a known price even when the
+    unchanged ticks around it were never stored.
+
+    Stocks with a tick exactly at `at` are left out, that tick already opens the range.
+
+    Args:
+        names (Iterable[str]): Stock names.
+        at (datetime): The start of the range.
+
+    Returns:
+        Dict[str, Decimal]: Last known price per stock name, for the stocks traded before `at`.
+    """
+    last_ticks = latest_ticks(
+        Symbol.objects.filter(name__in=names), at, sources=["latest_price", "latest_created_at"])
+    return {
+        name: price
+        for name, price, created_at in last_ticks.values_list("name", "latest_price", "latest_created_at")
+        if created_at < at
+    }
 
 
 @api_view(["GET"])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
+@throttle_classes([PortfolioThrottle])
 def get_user_stocks(request: Request) -> Response:
     """
     Retrieve the user's stock information, with optional pagination and search filtering.
 
+    Latest prices come from the shared latest price snapshot when it is fresh
+    and holds every held stock, and from the database otherwise. With
+    `stream=true` the page is fetched in chunks and encoded incrementally
+    (gzipped if the client accepts it) instead of being built in memory.
+
+    Other pages are cached per user, holdings version and ingest version, so
+    they are served from the cache until the user trades or new prices arrive.
+
+    A comma separated `fields` parameter (e.g. `quantity,latest_price,stock.name`)
+    limits the output to these fields and the database query to what they read.
+
     Args:
         request (Request): The HTTP request object.
 
@@ -30,33 +120,80 @@ def get_user_stocks(request: Request) -> Response:
     limit = request.query_params.get("limit", 9999)
     search = request.query_params.get("search", None)
 
+    fields = parse_list_param(request.query_params.get("fields", None)) or None
+
     search_term: Dict[str, str] = {
-        "stock__name__icontains": search} if search else {}
+        "symbol__name__icontains": search} if search else {}
 
     try:
-        # Subquery to get the latest price for the stock name
-        latest_stock_price = Stock.objects.filter(
-            name=OuterRef('stock__name')
-        ).order_by('-created_at').values('price')[:1]
+        try:
+            sources = UserStockSerializer(fields=fields).sources()
+        except ValueError:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
 
-        user_stocks = UserStock.objects.filter(user=request.user).annotate(
-            latest_price=Subquery(
-                latest_stock_price,
-                output_field=DecimalField(max_digits=12, decimal_places=6)
-            )
-        ).select_related("stock").only(
-            "stock__name",
-            "stock__price",
-            "quantity",
+        # The symbol name is always read, the snapshot is looked up by name
+        holdings = UserStock.objects.filter(user=request.user).select_related("symbol").only(
+            "symbol__name",
             "id",
-            "invested_amount",
-            "stock_id",
-            "stock__created_at"
+            "symbol_id",
+            *[column for column in ("quantity", "invested_amount") if column in sources]
         ).filter(**search_term)
 
-        serializer = UserStockSerializer(user_stocks, many=True)
+        stream = is_truthy(request.query_params.get("stream", None))
+        cache_key, ingest_version = None, None
+        if not stream and settings.PORTFOLIO_CACHE_ENABLED:
+            ingest_version = get_ingest_version()
+            params_key = md5(repr((page, limit, search, fields)).encode()).hexdigest()
+            cache_key = (f"user_stocks:{request.user.id}:{get_holdings_version(request.user.id)}:"
+                         f"{ingest_version}:{params_key}")
+            cached: Optional[Tuple[List[Dict[str, Any]], int]] = cache.get(cache_key)
+            if cached is not None:
+                paginated_results, count = cached
+                return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, paginated_results, count=count)
+
+        latest_prices = None if stream else get_latest_prices()
+        if latest_prices is not None:
+            # Take the latest ticks from the shared snapshot instead of subqueries per row
+            user_stocks = list(holdings)
+            latest_ticks = {
+                user_stock.symbol.name: latest_prices.latest_tick(user_stock.symbol.name)
+                for user_stock in user_stocks
+            }
+            if all(tick is not None for tick in latest_ticks.values()):
+                for user_stock in user_stocks:
+                    tick = latest_ticks[user_stock.symbol.name]
+                    user_stock.name = user_stock.symbol.name
+                    user_stock.latest_price = tick.price
+                    user_stock.latest_created_at = tick.created_at
+                    user_stock.latest_tick_id = tick.id
+                serializer = UserStockSerializer(user_stocks, many=True, fields=fields)
+                paginator = Paginator(serializer.data, int(limit))
+                paginated_results = list(paginator.get_page(int(page)).object_list)
+                # A snapshot lagging behind the ingest version must not be cached under it
+                if cache_key is not None and latest_prices.version == ingest_version:
+                    cache.set(cache_key, (paginated_results, paginator.count),
+                              timeout=settings.PORTFOLIO_CACHE_TIMEOUT)
+                return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, paginated_results, count=paginator.count)
+
+        annotations = latest_tick_annotations(OuterRef("symbol"), sources=sources)
+        if "name" in sources:
+            annotations["name"] = F("symbol__name")
+        user_stocks = holdings.annotate(**annotations)
+
+        if stream:
+            paginator = Paginator(user_stocks, int(limit))
+            page_queryset = paginator.get_page(int(page)).object_list
+            return streaming_response_structure(
+                SUCCESS_MESSAGE, status.HTTP_200_OK,
+                serialize_queryset(page_queryset, UserStockSerializer, settings.STREAMING_CHUNK_SIZE, fields=fields),
+                gzip=wants_gzip(request), count=paginator.count)
+
+        serializer = UserStockSerializer(user_stocks, many=True, fields=fields)
         paginator = Paginator(serializer.data, int(limit))
-        paginated_results = paginator.get_page(int(page)).object_list
+        paginated_results = list(paginator.get_page(int(page)).object_list)
+        if cache_key is not None:
+            cache.set(cache_key, (paginated_results, paginator.count),
+                      timeout=settings.PORTFOLIO_CACHE_TIMEOUT)
 
         return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, paginated_results, count=paginator.count)
     except Exception:
@@ -66,10 +203,16 @@ def get_user_stocks(request: Request) -> Response:
 @api_view(["GET"])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
 def get_stocks(request: Request) -> Response:
     """
     Retrieve stock information with optional pagination and search filtering.
 
+    The latest prices are read from the shared latest price snapshot when it is
+    fresh, and from the database otherwise. A comma separated `fields`
+    parameter (e.g. `name,price`) limits the output to these fields and the
+    database query to what they read.
+
     Args:
         request (Request): The HTTP request object.
 
@@ -79,17 +222,33 @@ def get_stocks(request: Request) -> Response:
     page = request.query_params.get("page", 1)
     limit = request.query_params.get("limit", 10)
     search = request.query_params.get("search", None)
+    fields = parse_list_param(request.query_params.get("fields", None)) or None
 
     search_term: Dict[str, str] = {
         "name__icontains": search} if search else {}
 
     try:
-        latest_stock = Stock.objects.filter(
-            name=OuterRef('name')).order_by('-created_at').only("name", "id")
-        stocks = Stock.objects.filter(id=Subquery(latest_stock.values('id')[:1])).only(
-            'name', 'price', 'created_at', 'id').filter(**search_term)
+        try:
+            sparse = StockSerializer(fields=fields)
+        except ValueError:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        latest_prices = get_latest_prices()
+        if latest_prices is not None:
+            # Serve the latest prices from the shared snapshot without querying the database
+            records = latest_prices.search(search)
+            paginator = Paginator(records, int(limit))
+            paginated_results = [
+                {name: SNAPSHOT_STOCK_FIELDS[name](record) for name in sparse.fields}
+                for record in paginator.get_page(int(page)).object_list
+            ]
+            return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, paginated_results, count=paginator.count)
+
+        # Newest tick first, as in the snapshot
+        stocks = latest_ticks(
+            Symbol.objects.filter(**search_term), sources=sparse.sources()).order_by("-latest_tick_id")
 
-        serializer = StockSerializer(stocks, many=True)
+        serializer = StockSerializer(stocks, many=True, fields=fields)
         paginator = Paginator(serializer.data, int(limit))
         paginated_results = paginator.get_page(int(page)).object_list
 
@@ -101,9 +260,18 @@ def get_stocks(request: Request) -> Response:
 @api_view(["GET"])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
 def get_stock_details(request: Request) -> Response:
     """
-    Retrieve details for a specific stock by its name.
+    Retrieve details for a specific stock by its name, optionally limited to a
+    `start`/`end` range (inclusive, ISO 8601). A range with a `start` opens with
+    the last price known at that time, dated at `start`.
+
+    When the price archive is enabled, the part of the range older than the
+    archive boundary is served from the memory-mapped archive and only the
+    recent tail is queried from the database. With `stream=true` the history
+    is encoded incrementally (gzipped if the client accepts it) instead of
+    being built in memory.
 
     Args:
         request (Request): The HTTP request object.
@@ -116,18 +284,273 @@ def get_stock_details(request: Request) -> Response:
         if not stock_name:
             return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
 
-        stocks = Stock.objects.filter(
-            name=stock_name).order_by("created_at").only("created_at", "price")
-        serializer = StockDetailsSerializer(stocks, many=True)
+        try:
+            start = parse_datetime_param(request.query_params.get("start", None))
+            end = parse_datetime_param(request.query_params.get("end", None))
+        except ValueError:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        # Work with a half-open range internally
+        end_exclusive = end + timedelta(microseconds=1) if end else None
+        archive_range, db_range = None, (start, end_exclusive)
+        if settings.STOCK_ARCHIVE_ENABLED:
+            archive = PriceArchive()
+            archive_range, db_range = split_range(archive, start, end_exclusive)
+
+        parts: List[Iterable[Dict[str, Any]]] = []
+        if start:
+            # Open the range with the price known at its start
+            carried = last_known_prices([stock_name], start)
+            if stock_name in carried:
+                parts.append([StockDetailsSerializer(
+                    PriceTick(price=carried[stock_name], created_at=start)).data])
+        if archive_range is not None:
+            parts.append(archive_to_representation(
+                archive.read(stock_name, *archive_range)))
+
+        if db_range is not None:
+            db_start, db_end = db_range
+            range_filter: Dict[str, Any] = {}
+            if db_start:
+                range_filter["created_at__gte"] = db_start
+            if db_end:
+                range_filter["created_at__lt"] = db_end
+
+            ticks = PriceTick.objects.filter(
+                symbol__name=stock_name, **range_filter).order_by("created_at").only("created_at", "price")
+            parts.append(serialize_queryset(
+                ticks, StockDetailsSerializer, settings.STREAMING_CHUNK_SIZE))
+
+        if is_truthy(request.query_params.get("stream", None)):
+            return streaming_response_structure(
+                SUCCESS_MESSAGE, status.HTTP_200_OK, chain.from_iterable(parts),
+                gzip=wants_gzip(request))
 
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, list(chain.from_iterable(parts)))
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
+def get_market_summary(request: Request) -> Response:
+    """
+    Retrieve the top gainers, losers and most active stocks together with the
+    market summary, as precomputed at the end of the latest ingest.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the market summary.
+    """
+    try:
+        snapshot = MarketSnapshot.objects.filter(
+            id=MARKET_SNAPSHOT_ID).defer("quotes").first()
+        if snapshot is None:
+            return response_structure("Market summary is not available yet", status.HTTP_404_NOT_FOUND)
+
+        serializer = MarketSnapshotSerializer(snapshot)
         return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, serializer.data)
     except Exception:
         return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
+def get_stock_batch(request: Request) -> Response:
+    """
+    Retrieve the price history and latest price of several stocks at once.
+
+    Takes a comma separated list of `names`, an optional `start`/`end` range
+    and an optional `points` cap. The histories of every requested stock are
+    fetched in a single query, grouped per stock server-side and downsampled to
+    at most `points` evenly spaced points each. With a `start`, each history
+    opens with the last price known at that time.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing one entry per requested stock.
+    """
+    try:
+        names = parse_list_param(request.query_params.get("names", None))
+        if not names or len(names) > settings.STOCK_BATCH_MAX_SYMBOLS:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start = parse_datetime_param(request.query_params.get("start", None))
+            end = parse_datetime_param(request.query_params.get("end", None))
+            points = min(
+                int(request.query_params.get("points", settings.STOCK_BATCH_MAX_POINTS)),
+                settings.STOCK_BATCH_MAX_POINTS
+            )
+            if points <= 0:
+                raise ValueError("points must be positive")
+        except ValueError:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        range_filter: Dict[str, Any] = {}
+        if start:
+            range_filter["created_at__gte"] = start
+        if end:
+            range_filter["created_at__lte"] = end
+
+        # Grouped by symbol id, the order of the (symbol, created_at) index
+        rows = PriceTick.objects.filter(symbol__name__in=names, **range_filter).order_by(
+            "symbol_id", "created_at").values(
+            "created_at", "price", name=F("symbol__name")).iterator(chunk_size=2000)
+        carried = last_known_prices(names, start) if start else {}
+
+        # Only one stock's history is held in memory at a time
+        histories: Dict[str, List[Dict[str, Any]]] = {}
+        for name, group in groupby(rows, key=lambda row: row["name"]):
+            history = list(group)
+            if name in carried:
+                history.insert(0, {"created_at": start, "price": carried.pop(name)})
+            histories[name] = StockDetailsSerializer(
+                evenly_spaced(history, points), many=True).data
+        # Stocks without a tick in the range keep their last known price
+        for name, price in carried.items():
+            histories[name] = StockDetailsSerializer(
+                [{"created_at": start, "price": price}], many=True).data
+
+        data = [
+            {
+                "name": name,
+                "latest_price": histories[name][-1]["price"] if histories.get(name) else None,
+                "history": histories.get(name, []),
+            }
+            for name in names
+        ]
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, data, count=len(data))
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
+def get_prices_as_of(request: Request) -> Response:
+    """
+    Retrieve the last price of several stocks at or before a point in time.
+
+    Takes the time as `at` (ISO 8601) and either a comma separated list of
+    `names` or `holdings=true` for the stocks the user currently holds. Every
+    stock is priced in a single query, by one seek per stock on the
+    (symbol, created_at) index, so the cost does not depend on history length.
+    Stocks without a tick by then, or unknown ones, have a null price.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing one entry per requested stock.
+    """
+    try:
+        try:
+            at = parse_datetime_param(request.query_params.get("at", None))
+        except ValueError:
+            at = None
+        names = parse_list_param(request.query_params.get("names", None))
+        use_holdings = is_truthy(request.query_params.get("holdings", None))
+        if at is None or use_holdings == bool(names) or len(names) > settings.STOCK_AS_OF_MAX_SYMBOLS:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        if use_holdings:
+            names = list(UserStock.objects.filter(user=request.user).order_by(
+                "symbol__name").values_list("symbol__name", flat=True))
+
+        stocks = latest_ticks(Symbol.objects.filter(name__in=names), at)
+        prices = {stock["name"]: stock for stock in StockSerializer(stocks, many=True).data}
+
+        data = [
+            prices.get(name) or {"name": name, "price": None, "created_at": None, "id": None}
+            for name in names
+        ]
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, data, count=len(data))
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
+def get_stock_analytics(request: Request) -> Response:
+    """
+    Retrieve technical analytics for a stock: simple and exponential moving
+    averages, rolling volatility, drawdown and period returns over an optional
+    `start`/`end` range, opened with the last price known at `start`. The
+    moving `window` defaults to 20 ticks and the series is capped at `points` points.
+
+    Results are cached per stock, window and range until the next ingest.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the analytics.
+    """
+    try:
+        stock_name = request.query_params.get("name", None)
+        if not stock_name:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start = parse_datetime_param(request.query_params.get("start", None))
+            end = parse_datetime_param(request.query_params.get("end", None))
+            window = int(request.query_params.get("window", 20))
+            points = min(
+                int(request.query_params.get("points", settings.STOCK_ANALYTICS_MAX_POINTS)),
+                settings.STOCK_ANALYTICS_MAX_POINTS
+            )
+            if not 2 <= window <= settings.STOCK_ANALYTICS_MAX_WINDOW or points <= 0:
+                raise ValueError("window or points out of range")
+        except ValueError:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        range_key = md5(repr((start, end, points)).encode()).hexdigest()
+        cache_key = f"stock_analytics:{stock_name}:{window}:{get_ingest_version()}:{range_key}"
+        data: Optional[Dict[str, Any]] = cache.get(cache_key)
+
+        if data is None:
+            range_filter: Dict[str, Any] = {}
+            if start:
+                range_filter["created_at__gte"] = start
+            if end:
+                range_filter["created_at__lte"] = end
+
+            # pandas is only loaded once an analytics computation actually runs
+            from .analytics import technical_indicators
+
+            rows: Iterable[Tuple[datetime, Decimal]] = PriceTick.objects.filter(
+                symbol__name=stock_name, **range_filter).order_by("created_at").values_list("created_at", "price")
+            if start:
+                # Open the range with the price known at its start
+                carried = last_known_prices([stock_name], start)
+                if stock_name in carried:
+                    rows = chain([(start, carried[stock_name])], rows)
+            data = {"name": stock_name, "window": window,
+                    **technical_indicators(rows, window, points)}
+            cache.set(cache_key, data,
+                      timeout=settings.STOCK_ANALYTICS_CACHE_TIMEOUT)
+
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, data)
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(["POST"])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
+@throttle_classes([TradeThrottle])
 def modify_user_stock(request: Request, mode: str) -> Response:
     """
     Modify the user's stock based on the action mode (buy/sell).
@@ -140,13 +563,16 @@ def modify_user_stock(request: Request, mode: str) -> Response:
         Response: The HTTP response object indicating the result of the operation.
     """
     try:
+        name = request.data.get("name")
         user_stock = UserStock.objects.filter(
-            user=request.user, stock__name=request.data.get("name")).first()
+            user=request.user, symbol__name=name).select_related("symbol").first()
 
         if not user_stock:
             if mode == "buy":
-                user_stock = UserStock(user=request.user, stock=Stock(
-                    name=request.data.get("name"), price=0.0))
+                symbol = Symbol.objects.filter(name=name).first()
+                if symbol is None:
+                    return response_structure("Stock does not exist", status.HTTP_400_BAD_REQUEST)
+                user_stock = UserStock(user=request.user, symbol=symbol)
             else:
                 return response_structure("User Stock does not exist", status.HTTP_400_BAD_REQUEST)
 
@@ -154,8 +580,413 @@ def modify_user_stock(request: Request, mode: str) -> Response:
             user_stock, data=request.data, mode=mode)
         if serializer.is_valid():
             serializer.save()
+            # Let the client read its own trade until the replicas catch up
+            pin_client_to_primary(request)
             return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK)
         else:
             return response_structure("Failed to update stock", status.HTTP_400_BAD_REQUEST, serializer.errors)
+    except ValidationError as e:
+        # The holding changed, e.g. an order was filled, since it was validated
+        return response_structure("Failed to update stock", status.HTTP_400_BAD_REQUEST, e.detail)
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["POST"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([TradeThrottle])
+def place_order(request: Request) -> Response:
+    """
+    Place a limit or stop order, filled by the ingest at the first price
+    reaching its trigger price.
+
+    Args:
+        request (Request): The HTTP request object containing the order.
+
+    Returns:
+        Response: The HTTP response object containing the placed order.
+    """
+    try:
+        serializer = OrderSerializer(data=request.data, context={"user": request.user})
+        if serializer.is_valid():
+            serializer.save(user=request.user)
+            return response_structure(SUCCESS_MESSAGE, status.HTTP_201_CREATED, serializer.data)
+        return response_structure("Failed to place order", status.HTTP_400_BAD_REQUEST, serializer.errors)
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
+def get_user_orders(request: Request) -> Response:
+    """
+    Retrieve the user's orders, newest first, with optional pagination and
+    `status` and stock `name` filtering.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the orders.
+    """
+    page = request.query_params.get("page", 1)
+    limit = request.query_params.get("limit", 50)
+    order_status = request.query_params.get("status", None)
+    name = request.query_params.get("name", None)
+
+    try:
+        orders = Order.objects.filter(user=request.user).select_related("symbol")
+        if order_status:
+            orders = orders.filter(status=order_status)
+        if name:
+            orders = orders.filter(symbol__name=name)
+
+        paginator = Paginator(orders, int(limit))
+        serializer = OrderSerializer(
+            paginator.get_page(int(page)).object_list, many=True)
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, serializer.data, count=paginator.count)
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["POST"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([TradeThrottle])
+def cancel_order(request: Request, order_id: int) -> Response:
+    """
+    Cancel one of the user's open orders.
+
+    Args:
+        request (Request): The HTTP request object.
+        order_id (int): The id of the order to cancel.
+
+    Returns:
+        Response: The HTTP response object indicating the result of the operation.
+    """
+    try:
+        # Conditional update, so an order filled meanwhile is never cancelled
+        cancelled = Order.objects.filter(
+            id=order_id, user=request.user, status=Order.OPEN
+        ).update(status=Order.CANCELLED, modified_at=timezone.now())
+        if cancelled:
+            return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK)
+        if Order.objects.filter(id=order_id, user=request.user).exists():
+            return response_structure("Order is not open", status.HTTP_400_BAD_REQUEST)
+        return response_structure("Order does not exist", status.HTTP_404_NOT_FOUND)
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([PortfolioThrottle])
+def get_portfolio_history(request: Request) -> Response:
+    """
+    Retrieve the value of the user's current holdings over time.
+
+    Prices of every held stock are loaded in a single query, aligned on a common
+    time grid and weighted by the held quantities. Supports an optional
+    `start`/`end` range, a resampling `interval` (e.g. '1h') and a `points` cap.
+    Results are cached per user, holdings and ingest version.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the portfolio value series.
+    """
+    # pandas is only loaded once the endpoint is actually used
+    from .analytics import portfolio_value_history, validate_interval
+
+    try:
+        try:
+            start = parse_datetime_param(request.query_params.get("start", None))
+            end = parse_datetime_param(request.query_params.get("end", None))
+            interval = validate_interval(request.query_params.get("interval", None))
+            points = min(
+                int(request.query_params.get("points", settings.PORTFOLIO_HISTORY_MAX_POINTS)),
+                settings.PORTFOLIO_HISTORY_MAX_POINTS
+            )
+            if points <= 0:
+                raise ValueError("points must be positive")
+        except ValueError:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        holdings: Dict[str, int] = dict(UserStock.objects.filter(
+            user=request.user).values_list("symbol__name", "quantity"))
+        if not holdings:
+            return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, [])
+
+        # The holdings themselves are part of the key, so a trade invalidates it
+        fingerprint = md5(repr((
+            sorted(holdings.items()), start, end, interval, points
+        )).encode()).hexdigest()
+        cache_key = f"portfolio_history:{request.user.id}:{get_ingest_version()}:{fingerprint}"
+        data: Optional[List[Dict[str, str]]] = cache.get(cache_key)
+
+        if data is None:
+            window = Q()
+            if start:
+                # Carry in the last price before the range so it starts with a known value
+                last_before_start = latest_ticks(
+                    Symbol.objects.filter(name__in=holdings), start, sources=[]).values("latest_tick_id")
+                window &= Q(created_at__gte=start) | Q(id__in=last_before_start)
+            if end:
+                window &= Q(created_at__lte=end)
+
+            rows = PriceTick.objects.filter(window, symbol__name__in=holdings).order_by(
+                "created_at").values_list("symbol__name", "created_at", "price")
+            data = portfolio_value_history(holdings, rows, interval, points)
+            cache.set(cache_key, data,
+                      timeout=settings.PORTFOLIO_HISTORY_CACHE_TIMEOUT)
+
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, data, count=len(data))
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
+def get_user_trades(request: Request) -> Response:
+    """
+    Retrieve the user's trade history, newest first, with optional pagination
+    and stock name filtering, together with the total realized profit or loss.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the trades.
+    """
+    page = request.query_params.get("page", 1)
+    limit = request.query_params.get("limit", 50)
+    name = request.query_params.get("name", None)
+
+    try:
+        trades = Trade.objects.filter(user=request.user).select_related("symbol")
+        if name:
+            trades = trades.filter(symbol__name=name)
+
+        paginator = Paginator(trades, int(limit))
+        serializer = TradeSerializer(
+            paginator.get_page(int(page)).object_list, many=True)
+        total_realized_pnl = trades.aggregate(
+            total=Sum("realized_pnl"))["total"] or 0
+
+        return response_structure(
+            SUCCESS_MESSAGE, status.HTTP_200_OK, serializer.data,
+            count=paginator.count, realized_pnl=f"{total_realized_pnl:.6f}")
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([PortfolioThrottle])
+def get_user_holdings_as_of(request: Request) -> Response:
+    """
+    Reconstruct the user's holdings at the time given by the `at` parameter
+    (ISO 8601) from the nearest holding snapshot and the trades after it.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the holdings at that time.
+    """
+    try:
+        try:
+            at = parse_datetime_param(request.query_params.get("at", None))
+        except ValueError:
+            at = None
+        if at is None:
+            return response_structure("Invalid request", status.HTTP_400_BAD_REQUEST)
+
+        data = [
+            {"name": name, "quantity": holding["quantity"],
+             "invested_amount": f"{holding['invested_amount']:.2f}"}
+            for name, holding in sorted(holdings_as_of(request.user, at).items())
+        ]
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, data, count=len(data))
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
+def get_watchlists(request: Request) -> Response:
+    """
+    Retrieve the user's watchlists with their stocks.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the watchlists.
+    """
+    try:
+        watchlists = Watchlist.objects.filter(user=request.user).prefetch_related(
+            Prefetch("symbols", queryset=Symbol.objects.only("name")))
+        serializer = WatchlistSerializer(watchlists, many=True)
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, serializer.data, count=len(serializer.data))
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["POST"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([WatchlistThrottle])
+def create_watchlist(request: Request) -> Response:
+    """
+    Create a watchlist from a `name` and an optional list of stock `symbols`.
+
+    Args:
+        request (Request): The HTTP request object containing the watchlist.
+
+    Returns:
+        Response: The HTTP response object containing the created watchlist.
+    """
+    try:
+        serializer = WatchlistSerializer(data=request.data, context={"user": request.user})
+        if serializer.is_valid():
+            serializer.save(user=request.user)
+            pin_client_to_primary(request)
+            return response_structure(SUCCESS_MESSAGE, status.HTTP_201_CREATED, serializer.data)
+        return response_structure("Failed to create watchlist", status.HTTP_400_BAD_REQUEST, serializer.errors)
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["POST"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([WatchlistThrottle])
+def modify_watchlist(request: Request, watchlist_id: str, mode: str) -> Response:
+    """
+    Add stocks to or remove stocks from one of the user's watchlists.
+
+    Args:
+        request (Request): The HTTP request object containing the stock `symbols`.
+        watchlist_id (str): The id of the watchlist.
+        mode (str): The action mode ("add" or "remove").
+
+    Returns:
+        Response: The HTTP response object indicating the result of the operation.
+    """
+    try:
+        watchlist = Watchlist.objects.filter(id=watchlist_id, user=request.user).first()
+        if watchlist is None:
+            return response_structure("Watchlist does not exist", status.HTTP_404_NOT_FOUND)
+
+        serializer = ModifyWatchlistSerializer(watchlist, data=request.data, mode=mode)
+        if serializer.is_valid():
+            serializer.save()
+            pin_client_to_primary(request)
+            return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK)
+        return response_structure("Failed to update watchlist", status.HTTP_400_BAD_REQUEST, serializer.errors)
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["POST"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([WatchlistThrottle])
+def delete_watchlist(request: Request, watchlist_id: int) -> Response:
+    """
+    Delete one of the user's watchlists.
+
+    Args:
+        request (Request): The HTTP request object.
+        watchlist_id (int): The id of the watchlist to delete.
+
+    Returns:
+        Response: The HTTP response object indicating the result of the operation.
+    """
+    try:
+        deleted, _ = Watchlist.objects.filter(id=watchlist_id, user=request.user).delete()
+        if deleted:
+            pin_client_to_primary(request)
+            return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK)
+        return response_structure("Watchlist does not exist", status.HTTP_404_NOT_FOUND)
+    except Exception:
+        return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([ReadThrottle])
+def get_watchlist_quotes(request: Request, watchlist_id: int) -> Response:
+    """
+    Retrieve the latest price, the change since the previous tick and a
+    sparkline of the latest prices of every stock in one of the user's watchlists.
+
+    The latest `WATCHLIST_SPARKLINE_POINTS` prices of every watched stock are
+    fetched in a single query, one correlated subquery per point, each a seek
+    on the (symbol, created_at) index, so the cost does not grow with the
+    length of the price histories. Results are cached per watchlist,
+    modification and ingest version. Stocks without any stored price are left out.
+
+    Args:
+        request (Request): The HTTP request object.
+        watchlist_id (int): The id of the watchlist.
+
+    Returns:
+        Response: The HTTP response object containing one quote per watched stock.
+    """
+    try:
+        watchlist = Watchlist.objects.filter(
+            id=watchlist_id, user=request.user).only("modified_at").first()
+        if watchlist is None:
+            return response_structure("Watchlist does not exist", status.HTTP_404_NOT_FOUND)
+
+        cache_key = f"watchlist_quotes:{watchlist.id}:{watchlist.modified_at.timestamp()}:{get_ingest_version()}"
+        data: Optional[List[Dict[str, Any]]] = cache.get(cache_key)
+
+        if data is None:
+            ticks = PriceTick.objects.filter(symbol=OuterRef("pk")).order_by("-created_at", "-id")
+            # Newest first: point_0 is the latest price
+            points = [f"point_{position}" for position in range(settings.WATCHLIST_SPARKLINE_POINTS)]
+            rows = Symbol.objects.filter(watchlists=watchlist).annotate(
+                latest_created_at=Subquery(ticks.values("created_at")[:1]),
+                **{
+                    point: Subquery(
+                        ticks.values("price")[position:position + 1],
+                        output_field=DecimalField(max_digits=12, decimal_places=6)
+                    )
+                    for position, point in enumerate(points)
+                }
+            ).filter(latest_created_at__isnull=False).order_by("name").values_list(
+                "name", "latest_created_at", *points)
+
+            data = []
+            for name, created_at, *newest_first in rows:
+                prices = [point for point in reversed(newest_first) if point is not None]
+                price = prices[-1]
+                previous = prices[-2] if len(prices) > 1 else None
+                change = price - previous if previous is not None else None
+                data.append({
+                    "name": name,
+                    "price": f"{price:.6f}",
+                    "created_at": DateTimeField().to_representation(created_at),
+                    "change": f"{change:.6f}" if change is not None else None,
+                    "change_percent": f"{change / previous * 100:.2f}" if change is not None else None,
+                    "sparkline": [f"{point:.6f}" for point in prices],
+                })
+            cache.set(cache_key, data, timeout=settings.WATCHLIST_QUOTES_CACHE_TIMEOUT)
+
+        return response_structure(SUCCESS_MESSAGE, status.HTTP_200_OK, data, count=len(data))
     except Exception:
         return response_structure(SERVER_ERROR_MESSAGE, status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -22,5 +22,13 @@ app.conf.beat_schedule = {
     "periodic": {
         "task": "stock.tasks.update_stocks",
         "schedule": crontab(minute="*/1"),
+    },
+    "archive": {
+        "task": "stock.tasks.archive_stock_history",
+        "schedule": crontab(minute=0, hour=0),
+    },
+    "holding-snapshots": {
+        "task": "stock.tasks.snapshot_holdings",
+        "schedule": crontab(minute=0),
     }
 }
\ No newline at end of file
@@ -0,0 +1,134 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import sha256
+from typing import Any, Callable, Iterator, Optional, Type
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponse
+
+PRIMARY_DATABASE = "default"
+# HTTP methods that never write, and can therefore be served by a replica
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Whether reads in the current request (or task) must go to the primary
+_pinned_to_primary: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+
+
+def _pin_cache_key(request: HttpRequest) -> Optional[str]:
+    """
+    Build the cache key identifying the client of a request, derived from its
+    Authorization header so it can be checked before authentication runs.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Optional[str]: The cache key, or None for anonymous requests.
+    """
+    authorization: str = request.META.get("HTTP_AUTHORIZATION", "")
+    if not authorization:
+        return None
+    return f"replica_pin:{sha256(authorization.encode()).hexdigest()}"
+
+
+def pin_client_to_primary(request: HttpRequest) -> None:
+    """
+    Send reads of the client behind a request to the primary for
+    `REPLICA_PIN_SECONDS`, so it reads its own writes despite replication lag.
+    Call this after a successful write such as a trade.
+
+    Args:
+        request (HttpRequest): The HTTP request that performed the write.
+    """
+    _pinned_to_primary.set(True)
+    key = _pin_cache_key(request)
+    if key is not None:
+        cache.set(key, True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+@contextmanager
+def pin_to_primary() -> Iterator[None]:
+    """
+    Context manager sending every read inside the block to the primary.
+    Used by background jobs that must not observe replication lag.
+    """
+    token = _pinned_to_primary.set(True)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending reads of the apps listed in `DATABASE_REPLICA_APPS`
+    to a random replica from `DATABASE_REPLICAS`, and everything else to the primary.
+
+    Writes always go to the primary. Once a request has written, or when its
+    client traded within the last `REPLICA_PIN_SECONDS`, its reads are pinned
+    to the primary as well.
+    """
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> str:
+        """
+        Pick the database for a read query.
+        """
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or _pinned_to_primary.get()
+            or model._meta.app_label not in settings.DATABASE_REPLICA_APPS
+        ):
+            return PRIMARY_DATABASE
+        return random.choice(replicas)
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> str:
+        """
+        Pick the database for a write query and pin the remaining reads of the
+        request to the primary.
+        """
+        _pinned_to_primary.set(True)
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        """
+        Allow relations between objects on the primary or any replica, since
+        they all hold the same data.
+        """
+        databases = {PRIMARY_DATABASE, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints: Any) -> Optional[bool]:
+        """
+        Replicas carry the same schema as the primary.
+        """
+        return True
+
+
+class ReplicaPinningMiddleware:
+    """
+    Middleware deciding per request whether reads may use a replica.
+
+    Requests with an unsafe method and requests from clients that recently
+    wrote are pinned to the primary. The pin is reset when the request ends so
+    it never leaks into the next request handled by the same thread.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        pinned: bool = request.method not in SAFE_METHODS
+        if not pinned and settings.DATABASE_REPLICAS:
+            key = _pin_cache_key(request)
+            pinned = key is not None and bool(cache.get(key))
+
+        token = _pinned_to_primary.set(pinned)
+        try:
+            return self.get_response(request)
+        finally:
+            _pinned_to_primary.reset(token)
@@ -0,0 +1,40 @@
+from typing import Any, Mapping, Optional
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer encoding responses as MessagePack, selected by content negotiation
+    with `Accept: application/msgpack` or with `?format=msgpack`.
+
+    The payload is the same structure as the JSON responses, in fewer bytes and
+    without text encoding on either side, for clients polling frequently.
+    """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None
+    ) -> bytes:
+        """
+        Encode the response data.
+
+        Args:
+            data (Any): The response data.
+            accepted_media_type (Optional[str]): The negotiated media type.
+            renderer_context (Optional[Mapping[str, Any]]): The view, request and response.
+
+        Returns:
+            bytes: The MessagePack encoded data, empty for an empty response.
+        """
+        if data is None:
+            return b""
+        # Values MessagePack has no type for (decimals, datetimes, ...) are encoded as in JSON
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True)
@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'tradex.throttling.LoadSheddingMiddleware',
+    'tradex.db_router.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,6 +92,45 @@ DATABASES = {
     }
 }
 
+# Read replicas, given as a comma separated list of SQLite files standing in for
+# real replicas. Pointing a replica at the primary's own file is the simplest way
+# to exercise the routing locally. In tests every replica mirrors the primary.
+for index, replica_path in enumerate(filter(None, getenv("REPLICA_DATABASE_PATHS", "").split(","))):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / replica_path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['tradex.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Apps whose reads are served by replicas
+DATABASE_REPLICA_APPS = ['stock']
+# How long a client that just traded keeps reading from the primary
+REPLICA_PIN_SECONDS = int(getenv("REPLICA_PIN_SECONDS", 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# A shared Redis cache is used when REDIS_CACHE_URL is set, so every web and Celery
+# process sees the same entries. Otherwise each process keeps its own local cache.
+REDIS_CACHE_URL = getenv("REDIS_CACHE_URL")
+
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -137,8 +178,129 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# JSON stays the default; clients may negotiate MessagePack with
+# `Accept: application/msgpack` or `?format=msgpack`
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'tradex.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
 #CELERY SETTINGS
 
 CELERY_TIMEZONE = "UTC"
 CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
 CELERY_RESULT_BACKEND = 'django-db'
+# Store task names and arguments and report STARTED, so admin-triggered jobs
+# can be followed in the task results admin
+CELERY_RESULT_EXTENDED = True
+CELERY_TASK_TRACK_STARTED = True
+
+# Upper bound on the number of stocks generated by one admin generation job
+STOCK_GENERATION_MAX_ROWS = 5_000_000
+
+# INGEST SETTINGS
+
+# When enabled, ingest only stores ticks whose price moved by more than
+# STOCK_INGEST_MIN_CHANGE (relative, e.g. 0.001 for 0.1%) from the last stored
+# price of the stock; 0 stores every change. Read endpoints carry the last known
+# price forward, so suppressed ticks do not leave gaps.
+STOCK_INGEST_SUPPRESS_UNCHANGED = getenv("STOCK_INGEST_SUPPRESS_UNCHANGED", "False") == "True"
+STOCK_INGEST_MIN_CHANGE = float(getenv("STOCK_INGEST_MIN_CHANGE", 0))
+# Files whose content was already ingested are always skipped. When enabled,
+# rows of files carrying a `timestamp` column are also dropped if a tick of the
+# same stock with the same timestamp was already stored or appears earlier in the run.
+STOCK_INGEST_DEDUP_ROWS = getenv("STOCK_INGEST_DEDUP_ROWS", "False") == "True"
+# Invalid rows of ingested files are written here with the reason they were rejected
+STOCK_QUARANTINE_DIR = MEDIA_ROOT / "stock_quarantine"
+
+# PRICE ARCHIVE SETTINGS
+
+# When enabled, price history older than STOCK_ARCHIVE_AFTER_DAYS is periodically
+# written to memory-mapped columnar files and served from there by the details endpoint
+STOCK_ARCHIVE_ENABLED = getenv("STOCK_ARCHIVE_ENABLED", "False") == "True"
+STOCK_ARCHIVE_DIR = MEDIA_ROOT / "price_archive"
+STOCK_ARCHIVE_AFTER_DAYS = int(getenv("STOCK_ARCHIVE_AFTER_DAYS", 30))
+
+# DATA EXPORT SETTINGS
+
+# Bulk exports are written here and downloaded from the admin, never served as media
+DATA_EXPORT_DIR = MEDIA_ROOT / "exports"
+# Rows fetched per database round trip, and rows per Parquet row group
+DATA_EXPORT_CHUNK_SIZE = int(getenv("DATA_EXPORT_CHUNK_SIZE", 50_000))
+
+# CACHED COMPUTATION SETTINGS
+
+# How long a process trusts its cached ingest version before re-reading it from the
+# database. Only matters without a shared cache, where ingest cannot bump it remotely.
+INGEST_VERSION_TIMEOUT = 60
+# Serialized portfolios are cached per user, holdings version and ingest version. Trades
+# and fills bump the holdings version in the cache, so the portfolio cache is only on by
+# default with a shared cache that every web and Celery process sees.
+PORTFOLIO_CACHE_ENABLED = getenv("PORTFOLIO_CACHE_ENABLED", str(bool(REDIS_CACHE_URL))) == "True"
+PORTFOLIO_CACHE_TIMEOUT = 60 * 60
+PORTFOLIO_HISTORY_CACHE_TIMEOUT = 60 * 60
+PORTFOLIO_HISTORY_MAX_POINTS = 1000
+STOCK_ANALYTICS_CACHE_TIMEOUT = 60 * 60
+STOCK_ANALYTICS_MAX_POINTS = 1000
+STOCK_ANALYTICS_MAX_WINDOW = 500
+
+# BATCH ENDPOINT SETTINGS
+
+STOCK_BATCH_MAX_SYMBOLS = 50
+STOCK_BATCH_MAX_POINTS = 200
+# Upper bound on the number of stocks priced by one as-of lookup
+STOCK_AS_OF_MAX_SYMBOLS = 2000
+
+# WATCHLIST SETTINGS
+
+WATCHLIST_MAX_SYMBOLS = 200
+# Number of latest prices in the sparkline of each watched stock
+WATCHLIST_SPARKLINE_POINTS = 20
+WATCHLIST_QUOTES_CACHE_TIMEOUT = 60 * 60
+
+# Number of stocks in each market movers list
+MARKET_MOVERS_LIMIT = 10
+
+# THROTTLING AND LOAD SHEDDING SETTINGS
+
+# Token buckets per scope as (capacity, refill rate in tokens per second), applied
+# per user and per endpoint. Bucket state is kept in the (shared) cache.
+THROTTLE_BUCKETS = {
+    'read': (120, 2.0),
+    'portfolio': (30, 0.5),
+    'trade': (20, 1.0),
+    'watchlist': (30, 0.5),
+}
+
+# Read requests under LOAD_SHED_PATH_PREFIX get a 503 while the primary database
+# round trip or the Celery queue depth is above its threshold
+LOAD_SHED_ENABLED = getenv("LOAD_SHED_ENABLED", "False") == "True"
+LOAD_SHED_PATH_PREFIX = "/api/"
+LOAD_SHED_PROBE_INTERVAL = 5  # seconds
+LOAD_SHED_DB_LATENCY_MS = 250
+LOAD_SHED_QUEUE_DEPTH = 1000
+
+# LATEST PRICE SNAPSHOT SETTINGS
+
+# Ingest publishes the latest price of every stock to a memory-mapped file shared by
+# all web workers on the host (point it to /dev/shm to keep it in memory). Readers
+# fall back to the database when the file was not refreshed for MAX_AGE seconds.
+LATEST_PRICE_SNAPSHOT_ENABLED = getenv("LATEST_PRICE_SNAPSHOT_ENABLED", "True") == "True"
+LATEST_PRICE_SNAPSHOT_PATH = getenv("LATEST_PRICE_SNAPSHOT_PATH", BASE_DIR / "var" / "latest_prices.bin")
+LATEST_PRICE_SNAPSHOT_MAX_AGE = 180  # seconds
+
+# HOLDING SNAPSHOT SETTINGS
+
+# Snapshot runs only cover trades created at least this long ago, so every trade
+# they cover is committed whatever its id. It must exceed the duration of the
+# longest transaction recording trades.
+HOLDING_SNAPSHOT_LOOKBACK = 300  # seconds
+
+# Rows fetched per database round trip by streamed responses
+STREAMING_CHUNK_SIZE = 2000
+
+# Filtered admin changelists of large tables count at most this many rows
+ADMIN_PAGINATOR_COUNT_LIMIT = 10000
@@ -0,0 +1,159 @@
+import gzip
+import json
+import msgpack
+from typing import Iterable, Iterator
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from tradex import throttling
+from tradex.utils import SERVER_ERROR_MESSAGE, streaming_response_structure
+
+REPLICA_DATABASE = "replica"
+
+# A test mirror of the primary, registered before the test databases are set up
+# so it opens the same test database. Only the routing tests send reads to it.
+connections.settings.setdefault(REPLICA_DATABASE, {
+    **connections.settings["default"],
+    "TEST": {**connections.settings["default"]["TEST"], "MIRROR": "default"},
+})
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA_DATABASE])
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """
+    Tests for routing reads to a replica and pinning clients that wrote to the
+    primary. The replica is a test mirror of the primary, so it sees the rows
+    committed by the test.
+    """
+    databases = {"default", REPLICA_DATABASE}
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def client_for(self, username: str) -> APIClient:
+        user = User.objects.create_user(username=username, password="password")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+        return client
+
+    def get_watchlists(self, client: APIClient) -> CaptureQueriesContext:
+        with CaptureQueriesContext(connections[REPLICA_DATABASE]) as replica_queries:
+            response = client.get("/api/stock/watchlists/")
+        self.assertEqual(response.status_code, 200)
+        return replica_queries
+
+    def test_reads_use_the_replica_until_the_client_writes(self) -> None:
+        client, other_client = self.client_for("writer"), self.client_for("reader")
+        self.assertTrue(self.get_watchlists(client).captured_queries)
+
+        with CaptureQueriesContext(connections["default"]) as primary_queries, \
+                CaptureQueriesContext(connections[REPLICA_DATABASE]) as replica_queries:
+            response = client.post("/api/stock/watchlists/create/", {"name": "Tech"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(any(query["sql"].startswith("INSERT") for query in primary_queries.captured_queries))
+        self.assertFalse(replica_queries.captured_queries)
+
+        # The writer reads its own write from the primary, other clients keep using the replica
+        self.assertFalse(self.get_watchlists(client).captured_queries)
+        self.assertTrue(self.get_watchlists(other_client).captured_queries)
+
+
+@override_settings(THROTTLE_BUCKETS={"read": (2, 0.5), "watchlist": (1, 0.1), "trade": (20, 1.0)})
+class TokenBucketThrottleTests(TestCase):
+    """
+    Tests for the per-user, per-endpoint token buckets.
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        throttling._local_blocks.clear()
+        self.now = 1_000_000.0
+        clock = mock.patch.object(throttling.time, "time", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        user = User.objects.create_user(username="trader", password="password")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+
+    def test_empty_bucket_is_throttled_until_it_refills(self) -> None:
+        self.assertEqual([self.client.get("/api/stock/all/").status_code for _ in range(2)], [200, 200])
+
+        response = self.client.get("/api/stock/all/")
+        self.assertEqual(response.status_code, 429)
+        # One token refills in 1 / 0.5 seconds
+        self.assertEqual(response["Retry-After"], "2")
+
+        self.now += 1
+        self.assertEqual(self.client.get("/api/stock/all/").status_code, 429)
+        self.now += 1
+        self.assertEqual(self.client.get("/api/stock/all/").status_code, 200)
+
+    def test_endpoints_have_their_own_buckets(self) -> None:
+        for _ in range(2):
+            self.client.get("/api/stock/all/")
+        self.assertEqual(self.client.get("/api/stock/all/").status_code, 429)
+        self.assertEqual(self.client.get("/api/stock/details/", {"name": "ABC"}).status_code, 200)
+
+    def test_watchlist_edits_use_the_watchlist_bucket(self) -> None:
+        response = self.client.post("/api/stock/watchlists/create/", {"name": "Tech"}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post("/api/stock/watchlists/create/", {"name": "Energy"}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "10")
+
+
+class StreamingResponseTests(SimpleTestCase):
+    """
+    Tests for encoding the response envelope while it is being sent.
+    """
+
+    def read(self, data: Iterable[dict], compress: bool = False) -> dict:
+        response = streaming_response_structure("Success", 200, data, gzip=compress, count=2)
+        body = b"".join(response.streaming_content)
+        return json.loads(gzip.decompress(body) if compress else body)
+
+    def test_envelope_matches_the_buffered_response(self) -> None:
+        for compress in (False, True):
+            self.assertEqual(self.read(iter([{"id": 1}, {"id": 2}]), compress),
+                             {"message": "Success", "count": 2, "data": [{"id": 1}, {"id": 2}]})
+
+    def test_failure_ends_the_stream_with_an_error(self) -> None:
+        def failing_rows() -> Iterator[dict]:
+            yield {"id": 1}
+            raise RuntimeError("connection lost")
+
+        for compress in (False, True):
+            with self.assertLogs("tradex.utils", "ERROR"):
+                body = self.read(failing_rows(), compress)
+            self.assertEqual(body, {"message": "Success", "count": 2, "data": [{"id": 1}],
+                                    "error": SERVER_ERROR_MESSAGE})
+
+
+class MessagePackRendererTests(TestCase):
+    """
+    Tests for negotiating MessagePack responses instead of JSON.
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        user = User.objects.create_user(username="trader", password="password")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+        self.client.post("/api/stock/watchlists/create/", {"name": "Tech"}, format="json")
+
+    def test_msgpack_carries_the_json_payload(self) -> None:
+        expected = json.loads(self.client.get("/api/stock/watchlists/").content)
+
+        for response in (self.client.get("/api/stock/watchlists/", HTTP_ACCEPT="application/msgpack"),
+                         self.client.get("/api/stock/watchlists/", {"format": "msgpack"})):
+            self.assertEqual(response["Content-Type"], "application/msgpack")
+            self.assertEqual(msgpack.unpackb(response.content), expected)
+
+    def test_json_stays_the_default(self) -> None:
+        self.assertEqual(self.client.get("/api/stock/watchlists/")["Content-Type"], "application/json")
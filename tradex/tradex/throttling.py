@@ -0,0 +1,256 @@
+import math
+import time
+from threading import Lock, Thread
+from typing import Callable, Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from rest_framework.request import Request
+from rest_framework.throttling import BaseThrottle
+from .celery import app as celery_app
+
+# Cap on the number of clients remembered by the in-process pre-check
+LOCAL_BLOCKS_MAX_SIZE = 10_000
+
+# Clients known to be throttled by this process, mapped to when they may retry
+_local_blocks: Dict[str, float] = {}
+
+# Serializes the read-modify-write of buckets in the per-process local cache
+_local_bucket_lock = Lock()
+
+# Refills a bucket and takes a token in one step on the Redis server, so
+# concurrent requests of a client can never spend the same token twice.
+# Returns whether a token was taken and the tokens there were before.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+local left = tokens
+if tokens >= 1 then
+    allowed = 1
+    left = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(left), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return {allowed, tostring(tokens)}
+"""
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Per-user, per-endpoint token bucket throttle.
+
+    Each bucket holds up to `capacity` tokens and refills at `rate` tokens per
+    second, as configured for the throttle's scope in `THROTTLE_BUCKETS`. The
+    bucket state lives in the shared cache so every worker enforces the same
+    limit, and is updated atomically: by a Lua script on Redis, or under a
+    process lock in the local cache, which no other process shares. Clients
+    this process already throttled are rejected from an in-process table
+    without touching the cache until they may retry.
+    """
+    scope: str = "read"
+
+    def __init__(self):
+        self._wait: Optional[float] = None
+
+    def get_cache_key(self, request: Request, view: Callable) -> str:
+        """
+        Build the bucket key from the scope, the endpoint and the client.
+        """
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        return f"throttle:{self.scope}:{view.__class__.__name__}:{ident}"
+
+    def allow_request(self, request: Request, view: Callable) -> bool:
+        """
+        Take a token from the client's bucket, if one is available.
+
+        Args:
+            request (Request): The HTTP request object.
+            view (Callable): The view handling the request.
+
+        Returns:
+            bool: Whether the request may proceed.
+        """
+        capacity, rate = settings.THROTTLE_BUCKETS[self.scope]
+        key = self.get_cache_key(request, view)
+        now = time.time()
+
+        # Cheap in-process pre-check, no cache round trip for clients known to be throttled
+        blocked_until = _local_blocks.get(key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                self._wait = blocked_until - now
+                return False
+            _local_blocks.pop(key, None)
+
+        allowed, tokens = self.take_token(key, capacity, rate, now)
+        if not allowed:
+            self._wait = (1 - tokens) / rate
+            if len(_local_blocks) >= LOCAL_BLOCKS_MAX_SIZE:
+                _local_blocks.clear()
+            _local_blocks[key] = now + self._wait
+        return allowed
+
+    def take_token(self, key: str, capacity: float, rate: float, now: float) -> Tuple[bool, float]:
+        """
+        Refill a bucket and take a token from it, if one is available, as one
+        atomic step.
+
+        Args:
+            key (str): The bucket key.
+            capacity (float): Maximum number of tokens in the bucket.
+            rate (float): Tokens added per second.
+            now (float): The current time, in seconds since the epoch.
+
+        Returns:
+            Tuple[bool, float]: Whether a token was taken, and the tokens in the
+            bucket before taking it.
+        """
+        # The bucket is full again after this long, so the key can expire then
+        timeout = math.ceil(capacity / rate) + 1
+
+        if settings.REDIS_CACHE_URL:
+            redis_key = cache.make_and_validate_key(key)
+            client = cache._cache.get_client(redis_key, write=True)
+            allowed, tokens = client.register_script(TOKEN_BUCKET_SCRIPT)(
+                keys=[redis_key], args=[capacity, rate, now, timeout])
+            return bool(allowed), float(tokens)
+
+        with _local_bucket_lock:
+            tokens, updated_at = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - updated_at) * rate)
+            allowed = tokens >= 1
+            cache.set(key, (tokens - 1 if allowed else tokens, now), timeout=timeout)
+        return allowed, tokens
+
+    def wait(self) -> Optional[float]:
+        """
+        Seconds until the client may retry, reported in the `Retry-After` header.
+        """
+        return self._wait
+
+
+class ReadThrottle(TokenBucketThrottle):
+    """
+    Token bucket throttle for the read endpoints.
+    """
+    scope = "read"
+
+
+class PortfolioThrottle(TokenBucketThrottle):
+    """
+    Token bucket throttle for the user's portfolio endpoints, whose queries
+    grow with the number of holdings.
+    """
+    scope = "portfolio"
+
+
+class TradeThrottle(TokenBucketThrottle):
+    """
+    Token bucket throttle for the buy and sell endpoint.
+    """
+    scope = "trade"
+
+
+class WatchlistThrottle(TokenBucketThrottle):
+    """
+    Token bucket throttle for creating, editing and deleting watchlists.
+    """
+    scope = "watchlist"
+
+
+class LoadMonitor:
+    """
+    Probes the database round trip latency and the Celery queue depth every
+    `LOAD_SHED_PROBE_INTERVAL` seconds from a background thread, so requests
+    only read the latest verdict and never wait for a probe.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+        self._overloaded: bool = False
+
+    def _probe_db_latency_ms(self) -> float:
+        """
+        Measure the round trip time of a trivial query on the primary.
+        """
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        return (time.perf_counter() - start) * 1000
+
+    def _probe_queue_depth(self) -> int:
+        """
+        Count the messages waiting in the default Celery queue, or 0 if the
+        broker cannot be reached.
+        """
+        try:
+            with celery_app.connection_for_read(connect_timeout=1) as conn:
+                conn.ensure_connection(max_retries=1)
+                queue = conn.default_channel.queue_declare(
+                    queue=celery_app.conf.task_default_queue, passive=True)
+                return queue.message_count
+        except Exception:
+            return 0
+
+    def _run(self) -> None:
+        """
+        Probe loop of the background thread.
+        """
+        while True:
+            try:
+                connection.close_if_unusable_or_obsolete()
+                self._overloaded = (
+                    self._probe_db_latency_ms() > settings.LOAD_SHED_DB_LATENCY_MS
+                    or self._probe_queue_depth() > settings.LOAD_SHED_QUEUE_DEPTH
+                )
+            except Exception:
+                # A database that cannot even answer SELECT 1 is overloaded
+                self._overloaded = True
+            time.sleep(settings.LOAD_SHED_PROBE_INTERVAL)
+
+    def is_overloaded(self) -> bool:
+        """
+        Whether the database latency or the queue depth was above its threshold
+        at the last probe. Starts the probe thread on first use.
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = Thread(
+                        target=self._run, name="load-monitor", daemon=True)
+                    self._thread.start()
+        return self._overloaded
+
+
+class LoadSheddingMiddleware:
+    """
+    Middleware rejecting read requests to the API with `503 Service Unavailable`
+    and a `Retry-After` header while the system is overloaded, keeping capacity
+    for trades. Enabled by `LOAD_SHED_ENABLED`.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+        self.monitor = LoadMonitor()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if (
+            settings.LOAD_SHED_ENABLED
+            and request.method == "GET"
+            and request.path.startswith(settings.LOAD_SHED_PATH_PREFIX)
+            and self.monitor.is_overloaded()
+        ):
+            response = JsonResponse(
+                {"message": "Service is temporarily overloaded, please retry later"}, status=503)
+            response["Retry-After"] = str(math.ceil(settings.LOAD_SHED_PROBE_INTERVAL))
+            return response
+        return self.get_response(request)
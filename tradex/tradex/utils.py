@@ -1,10 +1,22 @@
-from typing import Any, Dict, Optional
+import json
+import logging
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional, Type
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
+from rest_framework.serializers import Serializer
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
 
 # Predefined messages for consistency across responses
 SERVER_ERROR_MESSAGE = "Something went wrong!"
 SUCCESS_MESSAGE = "Success"
 
+# Streamed responses are sent in pieces of roughly this many bytes
+STREAMING_BUFFER_SIZE = 64 * 1024
+
 
 def response_structure(
     message: str,
@@ -36,3 +48,122 @@ def response_structure(
 
     # Return the Response object with the structured data and status code
     return Response(data=response_dict, status=code)
+
+
+def is_truthy(value: Optional[str]) -> bool:
+    """
+    Interpret a query parameter as a boolean flag.
+
+    Args:
+        value (Optional[str]): The raw query parameter.
+
+    Returns:
+        bool: True for '1', 'true' or 'yes' in any case.
+    """
+    return (value or "").lower() in ("1", "true", "yes")
+
+
+def serialize_queryset(
+    queryset: QuerySet,
+    serializer_class: Type[Serializer],
+    chunk_size: int,
+    **serializer_kwargs: Any
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily serialize a queryset row by row, fetching it from the database in
+    chunks so only one chunk is held in memory at a time.
+
+    The database is resolved immediately, so the rows are read from the same
+    database the request was routed to even though iteration happens later.
+
+    Args:
+        queryset (QuerySet): The queryset to serialize.
+        serializer_class (Type[Serializer]): Serializer used for each row.
+        chunk_size (int): Number of rows fetched per database round trip.
+        **serializer_kwargs (Any): Keyword arguments of the serializer.
+
+    Returns:
+        Iterator[Dict[str, Any]]: The serialized rows.
+    """
+    queryset = queryset.using(queryset.db)
+    serializer = serializer_class(**serializer_kwargs)
+    return (serializer.to_representation(obj) for obj in queryset.iterator(chunk_size=chunk_size))
+
+
+def _stream_json_envelope(message: str, data: Iterable[Any], extra: Dict[str, Any]) -> Iterator[bytes]:
+    """
+    Encode the response envelope incrementally, yielding buffered pieces.
+
+    The status and headers are already sent once the data fails, so a failure
+    ends the data list early and closes the envelope with an `error` field.
+    """
+    # The envelope always has a message, so its closing brace is reopened for data
+    head = json.dumps({"message": message, **extra}, cls=JSONEncoder)
+    buffer = [head[:-1] + ', "data": [']
+    size = 0
+    try:
+        for index, item in enumerate(data):
+            piece = ("," if index else "") + json.dumps(item, cls=JSONEncoder)
+            buffer.append(piece)
+            size += len(piece)
+            if size >= STREAMING_BUFFER_SIZE:
+                yield "".join(buffer).encode()
+                buffer, size = [], 0
+    except Exception:
+        logger.exception("Streaming the response data failed")
+        buffer.append("], " + json.dumps({"error": SERVER_ERROR_MESSAGE})[1:])
+    else:
+        buffer.append("]}")
+    yield "".join(buffer).encode()
+
+
+def _gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Compress a stream of bytes incrementally into a single gzip member.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def streaming_response_structure(
+    message: str,
+    code: int,
+    data: Iterable[Any],
+    gzip: bool = False,
+    **kwargs: Any
+) -> StreamingHttpResponse:
+    """
+    Constructs the same response structure as `response_structure`, but
+    encodes `data` item by item while the response is being sent, so memory
+    stays constant however many items there are.
+
+    The status code is sent before `data` is read, so an error while reading
+    it cannot become a 500. Instead the exception is logged, the items sent so
+    far are kept and the envelope ends with an `error` field holding
+    `SERVER_ERROR_MESSAGE`; clients must check for it. The gzip stream is
+    still completed, so the body always decodes to valid JSON.
+
+    Args:
+        message (str): The message to include in the response.
+        code (int): The HTTP status code for the response.
+        data (Iterable[Any]): Iterable of JSON serializable items, consumed lazily.
+        gzip (bool): Whether to gzip the response body on the fly.
+        **kwargs (Any): Additional keyword arguments to include in the response.
+
+    Returns:
+        StreamingHttpResponse: A streaming response with the structured data.
+    """
+    content = _stream_json_envelope(message, data, kwargs)
+    if gzip:
+        content = _gzip_stream(content)
+
+    response = StreamingHttpResponse(
+        content, status=code, content_type="application/json")
+    if gzip:
+        response["Content-Encoding"] = "gzip"
+    response["Vary"] = "Accept-Encoding"
+    return response